@@ -0,0 +1,279 @@
+"""
+Admission control for LLM-backed move requests.
+
+Every request is priced before any work starts, in expected LLM proposal
+calls (`estimate_cost`: 1 for CoT, roughly one per expanded node for ToT,
+0 for the exact solver and for opening-book positions). Two limits apply:
+
+- a per-client token bucket (`CLIENT_RATE` calls/s, bursts up to
+  `CLIENT_BURST`), keyed by the X-Client-Id header or the peer address
+- a global budget of estimated calls in flight in this process
+  (`ADMISSION_LLM_BUDGET`)
+
+A request that does not fit is handled by `ADMISSION_POLICY`:
+
+- "reject":  429 with Retry-After
+- "queue":   wait (at most `ADMISSION_QUEUE_MAX` waiters at a time) up to
+             `ADMISSION_QUEUE_TIMEOUT_S` for tokens and budget, then 429
+- "degrade": run the first cheaper variant that fits now: a narrower or
+             shallower ToT, then CoT, then the exact solver (always fits)
+
+A rate or budget of 0 disables that limit.
+"""
+from __future__ import annotations
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from api.schemas import MoveRequest
+from checkpoint_3.config import MCTS_ITERATIONS
+
+ADMISSION_POLICY = os.getenv("ADMISSION_POLICY", "degrade")
+ADMISSION_LLM_BUDGET = float(os.getenv("ADMISSION_LLM_BUDGET", "64"))
+ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+ADMISSION_QUEUE_MAX = int(os.getenv("ADMISSION_QUEUE_MAX", "100"))
+CLIENT_RATE = float(os.getenv("CLIENT_RATE", "10"))
+CLIENT_BURST = float(os.getenv("CLIENT_BURST", "200"))
+MAX_TRACKED_CLIENTS = 10_000
+
+POLICIES = ("reject", "queue", "degrade")
+
+
+def estimate_cost(req: MoveRequest) -> float:
+    """Expected LLM proposal calls for `req` (an upper estimate; forced moves and caches make it cheaper)."""
+    if req.mode == 'solve':
+        return 0.0
+    if req.mode == 'cot':
+        return 1.0
+    empty = sum(v is None for v in req.board)
+    if req.strategy == 'mcts':
+        return float(min(req.iterations or MCTS_ITERATIONS, 4 ** empty))
+    # One call per expanded node: 1 + b + b^2 + ... down to depth - 1, never wider than the legal moves
+    beam = req.beam or 2
+    calls, width = 0, 1
+    for ply in range(min(req.depth or 2, empty)):
+        calls += width
+        width *= min(beam, empty - ply)
+    return float(calls)
+
+
+def cheaper_variants(req: MoveRequest) -> List[MoveRequest]:
+    """Progressively cheaper stand-ins for `req`, ending with the exact solver."""
+    out: List[MoveRequest] = []
+    if req.mode == 'tot':
+        if req.strategy == 'mcts':
+            iterations = req.iterations or MCTS_ITERATIONS
+            while iterations > 8:
+                iterations //= 2
+                out.append(req.model_copy(update={"iterations": iterations}))
+        else:
+            # Every narrower/shallower search, most expensive first; one per cost, the widest (fewest
+            # sequential LLM round trips) of equals
+            shapes = [req.model_copy(update={"beam": b, "depth": d})
+                      for b in range(1, (req.beam or 2) + 1) for d in range(1, (req.depth or 2) + 1)]
+            shapes.sort(key=lambda v: (-estimate_cost(v), -v.beam))
+            cost = estimate_cost(req)
+            for variant in shapes:
+                if estimate_cost(variant) < cost:
+                    cost = estimate_cost(variant)
+                    out.append(variant)
+        out.append(req.model_copy(update={"mode": "cot"}))
+    if req.mode in ('tot', 'cot'):
+        out.append(req.model_copy(update={"mode": "solve"}))
+    return out
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, cost: float, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= cost
+
+    def reserve(self, cost: float, now: float) -> float:
+        """Take `cost` tokens, going into debt if needed; returns the seconds until the debt is repaid."""
+        self._refill(now)
+        self.tokens -= cost
+        return max(-self.tokens / self.rate, 0.0)
+
+    def refund(self, cost: float) -> None:
+        self.tokens = min(self.burst, self.tokens + cost)
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after_s: float):
+        super().__init__(reason)
+        self.retry_after_s = retry_after_s
+
+
+@dataclass
+class Ticket:
+    req: MoveRequest            # what will run: the request itself or a cheaper variant
+    cost: float
+    outcome: str                # "admitted", "queued" or "degraded"
+    reason: Optional[str] = None  # why it was degraded: "rate_limit" or "llm_budget"
+
+
+class Admission:
+    def __init__(
+        self,
+        policy: str = ADMISSION_POLICY,
+        budget: float = ADMISSION_LLM_BUDGET,
+        rate: float = CLIENT_RATE,
+        burst: float = CLIENT_BURST,
+        queue_timeout_s: float = ADMISSION_QUEUE_TIMEOUT_S,
+        queue_max: int = ADMISSION_QUEUE_MAX,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown admission policy {policy!r}; expected one of {POLICIES}")
+        self.policy = policy
+        self.budget = budget
+        self.rate = rate
+        self.burst = burst
+        self.queue_timeout_s = queue_timeout_s
+        self.queue_max = queue_max
+        self.clock = clock
+        self.in_flight = 0.0
+        self.waiting = 0
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._released: Optional[asyncio.Condition] = None
+        self.counts: Dict[str, int] = {"admitted": 0, "queued": 0, "degraded": 0, "rejected": 0}
+
+    # ----- limits -----
+
+    def _bucket(self, client: str) -> Optional[TokenBucket]:
+        if self.rate <= 0:
+            return None
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, self.clock())
+            while len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client)
+        return bucket
+
+    def _budget_fits(self, cost: float) -> bool:
+        # An idle server admits anything, so a request above the whole budget still runs eventually
+        return self.budget <= 0 or cost == 0 or self.in_flight == 0 or self.in_flight + cost <= self.budget
+
+    def _fits_now(self, bucket: Optional[TokenBucket], cost: float) -> bool:
+        return (bucket is None or cost == 0 or bucket.available(cost, self.clock())) and self._budget_fits(cost)
+
+    def _condition(self) -> asyncio.Condition:
+        if self._released is None:
+            self._released = asyncio.Condition()
+        return self._released
+
+    # ----- admission -----
+
+    def _take(self, ticket: Ticket) -> Ticket:
+        with self._lock:
+            self.in_flight += ticket.cost
+            self.counts[ticket.outcome] += 1
+        return ticket
+
+    def _reject(self, reason: str, retry_after_s: float) -> Rejected:
+        with self._lock:
+            self.counts["rejected"] += 1
+        return Rejected(reason, retry_after_s)
+
+    async def acquire(
+        self, req: MoveRequest, client: str, cost: Optional[float] = None, same_mode: bool = False
+    ) -> Ticket:
+        """
+        Admit `req` (or a cheaper variant, in the same mode if `same_mode`) for `client`; raises
+        `Rejected` when the policy gives up. `cost` overrides `estimate_cost(req)`.
+        """
+        cost = estimate_cost(req) if cost is None else cost
+        bucket = self._bucket(client)
+        if self._fits_now(bucket, cost):
+            if bucket is not None:
+                bucket.reserve(cost, self.clock())
+            return self._take(Ticket(req=req, cost=cost, outcome="admitted"))
+
+        if self.policy == "degrade":
+            short = bucket is not None and not bucket.available(cost, self.clock())
+            for variant in cheaper_variants(req):
+                if same_mode and variant.mode != req.mode:
+                    break
+                vcost = estimate_cost(variant)
+                if self._fits_now(bucket, vcost):
+                    if bucket is not None:
+                        bucket.reserve(vcost, self.clock())
+                    return self._take(Ticket(req=variant, cost=vcost, outcome="degraded",
+                                             reason="rate_limit" if short else "llm_budget"))
+
+        reason, retry = "over the server's LLM budget", 1.0
+        if bucket is not None and not bucket.available(cost, self.clock()):
+            reason, retry = "over the client's rate limit", (cost - bucket.tokens) / self.rate
+        if self.policy != "queue" or self.waiting >= self.queue_max:
+            raise self._reject(reason, retry)
+        if bucket is not None and cost > bucket.burst:
+            raise self._reject(f"request costs {cost:g} LLM calls, more than a client may burst", retry)
+
+        # Queue: pay the client's tokens in advance (waiting out the debt), then wait for global budget
+        deadline = self.clock() + self.queue_timeout_s
+        self.waiting += 1
+        try:
+            debt_s = bucket.reserve(cost, self.clock()) if bucket is not None else 0.0
+            try:
+                if debt_s > self.queue_timeout_s:
+                    raise self._reject("over the client's rate limit", debt_s)
+                await asyncio.sleep(debt_s)
+                released = self._condition()
+                async with released:
+                    await asyncio.wait_for(released.wait_for(lambda: self._budget_fits(cost)),
+                                           timeout=max(deadline - self.clock(), 0.0))
+                    return self._take(Ticket(req=req, cost=cost, outcome="queued"))
+            except (asyncio.TimeoutError, Rejected, asyncio.CancelledError) as e:
+                if bucket is not None:
+                    bucket.refund(cost)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise self._reject("waited too long for the server's LLM budget", 1.0)
+                raise
+        finally:
+            self.waiting -= 1
+
+    async def release(self, ticket: Ticket) -> None:
+        with self._lock:
+            self.in_flight = max(self.in_flight - ticket.cost, 0.0)
+        if self._released is not None and ticket.cost:
+            async with self._released:
+                self._released.notify_all()
+
+    @asynccontextmanager
+    async def admit(self, req: MoveRequest, client: str, cost: Optional[float] = None) -> AsyncIterator[Ticket]:
+        ticket = await self.acquire(req, client, cost)
+        try:
+            yield ticket
+        finally:
+            await self.release(ticket)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"policy": self.policy, "budget": self.budget, "in_flight": self.in_flight,
+                    "waiting": self.waiting, "clients": len(self._buckets), **self.counts}
+
+
+def retry_after(e: Rejected) -> str:
+    return str(max(math.ceil(e.retry_after_s), 1))
+
+
+# Shared by every request of this server process
+ADMISSION = Admission()
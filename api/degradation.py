@@ -0,0 +1,137 @@
+"""
+Adaptive degradation driven by observed LLM health.
+
+`LlmHealth` watches every LLM call the server issues (through the
+single-flight groups that all CoT and ToT calls go through) and keeps a
+sliding window of their latencies and failures. Calls still in flight count
+with their current age, so a provider that stops answering shows up at once
+rather than when its calls finally time out.
+
+Before a request runs, `LlmHealth.plan` picks the engine for it:
+
+- healthy: the request as asked
+- slow (p90 call latency above `LLM_SLOW_S`): the most expensive of the
+  request and its cheaper variants (see `cheaper_variants`) whose sequential
+  LLM round trips fit `LLM_LATENCY_SLO_S` at the observed latency; the exact
+  solver needs none and always fits
+- failing (error rate at or above `LLM_ERROR_RATE_SINGLE`): at most one LLM
+  call (CoT), and none (the solver) from `LLM_ERROR_RATE_OFF`
+
+While the LLM is bypassed no new samples arrive, so the window empties and
+the next requests probe it again.
+"""
+from __future__ import annotations
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from api.admission import cheaper_variants, estimate_cost
+from api.schemas import MoveRequest
+from checkpoint_3.config import MCTS_ITERATIONS, SEARCH_MAX_CONCURRENCY
+from checkpoint_3.singleflight import SingleFlight
+
+# Target time for a whole answer; LLM answers slower than this are replaced by the solver (0 = no target)
+LLM_LATENCY_SLO_S = float(os.getenv("LLM_LATENCY_SLO_S", "30"))
+LLM_SLOW_S = float(os.getenv("LLM_SLOW_S", "5"))
+LLM_ERROR_RATE_SINGLE = float(os.getenv("LLM_ERROR_RATE_SINGLE", "0.2"))
+LLM_ERROR_RATE_OFF = float(os.getenv("LLM_ERROR_RATE_OFF", "0.5"))
+LLM_HEALTH_WINDOW_S = float(os.getenv("LLM_HEALTH_WINDOW_S", "60"))
+LLM_HEALTH_MIN_CALLS = 5  # completed calls needed before latency percentiles and error rates count
+
+
+def llm_rounds(req: MoveRequest) -> int:
+    """Sequential LLM round trips `req` may need (what its latency scales with)."""
+    if req.mode == 'solve':
+        return 0
+    if req.mode == 'cot':
+        return 1
+    empty = sum(v is None for v in req.board)
+    if req.strategy == 'mcts':
+        return min(req.iterations or MCTS_ITERATIONS, 4 ** empty)
+    plies = min(req.depth or 2, empty)
+    if req.strategy == 'level':
+        return plies  # one batched call per level (chunks run concurrently)
+    return max(plies, math.ceil(estimate_cost(req) / SEARCH_MAX_CONCURRENCY))
+
+
+class LlmHealth:
+    def __init__(self, window_s: float = LLM_HEALTH_WINDOW_S, clock: Callable[[], float] = time.monotonic):
+        self.window_s = window_s
+        self.clock = clock
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=1000)  # (finished at, latency, ok)
+        self._flights: List[SingleFlight] = []
+        self._lock = threading.Lock()
+        self.plans: Dict[str, int] = {"as_requested": 0, "llm_slow": 0, "llm_errors": 0}
+
+    def watch(self, flights: SingleFlight) -> None:
+        """Observe every call issued through `flights`."""
+        flights.observer = self.record
+        self._flights.append(flights)
+
+    def record(self, elapsed_s: float, error: Optional[BaseException]) -> None:
+        if isinstance(error, asyncio.CancelledError):
+            return  # abandoned by its callers, says nothing about the provider
+        with self._lock:
+            self._samples.append((self.clock(), elapsed_s, error is None))
+
+    def _window(self) -> List[Tuple[float, float, bool]]:
+        cutoff = self.clock() - self.window_s
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    def latency_s(self) -> float:
+        """p90 latency of recent calls, or the age of the oldest call in flight if that is longer."""
+        latencies = sorted(s[1] for s in self._window())
+        p90 = latencies[int(0.9 * (len(latencies) - 1))] if len(latencies) >= LLM_HEALTH_MIN_CALLS else 0.0
+        return max([p90] + [age for flights in self._flights for age in flights.in_flight_ages()])
+
+    def error_rate(self) -> float:
+        samples = self._window()
+        if len(samples) < LLM_HEALTH_MIN_CALLS:
+            return 0.0
+        return sum(not ok for _, _, ok in samples) / len(samples)
+
+    def plan(self, req: MoveRequest, same_mode: bool = False) -> Tuple[MoveRequest, Optional[str]]:
+        """
+        The request to run instead of `req` given recent LLM health, and why ("llm_slow" or
+        "llm_errors"; None when `req` runs as asked). With `same_mode` the mode is kept and the
+        cheapest search of that mode is the floor.
+        """
+        errors, latency = self.error_rate(), self.latency_s()
+        if errors >= LLM_ERROR_RATE_SINGLE:
+            reason, max_rounds = "llm_errors", (0 if errors >= LLM_ERROR_RATE_OFF else 1)
+        elif latency > LLM_SLOW_S and LLM_LATENCY_SLO_S:
+            reason, max_rounds = "llm_slow", int(LLM_LATENCY_SLO_S // latency)
+        else:
+            reason, max_rounds = None, None
+        chosen = req
+        if reason is not None and llm_rounds(req) > max_rounds:
+            for variant in cheaper_variants(req):
+                if same_mode and variant.mode != req.mode:
+                    break
+                chosen = variant
+                if llm_rounds(variant) <= max_rounds:
+                    break
+        with self._lock:
+            self.plans[reason if chosen is not req else "as_requested"] += 1
+        return chosen, (reason if chosen is not req else None)
+
+    def stats(self) -> Dict[str, object]:
+        samples = self._window()
+        return {
+            "calls": len(samples),
+            "latency_s": round(self.latency_s(), 3),
+            "error_rate": round(self.error_rate(), 3),
+            "in_flight": sum(len(flights.in_flight_ages()) for flights in self._flights),
+            "plans": dict(self.plans),
+        }
+
+
+# Shared by every request of this server process
+LLM_HEALTH = LlmHealth()
@@ -0,0 +1,118 @@
+"""
+Bounded process pool for CPU-heavy work that would otherwise stall the event loop.
+
+Encoding a large thought tree takes hundreds of milliseconds of pure Python;
+run on the event loop (or in Starlette's thread pool, under the GIL) it
+delays /healthz and every other request. `CpuPool.run` ships such work to
+worker processes instead: ThoughtTrees pickle as their compact array columns,
+so sending one costs about a millisecond even for tens of thousands of nodes.
+
+The pool admits at most `max_pending` jobs (queued + running); beyond that
+`run` raises `Saturated`, which the API answers with 429 so callers back off
+instead of piling up behind the pool.
+"""
+from __future__ import annotations
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+CPU_MAX_PENDING = int(os.getenv("CPU_MAX_PENDING", "0")) or 4 * CPU_WORKERS
+# Trees with fewer nodes to encode are cheaper to encode in place than to ship to a worker
+OFFLOAD_MIN_NODES = int(os.getenv("OFFLOAD_MIN_NODES", "5000"))
+
+
+class Saturated(Exception):
+    """The pool already holds its maximum number of pending jobs."""
+
+
+def _import(module: str) -> None:
+    importlib.import_module(module)
+
+
+def _timed(fn: Callable[..., T], args: Tuple[Any, ...]) -> Tuple[float, T]:
+    return time.time(), fn(*args)
+
+
+class CpuPool:
+    def __init__(self, workers: int = CPU_WORKERS, max_pending: int = CPU_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_s = 0.0        # total time jobs spent queued before a worker picked them up
+        self.max_wait_s = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn": the server process runs an event loop and threads, which fork would copy mid-flight
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """`fn(*args)` in a worker process (both must pickle); raises `Saturated` when the pool is full."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise Saturated(f"{self.pending} CPU job(s) pending")
+            self.pending += 1
+            self.submitted += 1
+        submitted_at = time.time()
+        try:
+            started_at, result = await asyncio.get_running_loop().run_in_executor(self._pool(), _timed, fn, args)
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+        wait = max(started_at - submitted_at, 0.0)
+        with self._lock:
+            self.completed += 1
+            self.wait_s += wait
+            self.max_wait_s = max(self.max_wait_s, wait)
+        return result
+
+    def warm(self, *modules: str) -> None:
+        """Start the workers now and have each import `modules`, so the first jobs do not wait for that."""
+        pool = self._pool()
+        for _ in range(self.workers):
+            for module in modules:
+                pool.submit(_import, module)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "queued": max(self.pending - self.workers, 0),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(1000 * self.wait_s / self.completed, 2) if self.completed else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait_s, 2),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Shared by every request of this server process
+CPU_POOL = CpuPool()
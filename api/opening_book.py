@@ -0,0 +1,307 @@
+"""
+Opening book: precomputed answers for the first plies, served without LLM work.
+
+Built offline by running one engine over every canonical position with at
+most `plies` marks (either side may have started):
+
+- "llm":       the CoT and ToT pipelines of api.server (run_cot / run_tot)
+- "solve":     the exact solver (checkpoint_3.solver)
+- "heuristic": the one-ply heuristic table (no LLM)
+
+Each answer is stored for every rotation/reflection of its board (moves,
+tree cells and "(r,c)" mentions in reasons mapped along), so a lookup is one
+binary search over a sorted key index in a memory-mapped file:
+
+    b"TTTBOOK" + format byte | u32 header length | header JSON
+    | count x (u32 key, u32 offset, u32 length), sorted by key
+    | entry JSON blobs: {"move", "reasoning", "engine", "extra", "tree" (ThoughtTree.columns) or null}
+
+A key is base3(board) * 4 + mode (0 cot, 1 tot) * 2 + player (0 X, 1 O).
+Rebuilding writes a new file and renames it into place, so a running server
+keeps reading the book it opened until it is restarted.
+
+    python -m api.opening_book build --engine llm --plies 2 --version 2026-10
+    python -m api.opening_book info
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from checkpoint_3.config import OPENAI_MODEL
+from checkpoint_3.game import FULL_MASK, TicTacToe
+from checkpoint_3.positions import CELLS, ONGOING, O_CODE, STATUS, X_CODE
+from checkpoint_3.symmetry import MASK_PERM, PERM, canonical, remap_coords
+
+MAGIC = b"TTTBOOK"
+FORMAT = 1
+_PREFIX = struct.Struct("<7sBI")     # magic, format, header length
+_SLOT = struct.Struct("<III")        # key, offset, length
+
+BOOK_MODES = ("cot", "tot")
+BOOK_ENGINES = ("llm", "solve", "heuristic")
+DEFAULT_BOOK_PATH = os.path.join(".cache", "opening_book.bin")
+
+
+class BookError(Exception):
+    """The file is not an opening book this code can read."""
+
+
+def book_key(index: int, mode: str, player: str) -> int:
+    """`index` is the base-3 board encoding (see positions.py)."""
+    return index * 4 + BOOK_MODES.index(mode) * 2 + (player == 'O')
+
+
+def board_index(board: Sequence[Optional[str]]) -> int:
+    """Base-3 encoding of a 1-D board of 'X' / 'O' / None."""
+    return sum(3 ** i * (1 if v == 'X' else 2) for i, v in enumerate(board) if v)
+
+
+class OpeningBook:
+    """Read-only view of a book file; lookups touch only the index slots they bisect and one entry."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, fmt, head_len = _PREFIX.unpack_from(self._mm, 0)
+        except struct.error:
+            raise BookError(f"{path}: truncated header")
+        if magic != MAGIC or fmt != FORMAT:
+            raise BookError(f"{path}: not an opening book (format {FORMAT})")
+        self.header: Dict[str, Any] = orjson.loads(self._mm[_PREFIX.size:_PREFIX.size + head_len])
+        self.version: str = self.header["version"]
+        self.count: int = self.header["entries"]
+        self._index = _PREFIX.size + head_len
+        self._lock = threading.Lock()
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    @classmethod
+    def open(cls, path: Optional[str]) -> Optional["OpeningBook"]:
+        """The book at `path`, or None if no path is configured or the file does not exist."""
+        if not path or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def serves_tot(self, strategy: str, beam: Optional[int], depth: Optional[int]) -> bool:
+        """Whether the book's ToT answers stand for a search with these settings (None = server default)."""
+        params = self.header.get("tot")
+        if params is None:  # built by the solver or the heuristic: independent of search settings
+            return True
+        return (strategy, beam or 2, depth or 2) == (params["strategy"], params["beam"], params["depth"])
+
+    def _find(self, key: int) -> Optional[bytes]:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k, offset, length = _SLOT.unpack_from(self._mm, self._index + mid * _SLOT.size)
+            if k == key:
+                return self._mm[offset:offset + length]
+            if k < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def lookup(self, mode: str, board: Sequence[Optional[str]], player: str) -> Optional[Dict[str, Any]]:
+        """The stored entry for `player` to move on `board` in `mode`, or None."""
+        blob = self._find(book_key(board_index(board), mode, player)) if mode in BOOK_MODES else None
+        with self._lock:
+            (self.hits if blob is not None else self.misses)[mode] += 1
+        return orjson.loads(blob) if blob is not None else None
+
+    def covers(self, mode: str, board: Sequence[Optional[str]], player: str) -> bool:
+        """Whether `lookup` would find an entry (not counted in the stats)."""
+        return mode in BOOK_MODES and self._find(book_key(board_index(board), mode, player)) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"version": self.version, "entries": self.count, "engine": self.header.get("engine"),
+                    "hits": dict(self.hits), "misses": dict(self.misses)}
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+# ----- building -----
+
+def book_positions(plies: int) -> List[Tuple[int, int, str]]:
+    """Canonical (x, o, to_move) for every unfinished position with at most `plies` marks."""
+    out: List[Tuple[int, int, str]] = []
+    seen = set()
+    frontier = [(0, 0, 'X'), (0, 0, 'O')]
+    for ply in range(plies + 1):
+        nxt = []
+        for x, o, to_move in frontier:
+            cx, co, _ = canonical(x, o)
+            if (cx, co, to_move) in seen or STATUS[X_CODE[x] + O_CODE[o]] != ONGOING:
+                continue
+            seen.add((cx, co, to_move))
+            out.append((cx, co, to_move))
+            for cell in CELLS[FULL_MASK & ~(x | o)]:
+                bit = 1 << cell
+                nxt.append((x | bit, o, 'O') if to_move == 'X' else (x, o | bit, 'X'))
+        frontier = nxt
+    return out
+
+
+def _board_1d(x: int, o: int) -> List[Optional[str]]:
+    return ['X' if x >> i & 1 else 'O' if o >> i & 1 else None for i in range(9)]
+
+
+def _image(entry: Dict[str, Any], sym: int) -> Dict[str, Any]:
+    """`entry` for the board moved by symmetry `sym`."""
+    perm = PERM[sym]
+
+    def move(r: int, c: int) -> Tuple[int, int]:
+        return divmod(perm[r * 3 + c], 3)
+
+    out = {**entry, "move": perm[entry["move"]], "reasoning": remap_coords(entry["reasoning"], move)}
+    if entry.get("tree") is not None:
+        cols = dict(entry["tree"])
+        cols["cell"] = [perm[c] if c >= 0 else c for c in cols["cell"]]
+        cols["reasons"] = [remap_coords(r, move) for r in cols["reasons"]]
+        out["tree"] = cols
+    return out
+
+
+async def _answer(engine: str, mode: str, x: int, o: int, to_move: str, tot: Dict[str, Any]) -> Dict[str, Any]:
+    # Imported here: api.server itself reads the book at import
+    from api.server import run_cot, run_solve, run_tot
+    from checkpoint_3.deepening import heuristic_fallback
+    from checkpoint_3.scoring import simple_score_state
+
+    board = _board_1d(x, o)
+    extra: Dict[str, Any] = {}
+    if engine == "llm" and mode == "cot":
+        res = await run_cot(board, player=to_move)
+        move, reasoning, tree = res.move, res.reasoning, None
+    elif engine == "llm":
+        result = await run_tot(board, player=to_move, beam=tot["beam"], depth=tot["depth"], strategy=tot["strategy"])
+        move, reasoning, tree = result.move, result.reasoning, result.tree
+        extra = {"searched_depth": result.extra["searched_depth"], "timed_out": False}
+    elif engine == "solve":
+        result = await run_solve(board, player=to_move)
+        move, reasoning, tree = result.move, result.reasoning, result.tree
+    else:
+        game = TicTacToe.from_masks(x, o)
+        fallback = heuristic_fallback(game, to_move, simple_score_state(game, agent="O"))
+        first = fallback.path[0]
+        move, reasoning, tree = first.row * 3 + first.col, first.reason, fallback.tree
+        extra = {"searched_depth": 0, "timed_out": False}
+    return {"move": move, "reasoning": reasoning, "engine": engine, "extra": extra,
+            "tree": tree.columns() if mode == "tot" and tree is not None else None}
+
+
+def write_book(path: str, header: Dict[str, Any], entries: Dict[int, bytes]) -> None:
+    """Write `entries` (key -> entry JSON) atomically; readers of the old file are unaffected."""
+    keys = sorted(entries)
+    head = orjson.dumps({**header, "entries": len(keys)})
+    offset = _PREFIX.size + len(head) + _SLOT.size * len(keys)
+    slots = bytearray()
+    for key in keys:
+        slots += _SLOT.pack(key, offset, len(entries[key]))
+        offset += len(entries[key])
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT, len(head)))
+        f.write(head)
+        f.write(slots)
+        for key in keys:
+            f.write(entries[key])
+    os.replace(tmp, path)
+
+
+async def build_book(
+    path: str,
+    engine: str = "llm",
+    plies: int = 2,
+    modes: Sequence[str] = BOOK_MODES,
+    version: Optional[str] = None,
+    tot: Optional[Dict[str, Any]] = None,
+    concurrency: int = 4,
+) -> Dict[str, Any]:
+    """Answer every book position with `engine` and write the book; returns its header."""
+    tot = tot or {"strategy": "beam", "beam": 2, "depth": 2}
+    positions = book_positions(plies)
+    limiter = asyncio.Semaphore(concurrency)
+    entries: Dict[int, bytes] = {}
+
+    async def one(mode: str, x: int, o: int, to_move: str) -> None:
+        async with limiter:
+            entry = await _answer(engine, mode, x, o, to_move, tot)
+        for sym in range(8):
+            ix, io = MASK_PERM[sym][x], MASK_PERM[sym][o]
+            key = book_key(X_CODE[ix] + O_CODE[io], mode, to_move)
+            if key not in entries:  # symmetric boards map onto themselves; keep the first image
+                entries[key] = orjson.dumps(_image(entry, sym))
+        print(f"[book] {mode} {to_move} to move on {''.join(v or '-' for v in _board_1d(x, o))}: "
+              f"cell {entry['move']}")
+
+    start = time.monotonic()
+    await asyncio.gather(*(one(mode, x, o, p) for mode in modes for x, o, p in positions))
+    header = {
+        "format": FORMAT,
+        "version": version or time.strftime("%Y%m%d-%H%M%S"),
+        "created_at": time.time(),
+        "engine": engine,
+        "model": OPENAI_MODEL if engine == "llm" else None,
+        "plies": plies,
+        "modes": list(modes),
+        "tot": tot if engine == "llm" else None,
+        "positions": len(positions),
+    }
+    write_book(path, header, entries)
+    print(f"[book] wrote {len(entries)} entries ({len(positions)} canonical positions x {len(modes)} modes) "
+          f"to {path} in {time.monotonic() - start:.1f}s")
+    return header
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the opening book served by api.server")
+    parser.add_argument("--path", default=os.getenv("OPENING_BOOK_PATH") or DEFAULT_BOOK_PATH,
+                        help=f"Book file (default: $OPENING_BOOK_PATH or {DEFAULT_BOOK_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Run an engine over the early positions and write a new book")
+    build.add_argument("--engine", choices=BOOK_ENGINES, default="llm",
+                       help="'llm' runs the CoT/ToT pipelines (LLM calls), 'solve' the exact solver, "
+                            "'heuristic' the one-ply table (default: llm)")
+    build.add_argument("--plies", type=int, default=2, help="Book positions with at most this many marks (default: 2)")
+    build.add_argument("--modes", default=",".join(BOOK_MODES), help="Comma-separated modes to fill (default: cot,tot)")
+    build.add_argument("--version", default=None, help="Version label returned with book answers (default: timestamp)")
+    build.add_argument("--strategy", choices=["beam", "level", "mcts"], default="beam", help="ToT strategy for --engine llm")
+    build.add_argument("--beam", type=int, default=2, help="ToT beam width for --engine llm (default: 2)")
+    build.add_argument("--depth", type=int, default=2, help="ToT depth for --engine llm (default: 2)")
+    build.add_argument("--concurrency", type=int, default=4, help="Positions answered at once (default: 4)")
+    sub.add_parser("info", help="Print the book header")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        book = OpeningBook(args.path)
+        print(orjson.dumps(book.header, option=orjson.OPT_INDENT_2).decode())
+        book.close()
+        return
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(BOOK_MODES)
+    if unknown:
+        parser.error(f"unknown mode(s) {sorted(unknown)}; expected some of {BOOK_MODES}")
+    asyncio.run(build_book(args.path, engine=args.engine, plies=args.plies, modes=modes, version=args.version,
+                           tot={"strategy": args.strategy, "beam": args.beam, "depth": args.depth},
+                           concurrency=args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,28 @@ from pydantic import BaseModel, Field, model_validator
 
 
 class MoveRequest(BaseModel):
-    mode: Literal['cot', 'tot']
+    mode: Literal['cot', 'tot', 'solve']
     # Frontend uses 1D board[0..8] with null, 'X', 'O'
     board: List[Optional[str]] = Field(min_length=9, max_length=9)
     player: Literal['X', 'O'] = 'O'  # AI plays as which mark
     beam: Optional[int] = None
     depth: Optional[int] = None
+    # ToT search strategy: 'beam' (one LLM call per node), 'level' (one batched call per depth)
+    # or 'mcts' (Monte Carlo tree search with LLM priors)
+    strategy: Literal['beam', 'level', 'mcts'] = 'beam'
+    # ToT wall-clock budget; the deepest search iteration finished in time is returned
+    # (for 'mcts', the time budget of the single search)
+    deadline_ms: Optional[int] = Field(default=None, ge=1)
+    # MCTS iteration budget (at most one LLM call per iteration)
+    iterations: Optional[int] = Field(default=None, ge=1)
+    # Opt-in tree reuse: the ToT tree from this game's previous move is re-rooted and extended
+    session_id: Optional[str] = Field(default=None, min_length=1, max_length=128)
+    # Tree encoding for tot/solve: 'nested' TreeNode JSON (default), 'columnar' parallel arrays,
+    # 'ndjson' (header line + one row per node) or 'msgpack' (columnar); overrides the Accept header
+    tree_format: Optional[Literal['nested', 'columnar', 'ndjson', 'msgpack']] = None
+    # Smaller tree than the server limits (nodes are kept breadth-first)
+    tree_max_depth: Optional[int] = Field(default=None, ge=0)
+    tree_max_nodes: Optional[int] = Field(default=None, ge=1)
 
     @model_validator(mode='after')
     def _validate_board(self) -> 'MoveRequest':
@@ -21,10 +37,22 @@ class MoveRequest(BaseModel):
         return self
 
 
+class MoveBatchRequest(BaseModel):
+    # Answered concurrently; identical requests are run once (see POST /api/v1/move:batch)
+    requests: List[MoveRequest] = Field(min_length=1, max_length=1000)
+
+
 class CotResponse(BaseModel):
     mode: Literal['cot']
     move: int  # 0..8 index
     reasoning: str
+    book: Optional[str] = None  # opening-book version when the answer came from the book
+    # Engine that answered ('tot', 'cot', 'solver' or 'book') and, when it is cheaper than the one
+    # asked for (smaller ToT, CoT or solver), the requested mode and why: 'llm_slow', 'llm_errors',
+    # 'llm_timeout', 'llm_failed', 'rate_limit' or 'llm_budget'
+    engine: Optional[str] = None
+    degraded_from: Optional[str] = None
+    degraded_reason: Optional[str] = None
 
 
 class TreeNode(BaseModel):
@@ -40,6 +68,29 @@ class TotResponse(BaseModel):
     move: int  # 0..8 index
     reasoning: str
     tree: TreeNode
+    searched_depth: Optional[int] = None  # depth of the search the move came from (0 = heuristic)
+    timed_out: bool = False  # True if the deadline cut a deeper iteration short
+    reused_nodes: int = 0  # nodes carried over from the session's previous tree
+    tree_format: str = 'nested'
+    tree_nodes: Optional[int] = None  # nodes in the searched tree (before limits)
+    tree_truncated: bool = False  # True if depth/node limits cut the returned tree
+    book: Optional[str] = None  # opening-book version when the answer came from the book
+    engine: Optional[str] = None  # see CotResponse
+    degraded_from: Optional[str] = None
+    degraded_reason: Optional[str] = None
+
+
+class SolveResponse(BaseModel):
+    mode: Literal['solve']
+    move: int  # 0..8 index
+    reasoning: str
+    tree: TreeNode
+    tree_format: str = 'nested'
+    tree_nodes: Optional[int] = None  # nodes in the searched tree (before limits)
+    tree_truncated: bool = False  # True if depth/node limits cut the returned tree
+    engine: Optional[str] = None  # see CotResponse
+    degraded_from: Optional[str] = None
+    degraded_reason: Optional[str] = None
 
 
-AiResponse = CotResponse | TotResponse 
\ No newline at end of file
+AiResponse = CotResponse | TotResponse | SolveResponse 
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+Encoders for move responses that carry a thought tree.
+
+The tree is written straight from the ThoughtTree columns, so large trees
+never become one Pydantic model per node. Formats (see `negotiate_format`):
+
+- "nested":   `TreeNode`-shaped JSON (schemas.py), streamed in chunks
+- "columnar": one JSON object of parallel arrays (ids, parents, cells, scores,
+              reason indices into a deduplicated reason table), via orjson
+- "ndjson":   a header line, then one compact array per node, streamed
+- "msgpack":  the columnar object as msgpack (only if msgpack is installed)
+
+Every format honours `TreeLimits`: nodes are kept breadth-first up to a
+depth and a node count, and reasons are cut to a maximum length.
+"""
+from __future__ import annotations
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import orjson
+
+from checkpoint_3.positions import OUTCOME_LABELS
+from checkpoint_3.tree import ThoughtNode, ThoughtTree, buffered
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for the "msgpack" format
+    msgpack = None
+
+# Same shape TreeNode(thought='root', reason='', children=[]) used to produce
+_EMPTY_TREE = '{"id":null,"thought":"root","reason":"","score":null,"children":[]}'
+
+
+@dataclass
+class TreeMove:
+    """A ToT/solve answer before encoding: the chosen move plus the searched tree."""
+    mode: str
+    move: int  # 0..8 index
+    reasoning: str
+    tree: ThoughtTree
+    extra: Dict[str, Any] = field(default_factory=dict)  # mode-specific fields, e.g. searched_depth
+
+    def fields(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "move": self.move, "reasoning": self.reasoning, **self.extra}
+
+
+def thought_label(node: ThoughtNode) -> str:
+    if node.r is None or node.c is None:
+        return "root"
+    thought = f"{node.player}→({node.r},{node.c})"
+    if node.terminal and node.outcome:
+        thought += f" [terminal: {node.outcome}]"
+    if node.cached:
+        thought += " [transposition]"
+    if node.pruned:
+        thought += " [pruned]"
+    if node.visits:
+        thought += f" [visits={node.visits}]"
+    return thought
+
+
+@dataclass(frozen=True)
+class TreeLimits:
+    max_depth: Optional[int] = None          # plies below the root
+    max_nodes: Optional[int] = None
+    max_reason_chars: Optional[int] = None
+
+    def clip(self, reason: str) -> str:
+        if self.max_reason_chars is not None and len(reason) > self.max_reason_chars:
+            return reason[:max(self.max_reason_chars - 1, 0)] + "…"
+        return reason
+
+
+NO_LIMITS = TreeLimits()
+
+TREE_FORMATS = ("nested", "columnar", "ndjson", "msgpack")
+MEDIA_TYPES = {
+    "nested": "application/json",
+    "columnar": "application/vnd.tictactoe.columnar+json",
+    "ndjson": "application/x-ndjson",
+    "msgpack": "application/msgpack",
+}
+_ACCEPTED = {**{media: fmt for fmt, media in MEDIA_TYPES.items()}, "application/x-msgpack": "msgpack"}
+
+# Column order of the per-node arrays in the "ndjson" format
+NDJSON_COLUMNS = ("id", "parent", "cell", "player", "score", "outcome", "marks", "visits", "reason")
+
+
+class FormatUnavailable(Exception):
+    """The requested tree format cannot be produced by this server."""
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """The request's explicit format wins; otherwise the first known media type in `Accept`; else "nested"."""
+    fmt = requested
+    if fmt is None and accept:
+        for part in accept.split(","):
+            fmt = _ACCEPTED.get(part.split(";", 1)[0].strip().lower())
+            if fmt is not None:
+                break
+    fmt = fmt or "nested"
+    if fmt == "msgpack" and msgpack is None:
+        raise FormatUnavailable("msgpack is not installed on this server")
+    return fmt
+
+
+def treenode_fields(node: ThoughtNode, limits: TreeLimits = NO_LIMITS) -> Dict[str, Any]:
+    return {"id": str(node.id), "thought": thought_label(node), "reason": limits.clip(node.reason or ""),
+            "score": float(node.score_after)}
+
+
+def _selection(tree: ThoughtTree, limits: TreeLimits) -> Tuple[Optional[List[int]], bool]:
+    """Ids to encode (None = all) and whether the tree was cut."""
+    if limits.max_depth is None and limits.max_nodes is None:
+        return None, False
+    ids = tree.select(max_depth=limits.max_depth, max_nodes=limits.max_nodes)
+    return ids, len(ids) < len(tree)
+
+
+def iter_tree_json(tree: ThoughtTree, limits: TreeLimits = NO_LIMITS) -> Iterator[str]:
+    """The tree as nested `TreeNode` JSON, in chunks."""
+    if tree.root_id is None:
+        yield _EMPTY_TREE
+        return
+    ids, _ = _selection(tree, limits)
+    yield from tree.iter_json(fields=lambda n: treenode_fields(n, limits),
+                              include=None if ids is None else set(ids))
+
+
+def _meta(result: TreeMove, tree: ThoughtTree, truncated: bool, fmt: str) -> Dict[str, Any]:
+    return {**result.fields(), "tree_format": fmt, "tree_nodes": len(tree), "tree_truncated": truncated}
+
+
+def iter_move_json(result: TreeMove, limits: TreeLimits = NO_LIMITS, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """`TotResponse` / `SolveResponse` JSON for `result`, in chunks of about `chunk_size` characters."""
+    _, truncated = _selection(result.tree, limits)
+    head = json.dumps(_meta(result, result.tree, truncated, "nested"), ensure_ascii=False, separators=(",", ":"))
+
+    def parts() -> Iterator[str]:
+        yield head[:-1] + ',"tree":'
+        yield from iter_tree_json(result.tree, limits)
+        yield "}"
+
+    return buffered(parts(), chunk_size)
+
+
+def columnar_move(result: TreeMove, limits: TreeLimits = NO_LIMITS) -> Dict[str, Any]:
+    """`result` with the tree as parallel arrays (see `ThoughtTree.columns`) and legends for the codes."""
+    ids, truncated = _selection(result.tree, limits)
+    cols = result.tree.columns(ids)
+    cols["reasons"] = [limits.clip(r) for r in cols["reasons"]]
+    cols["players"] = ["ROOT", "X", "O"]
+    cols["outcomes"] = list(OUTCOME_LABELS)
+    cols["root"] = result.tree.root_id
+    return {**_meta(result, result.tree, truncated, "columnar"), "tree": cols}
+
+
+def iter_move_ndjson(result: TreeMove, limits: TreeLimits = NO_LIMITS, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """A header line (move fields and column names), then one array per node in breadth-first order."""
+    tree = result.tree
+    ids, truncated = _selection(tree, limits)
+    if ids is None:
+        ids = tree.select()
+
+    def lines() -> Iterator[bytes]:
+        header = {**_meta(result, tree, truncated, "ndjson"), "columns": NDJSON_COLUMNS,
+                  "players": ["ROOT", "X", "O"], "outcomes": list(OUTCOME_LABELS)}
+        yield orjson.dumps(header) + b"\n"
+        cols = tree.columns(ids)
+        reasons = [limits.clip(r) for r in cols["reasons"]]
+        rows = zip(cols["id"], cols["parent"], cols["cell"], cols["player"], cols["score"], cols["outcome"],
+                   cols["marks"], cols["visits"], cols["reason_idx"])
+        for *row, rid in rows:
+            yield orjson.dumps([*row, reasons[rid] if rid >= 0 else None]) + b"\n"
+
+    return buffered(lines(), chunk_size)
+
+
+def encoded_nodes(result: TreeMove, limits: TreeLimits = NO_LIMITS) -> int:
+    """Upper bound on the nodes encoding `result` under `limits` writes (a cost estimate)."""
+    n = len(result.tree)
+    return n if limits.max_nodes is None else min(n, limits.max_nodes)
+
+
+def encode_body(result: TreeMove, fmt: str, limits: TreeLimits = NO_LIMITS) -> bytes:
+    """The complete encoded body of `result` in `fmt` (see `encode_move`), e.g. to encode in a worker process."""
+    body, _ = encode_move(result, fmt, limits)
+    if isinstance(body, bytes):
+        return body
+    chunks = list(body)
+    if chunks and isinstance(chunks[0], str):
+        return "".join(chunks).encode()
+    return b"".join(chunks)
+
+
+def move_document(result: TreeMove, fmt: str, limits: TreeLimits = NO_LIMITS) -> bytes:
+    """`result` as one JSON document ("nested" or "columnar"), e.g. to embed in an NDJSON line."""
+    if fmt == "nested":
+        return "".join(iter_move_json(result, limits)).encode()
+    if fmt == "columnar":
+        return orjson.dumps(columnar_move(result, limits))
+    raise FormatUnavailable(f"tree format {fmt!r} cannot be embedded in a JSON document; use 'nested' or 'columnar'")
+
+
+def encode_move(result: TreeMove, fmt: str, limits: TreeLimits = NO_LIMITS) -> Tuple[Union[bytes, Iterator[Any]], str]:
+    """(body, media type) for `result` in `fmt`; the body is bytes or an iterator of chunks."""
+    if fmt == "nested":
+        return iter_move_json(result, limits), MEDIA_TYPES[fmt]
+    if fmt == "columnar":
+        return orjson.dumps(columnar_move(result, limits)), MEDIA_TYPES[fmt]
+    if fmt == "ndjson":
+        return iter_move_ndjson(result, limits), MEDIA_TYPES[fmt]
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise FormatUnavailable("msgpack is not installed on this server")
+        return msgpack.packb(columnar_move(result, limits)), MEDIA_TYPES[fmt]
+    raise ValueError(f"Unknown tree format {fmt!r}; expected one of {TREE_FORMATS}")
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
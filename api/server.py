@@ -1,18 +1,56 @@
 from __future__ import annotations
+import asyncio
 import os
-from typing import List, Optional, Set, Tuple
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
-
-from api.schemas import MoveRequest, CotResponse, TotResponse, TreeNode
+import httpx
+import openai
+import orjson
+
+from api.admission import ADMISSION, Rejected, Ticket, estimate_cost, retry_after
+from api.degradation import LLM_HEALTH, LLM_LATENCY_SLO_S
+from api.offload import CPU_POOL, OFFLOAD_MIN_NODES, Saturated
+from api.opening_book import DEFAULT_BOOK_PATH, OpeningBook
+from api.schemas import MoveBatchRequest, MoveRequest, CotResponse
+from api.serializers import (
+    MEDIA_TYPES,
+    FormatUnavailable,
+    TreeLimits,
+    TreeMove,
+    encode_body,
+    encode_move,
+    encoded_nodes,
+    move_document,
+    negotiate_format,
+    sse_event,
+)
+from checkpoint_2.clients import aclose_clients
+from checkpoint_3.cache_backend import SHARED_BACKEND
 
 # Load env
 load_dotenv()
 
-app = FastAPI(title="TicTacToe AI API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawning the encoding workers takes a while; do it before the first large tree needs one
+    CPU_POOL.warm("api.serializers")
+    yield
+    # Release the pooled LLM connections on shutdown
+    await aclose_clients()
+    SHARED_BACKEND.close()
+    CPU_POOL.shutdown()
+
+
+app = FastAPI(title="TicTacToe AI API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS (adjust origins as needed)
 origins_env = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173")
@@ -51,12 +89,18 @@ def available_positions_from_matrix(board: List[List[str]]) -> Set[Tuple[int, in
 # --- CoT adapter ---
 from checkpoint_2.game import TicTacToe as TTT2
 from checkpoint_2.llm import get_agent_move
+from checkpoint_3.singleflight import SingleFlight
+
+# Concurrent CoT requests for the same board share one LLM call
+COT_FLIGHTS = SingleFlight()
+
 
 async def run_cot(board_1d: List[Optional[str]], player: str) -> CotResponse:
     game = TTT2()
     game.board = board1d_to_matrix(board_1d)
     avail = available_positions_from_matrix(game.board)
-    r, c, reason = await get_agent_move(game, avail)
+    key = (player, "".join(v or '-' for v in board_1d))
+    r, c, reason = await COT_FLIGHTS.do(key, lambda: get_agent_move(game, avail))
     move_idx = pos_to_index(r, c)
     return CotResponse(mode='cot', move=move_idx, reasoning=reason)
 
@@ -64,8 +108,15 @@ async def run_cot(board_1d: List[Optional[str]], player: str) -> CotResponse:
 # --- ToT adapter ---
 from checkpoint_3.game import TicTacToe as TTT3
 from checkpoint_3.scoring import simple_score_state
-from checkpoint_3.tree import ThoughtTree, ThoughtNode
-from checkpoint_3.search import find_best_path_with_tree
+from checkpoint_3.tree import ThoughtTree
+from checkpoint_3.deepening import run_strategy
+
+# Server-wide ToT wall-clock budget when the request sets none (0/unset = no deadline)
+DEFAULT_DEADLINE_MS = int(os.getenv("TOT_DEADLINE_MS", "0")) or None
+from checkpoint_3.transposition import SHARED_TRANSPOSITIONS
+from checkpoint_3.proposal_cache import SHARED_PROPOSAL_CACHE
+from checkpoint_3.singleflight import PROPOSAL_FLIGHTS
+from checkpoint_3.sessions import SHARED_SESSIONS
 
 
 def normalize_score(score_after: int) -> float:
@@ -78,42 +129,58 @@ def normalize_score(score_after: int) -> float:
     return v
 
 
-def node_to_treenode(tree: ThoughtTree, nid: int) -> TreeNode:
-    n = tree.nodes[nid]
-    if n.r is None or n.c is None:
-        thought = "root"
-    else:
-        thought = f"{n.player}→({n.r},{n.c})"
-        if n.terminal and n.outcome:
-            thought += f" [terminal: {n.outcome}]"
-    score = n.score_after if isinstance(n.score_after, (int, float)) else None
-    children = [node_to_treenode(tree, cid) for cid in n.children] if n.children else []
-    return TreeNode(
-        id=str(n.id),
-        thought=thought,
-        reason=n.reason or "",
-        score=score,
-        children=children or None,
-    )
-
-
-async def run_tot(board_1d: List[Optional[str]], player: str, beam: Optional[int], depth: Optional[int]) -> TotResponse:
+async def run_tot(
+    board_1d: List[Optional[str]],
+    player: str,
+    beam: Optional[int],
+    depth: Optional[int],
+    strategy: str = 'beam',
+    deadline_ms: Optional[int] = None,
+    iterations: Optional[int] = None,
+    session_id: Optional[str] = None,
+    listener: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> TreeMove:
     game = TTT3()
     game.board = board1d_to_matrix(board_1d)
 
+    # Resume the session's tree at this position (if its last search reached it)
+    reuse, reused = SHARED_SESSIONS.resume(session_id, game, player) if session_id else (None, False)
+    reused_nodes = len(reuse.nodes) if reused else 0
+
+    # A streaming caller watches the tree being searched; nodes kept from the session come first
+    if listener is not None:
+        if reuse is None:
+            reuse = ThoughtTree()
+        for nid in reuse.select():
+            listener("node", reuse.node_payload(nid))
+        reuse.listener = listener
+
     # Seed tree with current state's heuristic (always score from O's perspective in scoring)
-    start_score = simple_score_state(game.board, agent="O")
-    tree = ThoughtTree()
-    root_id = tree.add_root(score_after=start_score)
-
-    best_score, best_path = await find_best_path_with_tree(
-        game,
-        to_move=player,
-        tree=tree,
-        parent_node_id=root_id,
-        beam_width=beam or 2,
-        max_depth=depth or 2,
-    )
+    start_score = simple_score_state(game, agent="O")
+
+    # With a deadline, depth-bounded strategies deepen one ply at a time and keep the deepest
+    # completed iteration; MCTS uses it (and `iterations`) as the budget of a single search
+    deadline_ms = deadline_ms or DEFAULT_DEADLINE_MS
+    try:
+        result = await run_strategy(
+            strategy,
+            game,
+            to_move=player,
+            root_score=start_score,
+            max_depth=depth or 2,
+            deadline_s=deadline_ms / 1000.0 if deadline_ms else None,
+            iterations=iterations,
+            tree=reuse,
+            beam_width=beam or 2,
+            transpositions=SHARED_TRANSPOSITIONS,
+        )
+    finally:
+        if reuse is not None:
+            reuse.listener = None
+        # Parked even when the search was cancelled: the proposals it already paid for stay reusable
+        if session_id and reuse is not None:
+            SHARED_SESSIONS.park(session_id, game, player, reuse)
+    tree, best_path = result.tree, result.path
 
     # Take first step as move
     if not best_path:
@@ -121,13 +188,161 @@ async def run_tot(board_1d: List[Optional[str]], player: str, beam: Optional[int
     first = best_path[0]
     move_idx = pos_to_index(first.row, first.col)
 
-    # Serialize thought tree to UI TreeNode
-    ui_tree = node_to_treenode(tree, tree.root_id) if tree.root_id is not None else TreeNode(thought='root', reason='', children=[])
-
     # Derive a summary reasoning (optional): use top step's reason
     reasoning = first.reason or ""
 
-    return TotResponse(mode='tot', move=move_idx, reasoning=reasoning, tree=ui_tree)
+    # The tree is encoded later, straight from its columns (see api/serializers.py)
+    return TreeMove(
+        mode='tot', move=move_idx, reasoning=reasoning, tree=tree,
+        extra={"searched_depth": result.depth, "timed_out": result.timed_out, "reused_nodes": reused_nodes},
+    )
+
+
+# --- Exact solver adapter ---
+from checkpoint_3.solver import solve_with_tree
+
+
+async def run_solve(board_1d: List[Optional[str]], player: str) -> TreeMove:
+    game = TTT3()
+    game.board = board1d_to_matrix(board_1d)
+
+    tree = ThoughtTree()
+    root_id = tree.add_root(score_after=simple_score_state(game, agent="O"))
+    _, best_path = solve_with_tree(game, to_move=player, tree=tree, parent_node_id=root_id)
+    if not best_path:
+        raise HTTPException(status_code=400, detail="No legal move: game is already over")
+    first = best_path[0]
+
+    return TreeMove(mode='solve', move=pos_to_index(first.row, first.col), reasoning=first.reason, tree=tree)
+
+
+# --- Opening book ---
+
+# Precomputed early-game answers (see api/opening_book.py); OPENING_BOOK_PATH="" disables the book
+OPENING_BOOK = OpeningBook.open(os.getenv("OPENING_BOOK_PATH", DEFAULT_BOOK_PATH))
+
+
+def _book_serves(req: MoveRequest) -> bool:
+    if OPENING_BOOK is None or req.mode not in ('cot', 'tot'):
+        return False
+    return req.mode == 'cot' or OPENING_BOOK.serves_tot(req.strategy, req.beam, req.depth)
+
+
+def book_move(req: MoveRequest) -> Optional[Union[CotResponse, TreeMove]]:
+    """The book's answer to `req` (CotResponse or TreeMove), or None if the book does not cover it."""
+    if not _book_serves(req):
+        return None
+    entry = OPENING_BOOK.lookup(req.mode, req.board, req.player)
+    if entry is None:
+        return None
+    if req.mode == 'cot':
+        return CotResponse(mode='cot', move=entry["move"], reasoning=entry["reasoning"], book=OPENING_BOOK.version)
+    tree = ThoughtTree.from_columns(entry["tree"])
+    if req.session_id:
+        # The next move of this game can grow the book tree like any searched one
+        game = TTT3()
+        game.board = board1d_to_matrix(req.board)
+        SHARED_SESSIONS.park(req.session_id, game, req.player, tree)
+    return TreeMove(mode='tot', move=entry["move"], reasoning=entry["reasoning"], tree=tree,
+                    extra={**entry["extra"], "reused_nodes": 0, "book": OPENING_BOOK.version})
+
+
+# --- Admission control ---
+
+def client_id(request: Request) -> str:
+    """Rate-limit key: the caller's X-Client-Id, else its address."""
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+
+def request_cost(req: MoveRequest) -> float:
+    """Estimated LLM calls to answer `req`; positions in the opening book are free."""
+    if _book_serves(req) and OPENING_BOOK.covers(req.mode, req.board, req.player):
+        return 0.0
+    return estimate_cost(req)
+
+
+def _rejected(e: Rejected) -> HTTPException:
+    return HTTPException(status_code=429, detail=f"Too many requests ({e}); retry later",
+                         headers={"Retry-After": retry_after(e)})
+
+
+# --- Adaptive degradation ---
+
+# Every LLM call of this process feeds the health that degradations are planned from (see api/degradation.py)
+LLM_HEALTH.watch(COT_FLIGHTS)
+LLM_HEALTH.watch(PROPOSAL_FLIGHTS)
+
+ENGINES = {'tot': 'tot', 'cot': 'cot', 'solve': 'solver'}
+
+
+def plan(req: MoveRequest, same_mode: bool = False) -> Tuple[MoveRequest, Optional[str]]:
+    """What to run for `req` given recent LLM health, and why if it differs; book positions run as asked."""
+    if request_cost(req) == 0:
+        return req, None
+    return LLM_HEALTH.plan(req, same_mode)
+
+
+def label(result: Union[CotResponse, TreeMove], requested: MoveRequest, reason: Optional[str]) -> Union[CotResponse, TreeMove]:
+    """
+    Tag `result` with the engine that answered and, when `reason` is given, the mode that was asked
+    for. Tags already set (by the solver fallback in `answer`) are kept.
+    """
+    book = result.book if isinstance(result, CotResponse) else result.extra.get("book")
+    tags = {"engine": "book" if book else ENGINES[result.mode]}
+    if reason is not None:
+        tags.update(degraded_from=requested.mode, degraded_reason=reason)
+    if isinstance(result, CotResponse):
+        return result.model_copy(update={k: v for k, v in tags.items() if getattr(result, k) is None})
+    for k, v in tags.items():
+        result.extra.setdefault(k, v)
+    return result
+
+
+def response_headers(ticket: Ticket, result: Union[CotResponse, TreeMove]) -> Dict[str, str]:
+    headers = {"X-Admission": ticket.outcome}
+    degraded_from = result.degraded_from if isinstance(result, CotResponse) else result.extra.get("degraded_from")
+    if degraded_from:
+        headers["X-Degraded-From"] = degraded_from
+    return headers
+
+
+# --- Client disconnects ---
+T = TypeVar("T")
+
+# Requests abandoned by their client, by mode; their search was cancelled
+CANCELLED = Counter()
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _disconnected(request: Request) -> None:
+    # The body has been read, so the next message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def until_disconnect(request: Request, work: Awaitable[T], mode: str) -> T:
+    """
+    Await `work`, cancelling it (with every LLM call it has in flight) if the client goes away
+    first; that raises `ClientDisconnected` and is counted in `CANCELLED`.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_disconnected(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+    if not task.done():
+        # Let the cancellation run through the search before answering
+        await asyncio.wait({task})
+        CANCELLED[mode] += 1
+        print(f"[API] client disconnected; cancelled {mode} search")
+        raise ClientDisconnected()
+    return task.result()
 
 
 @app.get("/healthz")
@@ -135,11 +350,307 @@ async def healthz():
     return {"ok": True}
 
 
-@app.post("/api/v1/move")
-async def move(req: MoveRequest):
+@app.get("/api/v1/stats")
+async def stats():
+    return {
+        "singleflight": {"cot": COT_FLIGHTS.stats(), "tot": PROPOSAL_FLIGHTS.stats()},
+        "transpositions": SHARED_TRANSPOSITIONS.stats(),
+        "proposal_cache": SHARED_PROPOSAL_CACHE.stats(),
+        "cache_backend": SHARED_BACKEND.stats(),
+        "sessions": SHARED_SESSIONS.stats(),
+        "cancelled": dict(CANCELLED),
+        "opening_book": OPENING_BOOK.stats() if OPENING_BOOK is not None else None,
+        "cpu_pool": CPU_POOL.stats(),
+        "admission": ADMISSION.stats(),
+        "llm_health": LLM_HEALTH.stats(),
+    }
+
+
+# Server-side caps on returned trees (requests may ask for less, never more; 0 = no cap)
+TREE_MAX_DEPTH = int(os.getenv("TREE_MAX_DEPTH", "12"))
+TREE_MAX_NODES = int(os.getenv("TREE_MAX_NODES", "20000"))
+TREE_MAX_REASON_CHARS = int(os.getenv("TREE_MAX_REASON_CHARS", "500"))
+
+
+def _cap(requested: Optional[int], server_max: int) -> Optional[int]:
+    if not server_max:
+        return requested
+    return server_max if requested is None else min(requested, server_max)
+
+
+def tree_limits(req: MoveRequest) -> TreeLimits:
+    return TreeLimits(
+        max_depth=_cap(req.tree_max_depth, TREE_MAX_DEPTH),
+        max_nodes=_cap(req.tree_max_nodes, TREE_MAX_NODES),
+        max_reason_chars=TREE_MAX_REASON_CHARS or None,
+    )
+
+
+def _busy(e: Saturated) -> HTTPException:
+    return HTTPException(status_code=429, detail=f"Server busy ({e}); retry shortly", headers={"Retry-After": "1"})
+
+
+async def tree_response(result: TreeMove, fmt: str, limits: TreeLimits) -> Response:
+    """
+    Encode a ToT/solve answer in `fmt` without building per-node models. Large trees are encoded in
+    the CPU pool (raises `Saturated` when it is full); smaller ones in place, chunked formats streamed.
+    """
+    if encoded_nodes(result, limits) >= OFFLOAD_MIN_NODES:
+        body = await CPU_POOL.run(encode_body, result, fmt, limits)
+        return Response(content=body, media_type=MEDIA_TYPES[fmt])
+    body, media_type = encode_move(result, fmt, limits)
+    if isinstance(body, bytes):
+        return Response(content=body, media_type=media_type)
+    return StreamingResponse(body, media_type=media_type)
+
+
+async def _llm_answer(req: MoveRequest) -> Union[CotResponse, TreeMove]:
     if req.mode == 'cot':
         return await run_cot(req.board, player=req.player)
-    elif req.mode == 'tot':
-        return await run_tot(req.board, player=req.player, beam=req.beam, depth=req.depth)
-    else:
-        raise HTTPException(status_code=400, detail="Invalid mode") 
\ No newline at end of file
+    return await run_tot(req.board, player=req.player, beam=req.beam, depth=req.depth, strategy=req.strategy,
+                         deadline_ms=req.deadline_ms, iterations=req.iterations, session_id=req.session_id)
+
+
+# Failures of the LLM provider (API and transport errors, unparseable output) that the solver stands in for;
+# anything else is a bug and propagates
+LLM_ERRORS = (openai.OpenAIError, httpx.HTTPError, ValueError)
+
+
+async def answer(req: MoveRequest) -> Union[CotResponse, TreeMove]:
+    """
+    CotResponse for cot, TreeMove for tot/solve; early positions come from the opening book. CoT/ToT
+    answers that fail with an LLM error, or (for requests without their own deadline_ms, which the
+    search keeps itself) take longer than LLM_LATENCY_SLO_S, are replaced by the solver's, labelled
+    as degraded ("llm_failed" / "llm_timeout").
+    """
+    booked = book_move(req)
+    if booked is not None:
+        return booked
+    if req.mode == 'solve':
+        return await run_solve(req.board, player=req.player)
+    if req.mode not in ('cot', 'tot'):
+        raise HTTPException(status_code=400, detail="Invalid mode")
+    slo_s = None if req.deadline_ms else (LLM_LATENCY_SLO_S or None)
+    try:
+        return await asyncio.wait_for(_llm_answer(req), slo_s)
+    except asyncio.TimeoutError:
+        reason = "llm_timeout"
+    except LLM_ERRORS as e:
+        reason = "llm_failed"
+        print(f"[API] {req.mode} answer failed ({type(e).__name__}: {e}); answering with the solver")
+    return label(await run_solve(req.board, player=req.player), req, reason)
+
+
+@app.post("/api/v1/move")
+async def move(req: MoveRequest, request: Request, response: Response):
+    """
+    Answer one move request. While the LLM is slow or failing a cheaper engine is planned for it
+    (see api/degradation.py); it is then admitted against the caller's rate limit and the server's
+    LLM budget (see api/admission.py): over budget it is rejected with 429, queued, or answered by
+    a cheaper engine. The response's `engine`/`degraded_*` fields (and the X-Admission and
+    X-Degraded-From headers) say what answered and why.
+    """
+    fmt = "nested"
+    if req.mode != 'cot':
+        try:
+            fmt = negotiate_format(req.tree_format, request.headers.get("accept"))
+        except FormatUnavailable as e:
+            raise HTTPException(status_code=406, detail=str(e))
+
+    async def admitted() -> Tuple[Ticket, Union[CotResponse, TreeMove]]:
+        planned, reason = plan(req)
+        async with ADMISSION.admit(planned, client_id(request), request_cost(planned)) as ticket:
+            return ticket, label(await answer(ticket.req), req, ticket.reason or reason)
+
+    try:
+        ticket, result = await until_disconnect(request, admitted(), req.mode)
+    except Rejected as e:
+        raise _rejected(e)
+    except ClientDisconnected:
+        # Nobody is listening; 499 (client closed request) only shows up in access logs
+        return Response(status_code=499)
+    headers = response_headers(ticket, result)
+    if isinstance(result, CotResponse):
+        response.headers.update(headers)
+        return result
+    try:
+        encoded = await tree_response(result, fmt, tree_limits(req))
+    except Saturated as e:
+        raise _busy(e)
+    encoded.headers.update(headers)
+    return encoded
+
+
+@app.post("/api/v1/move/stream")
+async def move_stream(req: MoveRequest, request: Request):
+    """
+    ToT search as Server-Sent Events: "node" for each node added to the tree, "score" when a
+    node's value is backed up, "best" when the best line at the root changes, then "done" with
+    the move (the fields of `TotResponse` without the tree) or "error". Closing the stream
+    cancels the search. LLM health and admission may narrow the search (never leaving ToT; "done"
+    then carries `degraded_from`/`degraded_reason`) or admission may reject it with 429.
+    """
+    if req.mode != 'tot':
+        raise HTTPException(status_code=400, detail="Streaming is only available for mode 'tot'")
+    planned, reason = plan(req, same_mode=True)
+    try:
+        ticket = await ADMISSION.acquire(planned, client_id(request), same_mode=True)
+    except Rejected as e:
+        raise _rejected(e)
+    run = ticket.req
+    events: "asyncio.Queue[Tuple[str, Dict[str, Any]]]" = asyncio.Queue()
+    # The search starts when the client starts reading; `settle` runs after the response however it ended
+    search: Optional["asyncio.Task[TreeMove]"] = None
+    released = cancelled = False
+
+    async def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            await ADMISSION.release(ticket)
+
+    async def admitted_search() -> TreeMove:
+        try:
+            result = await run_tot(
+                run.board, player=run.player, beam=run.beam, depth=run.depth, strategy=run.strategy,
+                deadline_ms=run.deadline_ms, iterations=run.iterations, session_id=run.session_id,
+                listener=lambda event, data: events.put_nowait((event, data)),
+            )
+        finally:
+            await release()
+        return label(result, req, ticket.reason or reason)
+
+    def abandon() -> None:
+        nonlocal cancelled
+        if search is not None and not search.done() and not cancelled:
+            cancelled = True
+            search.cancel()
+            CANCELLED['stream'] += 1
+            print("[API] client disconnected; cancelled streaming tot search")
+
+    async def stream():
+        nonlocal search
+        search = asyncio.create_task(admitted_search())
+        try:
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait({getter, search}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    event, data = getter.result()
+                    yield sse_event(event, data)
+                    continue
+                getter.cancel()
+                while not events.empty():
+                    event, data = events.get_nowait()
+                    yield sse_event(event, data)
+                break
+            try:
+                result = search.result()
+            except HTTPException as e:
+                yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+            except Exception as e:
+                yield sse_event("error", {"status": 500, "detail": str(e)})
+            else:
+                yield sse_event("done", {**result.fields(), "tree_nodes": len(result.tree)})
+        finally:
+            # Starlette stops iterating when the client disconnects, which lands here
+            abandon()
+
+    async def settle() -> None:
+        # A client gone before the first chunk never started the body (nor the search), and a
+        # search cancelled before its first step never reached its `finally`: give the ticket back
+        abandon()
+        if search is not None:
+            await asyncio.wait({search})
+        await release()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", background=BackgroundTask(settle),
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Admission": ticket.outcome})
+
+
+# --- Batch ---
+
+# Shared by all batch requests: items answered at once across the server
+MOVE_BATCH_CONCURRENCY = int(os.getenv("MOVE_BATCH_CONCURRENCY", "8"))
+BATCH_LIMIT = asyncio.Semaphore(MOVE_BATCH_CONCURRENCY)
+
+
+def _batch_line(index: int, status: int, body: bytes, admission: bytes = b"") -> bytes:
+    key = b'"result":' if status == 200 else b'"error":'
+    return b'{"index":%d,"status":%d,%s%s%s}\n' % (index, status, admission, key, body)
+
+
+def _admission_fields(ticket: Ticket) -> bytes:
+    """Batch-line field for an item that was not simply admitted (as with the X-Admission header)."""
+    if ticket.outcome == "admitted":
+        return b""
+    return b'"admission":"%s",' % ticket.outcome.encode()
+
+
+async def _answer_batch_item(req: MoveRequest, client: str) -> Tuple[int, bytes, bytes]:
+    """
+    (status, JSON body, admission fields) for one batch item; failures are reported in-line instead of
+    failing the batch. Each item is admitted on its own, against the same client's rate limit.
+    """
+    fmt = req.tree_format or "nested"
+    if req.mode != 'cot' and fmt not in ("nested", "columnar"):
+        return 406, orjson.dumps({"detail": f"tree_format {fmt!r} is not available in batches; use 'nested' or 'columnar'"}), b""
+    try:
+        async with BATCH_LIMIT:
+            planned, reason = plan(req)
+            async with ADMISSION.admit(planned, client, request_cost(planned)) as ticket:
+                result = label(await answer(ticket.req), req, ticket.reason or reason)
+        fields = _admission_fields(ticket)
+        if isinstance(result, CotResponse):
+            return 200, result.model_dump_json().encode(), fields
+        limits = tree_limits(req)
+        if encoded_nodes(result, limits) >= OFFLOAD_MIN_NODES:
+            return 200, await CPU_POOL.run(move_document, result, fmt, limits), fields
+        return 200, move_document(result, fmt, limits), fields
+    except Rejected as e:
+        return 429, orjson.dumps({"detail": f"Too many requests ({e}); retry later",
+                                  "retry_after": int(retry_after(e))}), b""
+    except Saturated as e:
+        return 429, orjson.dumps({"detail": f"Server busy ({e}); retry shortly"}), b""
+    except FormatUnavailable as e:
+        return 406, orjson.dumps({"detail": str(e)}), b""
+    except HTTPException as e:
+        return e.status_code, orjson.dumps({"detail": e.detail}), b""
+    except Exception as e:
+        return 500, orjson.dumps({"detail": str(e)}), b""
+
+
+@app.post("/api/v1/move:batch")
+async def move_batch(batch: MoveBatchRequest, request: Request):
+    """
+    Answer many move requests in one call. Identical requests are answered once; items run concurrently
+    under the server-wide MOVE_BATCH_CONCURRENCY limit and stream back as NDJSON in completion order:
+    {"index": i, "status": 200, "result": {...}} or {"index": i, "status": 4xx/5xx, "error": {"detail": ...}}.
+    Trees use the item's tree_format ('nested' or 'columnar'). Closing the stream cancels the items not done yet.
+    """
+    indices: Dict[str, List[int]] = {}
+    for i, req in enumerate(batch.requests):
+        indices.setdefault(req.model_dump_json(), []).append(i)
+    jobs = {key: batch.requests[idx[0]] for key, idx in indices.items()}
+
+    client = client_id(request)
+
+    async def run(key: str) -> Tuple[str, Tuple[int, bytes, bytes]]:
+        return key, await _answer_batch_item(jobs[key], client)
+
+    async def lines():
+        tasks = [asyncio.ensure_future(run(key)) for key in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, (status, body, fields) = await next_done
+                yield b"".join(_batch_line(i, status, body, fields) for i in indices[key])
+        finally:
+            pending = [t for t in tasks if not t.done()]
+            for t in pending:
+                t.cancel()
+            if pending:
+                CANCELLED['batch'] += len(pending)
+                print(f"[API] batch stream closed; cancelled {len(pending)} item(s)")
+
+    print(f"[API] batch of {len(batch.requests)} request(s), {len(jobs)} unique")
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,66 @@
+"""
+Process-wide registry of structured-output LLM clients, shared by every
+checkpoint that calls the LLM.
+
+One pooled `httpx.AsyncClient` (keep-alive, bounded connections) is shared by
+every ChatOpenAI instance running on an event loop, and each (model, key,
+schema) binding is built once instead of per call. Pooled connections belong
+to the loop that opened them, so each loop gets its own pool; whoever owns a
+loop closes its pool with `aclose_clients` before the loop ends (the CLI once
+per move, the API on shutdown).
+"""
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, Tuple, Type
+
+import httpx
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from .config import LLM_KEEPALIVE_EXPIRY_S, LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE, LLM_TIMEOUT_S
+
+
+class _Pool:
+    def __init__(self) -> None:
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY_S,
+            ),
+            timeout=LLM_TIMEOUT_S,
+        )
+        self.structured: Dict[Tuple[str, str, Type[BaseModel]], Any] = {}
+
+
+_pools: Dict[asyncio.AbstractEventLoop, _Pool] = {}
+
+
+def _pool() -> _Pool:
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None or pool.http.is_closed:
+        # A loop that ended without closing its pool cannot close it any more: drop it
+        for stale in [l for l in _pools if l.is_closed()]:
+            del _pools[stale]
+        pool = _pools[loop] = _Pool()
+    return pool
+
+
+def get_structured_llm(model_name: str, api_key: str, schema: Type[BaseModel]) -> Any:
+    """Return the cached `ChatOpenAI(...).with_structured_output(schema)` runnable."""
+    pool = _pool()
+    key = (model_name, api_key, schema)
+    runnable = pool.structured.get(key)
+    if runnable is None:
+        llm = ChatOpenAI(model=model_name, api_key=api_key, http_async_client=pool.http)
+        runnable = llm.with_structured_output(schema)
+        pool.structured[key] = runnable
+    return runnable
+
+
+async def aclose_clients() -> None:
+    """Close the running loop's connection pool (e.g. from the FastAPI lifespan)."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None and not pool.http.is_closed:
+        await pool.http.aclose()
@@ -13,6 +13,12 @@ OPENAI_MODEL = "gpt-4o-mini"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 VERBOSE = True
 
+# Shared LLM connection pool (see clients.py)
+LLM_MAX_CONNECTIONS = 20
+LLM_MAX_KEEPALIVE = 10
+LLM_KEEPALIVE_EXPIRY_S = 30.0
+LLM_TIMEOUT_S = 60.0
+
 
 def dbg(*msg: Any) -> None:
     if VERBOSE:
@@ -2,9 +2,9 @@ from __future__ import annotations
 from textwrap import dedent
 from typing import Optional, Set, Tuple, cast
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
+from checkpoint_2.clients import get_structured_llm
 from .config import OPENAI_API_KEY, OPENAI_MODEL, dbg
 from .game import TicTacToe
 from .schemas import Move
@@ -43,8 +43,7 @@ async def get_agent_move(game: TicTacToe, available_positions: Set[Tuple[int, in
     if not key:
         raise RuntimeError("OPENAI_API_KEY is not set. Please set it in the environment.")
 
-    llm = ChatOpenAI(model=OPENAI_MODEL, api_key=key)
-    structured_llm = llm.with_structured_output(Move)
+    structured_llm = get_structured_llm(OPENAI_MODEL, key, Move)
 
     response = cast(Move, await structured_llm.ainvoke([HumanMessage(content=prompt)]))
     return response.row, response.col, response.reason
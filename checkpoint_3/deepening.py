@@ -0,0 +1,145 @@
+"""
+Iterative-deepening, deadline-aware driver around the search strategies.
+
+Runs the chosen strategy at depth 1, 2, ... max_depth, each into a fresh
+ThoughtTree, and keeps the result of the deepest iteration that finished
+before the wall-clock deadline. The iteration still running at the deadline
+is cancelled, which cancels its outstanding proposal calls. A heuristic
+one-ply answer (no LLM) is always available as the depth-0 fallback.
+
+`run_strategy` is the entry point used by the CLI and the API: anytime
+strategies (MCTS) get the deadline as their own budget and run once.
+Given an existing `tree` (e.g. re-rooted from the previous move, see
+sessions.py), every iteration searches into that one tree instead, so nodes
+expanded earlier are reused instead of asking the LLM again. Nodes added by
+an iteration that was cancelled never had their scores backed up; they are
+marked `pruned` (the next search that reaches them expands them as usual).
+"""
+from __future__ import annotations
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from .config import SEARCH_MAX_DEPTH, dbg
+from .game import TicTacToe
+from .positions import OUTCOME_LABELS, O_CODE, SCORE_O, STATUS, X_CODE
+from .schemas import PathStep
+from .strategies import ANYTIME_STRATEGIES, SearchFn, get_strategy
+from .tree import ThoughtTree
+
+
+@dataclass
+class DeepeningResult:
+    score: int                  # from O's perspective
+    path: List[PathStep]
+    tree: ThoughtTree           # tree of the iteration the path came from (the caller's tree, if one was given)
+    depth: int                  # deepest completed iteration (0 = heuristic fallback)
+    timed_out: bool             # True if an iteration was cut short by the deadline
+
+
+def _rooted(tree: Optional[ThoughtTree], root_score: int) -> ThoughtTree:
+    """`tree` if it already has a root, else a fresh one (with a root) to search into."""
+    if tree is None:
+        tree = ThoughtTree()
+    if tree.root_id is None:
+        tree.add_root(score_after=root_score)
+    return tree
+
+
+def heuristic_fallback(game: TicTacToe, to_move: str, root_score: int) -> DeepeningResult:
+    """One-ply answer from the precomputed heuristic table, recorded in its own tree."""
+    tree = ThoughtTree()
+    root_id = tree.add_root(score_after=root_score)
+    best: Optional[PathStep] = None
+    for r, c in sorted(game.available_positions()):
+        nxt = game.apply_move(r, c, to_move)
+        idx = X_CODE[nxt.x] + O_CODE[nxt.o]
+        s = SCORE_O[idx]
+        outcome = OUTCOME_LABELS[STATUS[idx]]
+        tree.add_child(root_id, player=to_move, r=r, c=c, reason="heuristic (no LLM)", score_after=s,
+                       terminal=outcome is not None, outcome=outcome)
+        if best is None or (to_move == 'O' and s > best.score_after) or (to_move == 'X' and s < best.score_after):
+            best = PathStep(player=to_move, row=r, col=c, reason="heuristic (no LLM)", score_after=s)
+    if best is None:
+        return DeepeningResult(score=root_score, path=[], tree=tree, depth=0, timed_out=False)
+    return DeepeningResult(score=best.score_after, path=[best], tree=tree, depth=0, timed_out=False)
+
+
+async def iterative_deepening(
+    game: TicTacToe,
+    to_move: str,
+    search: SearchFn,
+    root_score: int,
+    max_depth: int = SEARCH_MAX_DEPTH,
+    deadline_s: Optional[float] = None,
+    tree: Optional[ThoughtTree] = None,
+    **search_kwargs: Any,
+) -> DeepeningResult:
+    """
+    `deadline_s` is a budget in seconds from now; None runs a single full-depth search.
+    `tree` (optional) is searched into by every iteration instead of a fresh tree each time.
+    `search_kwargs` are passed through to `search` (model_name, api_key, beam_width, ...).
+    """
+    if deadline_s is None:
+        tree = _rooted(tree, root_score)
+        score, path = await search(game, to_move, tree, tree.root_id, max_depth=max_depth, **search_kwargs)
+        return DeepeningResult(score=score, path=path, tree=tree, depth=max_depth, timed_out=False)
+
+    deadline = time.monotonic() + deadline_s
+    best = heuristic_fallback(game, to_move, root_score)
+    shared = tree
+    for depth in range(1, max_depth + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            best.timed_out = True
+            break
+        tree = _rooted(shared, root_score)
+        known = len(tree)
+        try:
+            score, path = await asyncio.wait_for(
+                search(game, to_move, tree, tree.root_id, max_depth=depth, **search_kwargs),
+                timeout=remaining,
+            )
+        except asyncio.TimeoutError:
+            dbg(0, f"[deepening] Deadline hit during depth {depth}; keeping depth {best.depth}.")
+            # The cut-short iteration's nodes stay in a shared tree without backed-up scores
+            for nid in range(known, len(tree)):
+                tree.nodes[nid].pruned = True
+            best.timed_out = True
+            break
+        if path:
+            best = DeepeningResult(score=score, path=path, tree=tree, depth=depth, timed_out=False)
+    return best
+
+
+async def run_strategy(
+    strategy: str,
+    game: TicTacToe,
+    to_move: str,
+    root_score: int,
+    max_depth: int = SEARCH_MAX_DEPTH,
+    deadline_s: Optional[float] = None,
+    iterations: Optional[int] = None,
+    tree: Optional[ThoughtTree] = None,
+    **search_kwargs: Any,
+) -> DeepeningResult:
+    """
+    Run the named strategy under a budget. Depth-bounded strategies go through
+    `iterative_deepening`; anytime ones run once with `iterations` / `deadline_s` as their budget
+    (`depth` then reports the length of the returned line).
+    """
+    search = get_strategy(strategy)
+    if strategy not in ANYTIME_STRATEGIES:
+        return await iterative_deepening(game, to_move, search, root_score, max_depth=max_depth,
+                                         deadline_s=deadline_s, tree=tree, **search_kwargs)
+    tree = _rooted(tree, root_score)
+    start = time.monotonic()
+    score, path = await search(game, to_move, tree, tree.root_id, max_depth=max_depth, iterations=iterations,
+                               time_budget_s=deadline_s, **search_kwargs)
+    timed_out = deadline_s is not None and time.monotonic() - start >= deadline_s
+    if not path:
+        fallback = heuristic_fallback(game, to_move, root_score)
+        fallback.timed_out = timed_out
+        return fallback
+    return DeepeningResult(score=score, path=path, tree=tree, depth=len(path), timed_out=timed_out)
@@ -1,55 +1,133 @@
 from __future__ import annotations
 from typing import List, Set, Tuple
 
+# Cell index i = r * 3 + c maps to bit (1 << i) in the X / O masks.
+FULL_MASK = 0b111_111_111
+LINE_MASKS: Tuple[int, ...] = (
+    0b000_000_111, 0b000_111_000, 0b111_000_000,  # rows
+    0b001_001_001, 0b010_010_010, 0b100_100_100,  # cols
+    0b100_010_001, 0b001_010_100,                 # diagonals
+)
+
+
+def _has_line(mask: int) -> bool:
+    for line in LINE_MASKS:
+        if mask & line == line:
+            return True
+    return False
+
+
+# 512-entry win lookup: WIN_TABLE[mask] is True if `mask` contains a full line.
+WIN_TABLE: Tuple[bool, ...] = tuple(_has_line(m) for m in range(FULL_MASK + 1))
+
+
 class TicTacToe:
-    """Simple 3x3 Tic-Tac-Toe board with '-', 'X', 'O'."""
+    """
+    Simple 3x3 Tic-Tac-Toe board with '-', 'X', 'O'.
+
+    X and O are packed into two 9-bit integers; `board` is a matrix view kept
+    for callers that still read or assign rows.
+    """
+    __slots__ = ("x", "o")
+
     def __init__(self):
-        self.board: List[List[str]] = [['-' for _ in range(3)] for _ in range(3)]
+        self.x: int = 0
+        self.o: int = 0
 
-    def copy(self) -> "TicTacToe":
-        g = TicTacToe()
-        g.board = [row[:] for row in self.board]
+    # ----- matrix adapter -----
+
+    @property
+    def board(self) -> List[List[str]]:
+        x, o = self.x, self.o
+        return [
+            ['X' if x >> i & 1 else ('O' if o >> i & 1 else '-') for i in range(r * 3, r * 3 + 3)]
+            for r in range(3)
+        ]
+
+    @board.setter
+    def board(self, rows: List[List[str]]) -> None:
+        x = o = 0
+        for r in range(3):
+            for c in range(3):
+                v = rows[r][c]
+                if v == 'X':
+                    x |= 1 << (r * 3 + c)
+                elif v == 'O':
+                    o |= 1 << (r * 3 + c)
+        self.x, self.o = x, o
+
+    @classmethod
+    def from_masks(cls, x: int, o: int) -> "TicTacToe":
+        g = cls.__new__(cls)
+        g.x, g.o = x, o
         return g
 
+    def copy(self) -> "TicTacToe":
+        return TicTacToe.from_masks(self.x, self.o)
+
     def print_board(self) -> None:
         print("\n------- CURRENT STATE -------")
         for row in self.board:
             print(' '.join(row))
         print("-----------------------------\n")
 
+    # ----- queries -----
+
+    def cell(self, r: int, c: int) -> str:
+        bit = 1 << (r * 3 + c)
+        return 'X' if self.x & bit else ('O' if self.o & bit else '-')
+
+    def empty_mask(self) -> int:
+        return FULL_MASK & ~(self.x | self.o)
+
     def available_positions(self) -> Set[Tuple[int, int]]:
-        return {(r, c) for r in range(3) for c in range(3) if self.board[r][c] == '-'}
+        empty = self.empty_mask()
+        return {divmod(i, 3) for i in range(9) if empty >> i & 1}
 
     def is_win(self, p: str) -> bool:
-        b = self.board
-        # rows/cols
-        for i in range(3):
-            if all(b[i][c] == p for c in range(3)): return True
-            if all(b[r][i] == p for r in range(3)): return True
-        # diagonals
-        if all(b[i][i] == p for i in range(3)): return True
-        if all(b[i][2 - i] == p for i in range(3)): return True
-        return False
+        return WIN_TABLE[self.x if p == 'X' else self.o]
 
     def is_draw(self) -> bool:
-        return all(c != '-' for r in range(3) for c in self.board[r]) and not self.is_win('X') and not self.is_win('O')
+        return (self.x | self.o) == FULL_MASK and not WIN_TABLE[self.x] and not WIN_TABLE[self.o]
+
+    # ----- moves -----
+
+    def play(self, idx: int, player: str) -> None:
+        """Set cell `idx` (0..8) for `player` in place; no validation, no allocation."""
+        if player == 'X':
+            self.x |= 1 << idx
+        else:
+            self.o |= 1 << idx
+
+    def undo(self, idx: int, player: str) -> None:
+        """Clear cell `idx` previously set by `play`."""
+        if player == 'X':
+            self.x &= ~(1 << idx)
+        else:
+            self.o &= ~(1 << idx)
 
     def apply_move(self, r: int, c: int, player: str) -> "TicTacToe":
         if not (0 <= r < 3 and 0 <= c < 3):
             raise ValueError("Out of bounds")
-        if self.board[r][c] != '-':
+        bit = 1 << (r * 3 + c)
+        if (self.x | self.o) & bit:
             raise ValueError("Cell occupied")
-        g = self.copy()
-        g.board[r][c] = player
-        return g
+        if player == 'X':
+            return TicTacToe.from_masks(self.x | bit, self.o)
+        return TicTacToe.from_masks(self.x, self.o | bit)
 
     def make_move(self, player: str, r: int, c: int) -> bool:
         """Mutates board; returns True if this move wins."""
         if not (0 <= r < 3 and 0 <= c < 3): return False
-        if self.board[r][c] != '-': return False
-        self.board[r][c] = player
+        idx = r * 3 + c
+        if (self.x | self.o) >> idx & 1: return False
+        self.play(idx, player)
         return self.is_win(player)
 
+    def undo_move(self, r: int, c: int, player: str) -> None:
+        """Reverts a `make_move` for `player` at (r, c)."""
+        self.undo(r * 3 + c, player)
+
     def make_move_x(self, r: int, c: int) -> bool:
         return self.make_move('X', r, c)
 
@@ -0,0 +1,223 @@
+"""
+Monte Carlo Tree Search over the thought tree.
+
+UCT with LLM proposals as priors (PUCT): a leaf is expanded with one
+`create_thoughts` call (forced positions skip the LLM, see ordering.py), the
+proposals become its children in `tree` with rank-based priors, and the leaf
+is valued by a handful of random playouts on the bitboards. Visits are
+recorded on the ThoughtNodes. The budget is a number of iterations and/or
+wall-clock seconds, so quality scales smoothly with compute instead of in
+beam/depth steps. Same contract as `find_best_path_with_tree`: scores are
+from O's perspective (±100 scale).
+"""
+from __future__ import annotations
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    MCTS_EXPLORATION,
+    MCTS_ITERATIONS,
+    MCTS_REPORT_EVERY,
+    MCTS_ROLLOUTS_PER_LEAF,
+    OPENAI_MODEL,
+    SEARCH_MAX_CONCURRENCY,
+    SEARCH_MAX_DEPTH,
+    dbg,
+)
+from .game import FULL_MASK, WIN_TABLE, TicTacToe
+from .ordering import HeuristicOrderer, MoveOrderer
+from .positions import CELLS, DRAW, O_CODE, O_WINS, OUTCOME_LABELS, STATUS, X_CODE, X_WINS
+from .schemas import PathStep
+from .search import _existing_children, _fetch_proposals, _report_value, _score_and_expand_children
+from .transposition import TranspositionTable
+from .tree import ThoughtTree
+
+
+@dataclass
+class _Stats:
+    state: TicTacToe
+    to_move: str                # side to move in `state`
+    prior: float = 1.0
+    value_o: float = 0.0        # sum of playout results from O's perspective (+1 / 0 / -1)
+    expanded: bool = False
+    children: List[int] = field(default_factory=list)
+
+
+def rollout(me: int, opp: int, rng: random.Random) -> int:
+    """Random playout (taking immediate wins) from a non-terminal position: +1 if `me` (to move) wins."""
+    sign = 1
+    while True:
+        empty = FULL_MASK & ~(me | opp)
+        if not empty:
+            return 0
+        cells = CELLS[empty]
+        for cell in cells:
+            if WIN_TABLE[me | (1 << cell)]:
+                return sign
+        me |= 1 << rng.choice(cells)
+        me, opp = opp, me
+        sign = -sign
+
+
+def _terminal_value(state: TicTacToe) -> Optional[int]:
+    status = STATUS[X_CODE[state.x] + O_CODE[state.o]]
+    if status == O_WINS:
+        return 1
+    if status == X_WINS:
+        return -1
+    if status == DRAW:
+        return 0
+    return None
+
+
+def _leaf_value(stats: _Stats, rng: random.Random, rollouts: int) -> float:
+    """Mean playout result from O's perspective."""
+    terminal = _terminal_value(stats.state)
+    if terminal is not None:
+        return float(terminal)
+    me, opp = (stats.state.o, stats.state.x) if stats.to_move == 'O' else (stats.state.x, stats.state.o)
+    total = sum(rollout(me, opp, rng) for _ in range(rollouts))
+    return (total if stats.to_move == 'O' else -total) / rollouts
+
+
+def _principal_line(tree: ThoughtTree, stats: Dict[int, _Stats], root_id: int) -> Tuple[int, List[PathStep]]:
+    """Follow the most visited child (earlier proposals win ties); score is the first move's mean value."""
+    best_path: List[PathStep] = []
+    nid = root_id
+    best_score: Optional[int] = None
+    while stats[nid].children:
+        visited = [cid for cid in stats[nid].children if tree.nodes[cid].visits]
+        if not visited:
+            break
+        cid = max(visited, key=lambda i: tree.nodes[i].visits)
+        child = tree.nodes[cid]
+        if best_score is None:
+            best_score = round(100 * stats[cid].value_o / child.visits)
+        best_path.append(PathStep(player=stats[nid].to_move, row=child.r, col=child.c,
+                                  reason=child.reason or "", score_after=child.score_after))
+        nid = cid
+    return (best_score if best_score is not None else tree.nodes[root_id].score_after), best_path
+
+
+def _mean_for(player: str, value_o: float, visits: int) -> float:
+    q = value_o / visits
+    return q if player == 'O' else -q
+
+
+async def find_best_path_mcts(
+    game: TicTacToe,
+    to_move: str,  # "O" or "X"
+    tree: ThoughtTree,
+    parent_node_id: int,
+    model_name: str = OPENAI_MODEL,
+    api_key: Optional[str] = None,
+    beam_width: int = 2,
+    max_depth: int = SEARCH_MAX_DEPTH,
+    transpositions: Optional[TranspositionTable] = None,
+    iterations: Optional[int] = None,
+    time_budget_s: Optional[float] = None,
+    exploration: float = MCTS_EXPLORATION,
+    rollouts_per_leaf: int = MCTS_ROLLOUTS_PER_LEAF,
+    orderer: Optional[MoveOrderer] = None,
+    seed: Optional[int] = None,
+) -> Tuple[int, List[PathStep]]:
+    """
+    - Runs until `iterations` (default MCTS_ITERATIONS when no time budget is given) or
+      `time_budget_s` is used up, whichever comes first.
+    - Each iteration makes at most one LLM call (none for nodes already expanded in `tree`); a call still
+      in flight at the time budget is cancelled. If that is the root's own expansion, the path is empty
+      (callers fall back, see `run_strategy`).
+    - Returns the most-visited line; its score is the mean playout value of the first move, scaled to ±100.
+    - `beam_width`, `max_depth` and `transpositions` are accepted for strategy compatibility and ignored:
+      the tree grows where the visits go, down to the end of the game.
+    """
+    if iterations is None and time_budget_s is None:
+        iterations = MCTS_ITERATIONS
+    if orderer is None:
+        orderer = HeuristicOrderer()
+    rng = random.Random(X_CODE[game.x] + O_CODE[game.o] if seed is None else seed)
+    limiter = asyncio.Semaphore(SEARCH_MAX_CONCURRENCY)
+    deadline = time.monotonic() + time_budget_s if time_budget_s is not None else None
+
+    stats: Dict[int, _Stats] = {parent_node_id: _Stats(state=game, to_move=to_move)}
+    root = tree.nodes[parent_node_id]
+    terminal = _terminal_value(game)
+    if terminal is not None:
+        root.terminal = True
+        root.outcome = OUTCOME_LABELS[STATUS[X_CODE[game.x] + O_CODE[game.o]]]
+        return 100 * terminal, []
+
+    done = 0
+    reported: Optional[Tuple[int, int]] = None
+    while iterations is None or done < iterations:
+        if deadline is not None and done > 0 and time.monotonic() >= deadline:
+            break
+
+        # 1) Selection: descend by PUCT through expanded nodes
+        path = [parent_node_id]
+        nid = parent_node_id
+        while stats[nid].expanded and stats[nid].children:
+            parent = stats[nid]
+            sqrt_n = math.sqrt(max(tree.nodes[nid].visits, 1))
+
+            def puct(cid: int) -> float:
+                n = tree.nodes[cid].visits
+                q = _mean_for(parent.to_move, stats[cid].value_o, n) if n else 0.0
+                return q + exploration * stats[cid].prior * sqrt_n / (1 + n)
+
+            nid = max(parent.children, key=puct)
+            path.append(nid)
+
+        # 2) Expansion: one proposal call for a non-terminal leaf (none if an earlier search expanded it)
+        leaf = stats[nid]
+        node = tree.nodes[nid]
+        if not leaf.expanded and _terminal_value(leaf.state) is None:
+            entries = _existing_children(leaf.state, leaf.to_move, tree, nid)
+            if entries is None:
+                legal = leaf.state.available_positions()
+                fetch = _fetch_proposals(leaf.state, legal, leaf.to_move, model_name, api_key,
+                                         limiter=limiter, orderer=orderer, depth=node.depth)
+                if deadline is not None:
+                    try:
+                        proposals = await asyncio.wait_for(fetch, timeout=max(deadline - time.monotonic(), 0))
+                    except asyncio.TimeoutError:
+                        dbg(node.depth, f"  ⏱️ MCTS budget hit while expanding #{nid}.")
+                        break
+                else:
+                    proposals = await fetch
+                entries = _score_and_expand_children(leaf.state, proposals, leaf.to_move, tree, nid)
+            weights = [1.0 / (rank + 1) for rank in range(len(entries))]
+            total = sum(weights)
+            nxt = 'X' if leaf.to_move == 'O' else 'O'
+            for (_, _, next_state, child_id), w in zip(entries, weights):
+                stats[child_id] = _Stats(state=next_state, to_move=nxt, prior=w / total)
+                leaf.children.append(child_id)
+            leaf.expanded = True
+            dbg(node.depth, f"↳ MCTS expand #{nid} ({leaf.to_move} to move): {len(entries)} children")
+
+        # 3) Simulation and 4) backpropagation
+        value = _leaf_value(leaf, rng, rollouts_per_leaf)
+        for pid in path:
+            tree.nodes[pid].visits += 1
+            stats[pid].value_o += value
+        done += 1
+        # Rollouts and reused expansions never await: let other requests have the event loop
+        await asyncio.sleep(0)
+
+        # Progress for listeners: a new best line whenever the most visited first move changes
+        if tree.listener is not None and done % MCTS_REPORT_EVERY == 0:
+            score, line = _principal_line(tree, stats, parent_node_id)
+            first = (line[0].row, line[0].col) if line else None
+            if first != reported:
+                reported = first
+                tree.emit("best", {"score": score, "path": [step.model_dump() for step in line]})
+
+    dbg(0, f"[mcts] {done} iteration(s), {len(stats)} node(s)")
+
+    best_score, best_path = _principal_line(tree, stats, parent_node_id)
+    _report_value(tree, parent_node_id, best_score, best_path)
+    return best_score, best_path
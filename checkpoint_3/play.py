@@ -1,6 +1,9 @@
 from __future__ import annotations
 import asyncio
-from typing import Optional, List
+import uuid
+from typing import Any, Optional, List
+
+from checkpoint_2.clients import aclose_clients
 
 from .config import (
     SHOW_ASCII_TREE_EACH_AGENT_MOVE,
@@ -11,7 +14,11 @@ from .config import (
 from .game import TicTacToe
 from .tree import ThoughtTree
 from .scoring import simple_score_state
-from .search import find_best_path_with_tree
+from .deepening import run_strategy
+from .solver import solve_with_tree
+from .sessions import SHARED_SESSIONS
+from .strategies import DEFAULT_STRATEGY
+from .transposition import SHARED_TRANSPOSITIONS
 
 
 async def agent_move_with_tree(
@@ -19,25 +26,47 @@ async def agent_move_with_tree(
     beam_width: int = 2,
     max_depth: int = SEARCH_MAX_DEPTH,
     api_key: Optional[str] = None,
+    engine: str = "tot",
+    strategy: str = DEFAULT_STRATEGY,
+    deadline_s: Optional[float] = None,
+    iterations: Optional[int] = None,
+    session_id: Optional[str] = None,
 ) -> None:
     """
-    Build a fresh tree from the current state, choose the first step of the best path, and play it.
+    Search a tree from the current state, choose the first step of the best path, and play it.
+    `engine` is "tot" (LLM search using `strategy`, see strategies.py) or "solve" (exact solver, no LLM calls).
+    With `deadline_s`, the ToT search deepens iteratively and plays the deepest result finished in time.
+    `iterations` budgets the "mcts" strategy (which also treats `deadline_s` as its time budget).
+    With `session_id`, the ToT tree from this game's previous move is re-rooted and reused (see sessions.py).
     """
     # Initialize tree with current state's heuristic score
-    start_score = simple_score_state(game.board, agent="O")
-    tree = ThoughtTree()
-    root_id = tree.add_root(score_after=start_score)
+    start_score = simple_score_state(game, agent="O")
 
     # Compute best path from current state assuming 'O' to move
-    best_score, best_path = await find_best_path_with_tree(
-        game,
-        to_move="O",
-        tree=tree,
-        parent_node_id=root_id,
-        beam_width=beam_width,
-        max_depth=max_depth,
-        api_key=api_key,
-    )
+    if engine == "solve":
+        tree = ThoughtTree()
+        root_id = tree.add_root(score_after=start_score)
+        best_score, best_path = solve_with_tree(game, to_move="O", tree=tree, parent_node_id=root_id)
+    else:
+        reuse, reused = SHARED_SESSIONS.resume(session_id, game, "O") if session_id else (None, False)
+        if reused:
+            dbg(0, f"[Agent] Reusing {len(reuse.nodes)} node(s) from the previous move's tree.")
+        result = await run_strategy(
+            strategy,
+            game,
+            to_move="O",
+            root_score=start_score,
+            max_depth=max_depth,
+            deadline_s=deadline_s,
+            iterations=iterations,
+            tree=reuse,
+            beam_width=beam_width,
+            api_key=api_key,
+            transpositions=SHARED_TRANSPOSITIONS,
+        )
+        tree, best_score, best_path = result.tree, result.score, result.path
+        if session_id and reuse is not None:
+            SHARED_SESSIONS.park(session_id, game, "O", reuse)
 
     if SHOW_ASCII_TREE_EACH_AGENT_MOVE:
         print("\n=== Thought Tree (ASCII) ===")
@@ -60,15 +89,28 @@ async def agent_move_with_tree(
         print("Agent (O) wins!")
 
 
+async def _agent_turn(game: TicTacToe, **kwargs: Any) -> None:
+    """One agent move on its own event loop; the loop's LLM connections are closed before it ends."""
+    try:
+        await agent_move_with_tree(game, **kwargs)
+    finally:
+        await aclose_clients()
+
+
 def play_interactive(
     beam_width: int = 2,
     max_depth: int = SEARCH_MAX_DEPTH,
+    engine: str = "tot",
+    strategy: str = DEFAULT_STRATEGY,
+    deadline_s: Optional[float] = None,
+    iterations: Optional[int] = None,
 ):
     """
     Human (X) vs Agent (O) using the tree search for agent turns.
     """
     game = TicTacToe()
     game.print_board()
+    session_id = uuid.uuid4().hex  # lets each agent turn reuse the previous turn's search tree
 
     while True:
         # Human move
@@ -97,7 +139,9 @@ def play_interactive(
             break
 
         # Agent move
-        asyncio.run(agent_move_with_tree(game, beam_width=beam_width, max_depth=max_depth))
+        asyncio.run(_agent_turn(game, beam_width=beam_width, max_depth=max_depth, engine=engine,
+                                strategy=strategy, deadline_s=deadline_s, iterations=iterations,
+                                session_id=session_id))
         if game.is_win('O'):
             break
         if game.is_draw():
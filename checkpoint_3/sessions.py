@@ -0,0 +1,99 @@
+"""
+Per-game search trees kept across moves.
+
+After the agent moves, the tree it searched is parked under the game's
+session id together with the position at its root. On the next turn the
+tree is re-rooted at the node for the position after the human's reply (if
+the search explored that reply), so the proposals already fetched for that
+subtree are reused and only the missing part is expanded with new LLM calls.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .config import SESSION_MAX_ENTRIES, SESSION_TTL_S
+from .game import TicTacToe
+from .tree import ThoughtTree
+
+
+@dataclass
+class _Parked:
+    tree: ThoughtTree
+    x: int                      # position at the tree's root
+    o: int
+    to_move: str                # side to move at the root
+    stored_at: float
+
+
+def find_position(tree: ThoughtTree, game: TicTacToe, x: int, o: int) -> Optional[int]:
+    """Node id in `tree` (rooted at the position with masks x/o) whose position is `game`, or None."""
+    if tree.root_id is None:
+        return None
+    stack = [(tree.root_id, x, o)]
+    while stack:
+        nid, nx, no = stack.pop()
+        if nx == game.x and no == game.o:
+            return nid
+        # Only follow moves that are on `game`'s board, so every node visited is on the way there
+        for cid in tree.nodes[nid].children:
+            child = tree.nodes[cid]
+            bit = 1 << (child.r * 3 + child.c)
+            if child.player == 'X' and game.x & bit:
+                stack.append((cid, nx | bit, no))
+            elif child.player == 'O' and game.o & bit:
+                stack.append((cid, nx, no | bit))
+    return None
+
+
+class SessionStore:
+    """Bounded, TTL- and LRU-evicted map from session id to the last search tree of that game."""
+
+    def __init__(self, max_entries: int = SESSION_MAX_ENTRIES, ttl_s: float = SESSION_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._parked: "OrderedDict[str, _Parked]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.fresh = 0
+
+    def resume(self, session_id: str, game: TicTacToe, to_move: str) -> Tuple[ThoughtTree, bool]:
+        """
+        Take the session's tree re-rooted at `game` (True), or a new empty tree (False) if the
+        session is unknown, expired or its tree never reached this position. The parked tree is
+        removed, so concurrent requests for one session never search the same tree.
+        """
+        with self._lock:
+            parked = self._parked.pop(session_id, None)
+        if parked is not None and time.monotonic() - parked.stored_at <= self.ttl_s:
+            nid = find_position(parked.tree, game, parked.x, parked.o)
+            if nid is not None and (nid != parked.tree.root_id or parked.to_move == to_move):
+                with self._lock:
+                    self.reused += 1
+                return parked.tree.subtree(nid), True
+        with self._lock:
+            self.fresh += 1
+        return ThoughtTree(), False
+
+    def park(self, session_id: str, game: TicTacToe, to_move: str, tree: ThoughtTree) -> None:
+        """Keep `tree` (rooted at `game`, `to_move` to play) for the session's next move."""
+        with self._lock:
+            self._parked[session_id] = _Parked(tree=tree, x=game.x, o=game.o, to_move=to_move,
+                                               stored_at=time.monotonic())
+            self._parked.move_to_end(session_id)
+            while len(self._parked) > self.max_entries:
+                self._parked.popitem(last=False)
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._parked.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sessions": len(self._parked), "max_entries": self.max_entries,
+                    "reused": self.reused, "fresh": self.fresh}
+
+
+SHARED_SESSIONS = SessionStore()
@@ -0,0 +1,83 @@
+"""
+Single-flight de-duplication for concurrent async calls.
+
+Callers that ask for the same key while a call is in flight await the same
+task instead of starting their own. The shared task is only cancelled once
+every caller awaiting it has been cancelled.
+
+An optional `observer(elapsed_s, error)` sees every issued call finish
+(error is None on success), e.g. to track the latency of an upstream API.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "refs", "started_at")
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.refs = 0
+        self.started_at = time.monotonic()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.started = 0   # calls actually issued
+        self.joined = 0    # callers that shared an in-flight call
+        self.observer: Optional[Callable[[float, Optional[BaseException]], None]] = None
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if self.observer is not None:
+            error = asyncio.CancelledError() if call.task.cancelled() else call.task.exception()
+            self.observer(time.monotonic() - call.started_at, error)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._forget(k, c))
+            self._calls[key] = call
+            self.started += 1
+        else:
+            self.joined += 1
+        call.refs += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.refs -= 1
+            if call.refs == 0 and not call.task.done():
+                call.task.cancel()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def in_flight_ages(self) -> List[float]:
+        """Seconds each in-flight call has been running."""
+        now = time.monotonic()
+        return [now - c.started_at for c in self._calls.values()]
+
+    @property
+    def waiting(self) -> int:
+        """Callers currently waiting on a call someone else started."""
+        return sum(c.refs - 1 for c in self._calls.values() if c.refs > 1)
+
+    def stats(self) -> Dict[str, int]:
+        return {"started": self.started, "joined": self.joined, "in_flight": self.in_flight, "waiting": self.waiting}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share a flight."""
+    return " ".join(prompt.split())
+
+
+# Shared by every create_thoughts call in the process
+PROPOSAL_FLIGHTS = SingleFlight()
@@ -0,0 +1,181 @@
+"""
+Exact tic-tac-toe solver.
+
+Negamax with alpha-beta pruning and a bounded-value cache over the bitboards
+in `game`. At import it solves every position reachable from the empty board
+(X first) into a perfect-play table; other boards are solved on demand.
+
+Values are from the side to move: 0 is a draw, a win is 1 + the number of
+empty cells left when it lands (so faster wins score higher), a loss is the
+negation.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+from .game import FULL_MASK, WIN_TABLE, TicTacToe
+from .positions import CELLS, OUTCOME_LABELS, O_CODE, SCORE_O, STATUS, X_CODE
+from .schemas import PathStep
+from .tree import ThoughtTree
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+_INF = 100
+
+# Center, corners, edges: cheap static ordering that makes cut-offs early
+_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# (me, opp) -> (flag, value, best_cell); me is the side to move
+_bounds: Dict[Tuple[int, int], Tuple[int, int, int]] = {}
+# (me, opp) -> (exact value, best_cell); filled for all reachable positions at import
+PERFECT: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+
+def _alphabeta(me: int, opp: int, alpha: int, beta: int) -> int:
+    empty = FULL_MASK & ~(me | opp)
+    if WIN_TABLE[opp]:
+        return -(1 + empty.bit_count())
+    if WIN_TABLE[me]:
+        return 1 + empty.bit_count()
+    if not empty:
+        return 0
+
+    key = (me, opp)
+    cached = _bounds.get(key)
+    if cached is not None:
+        flag, value, _ = cached
+        if flag == _EXACT or (flag == _LOWER and value >= beta) or (flag == _UPPER and value <= alpha):
+            return value
+
+    alpha0 = alpha
+    best, best_cell = -_INF, -1
+    for cell in _ORDER:
+        if not empty >> cell & 1:
+            continue
+        v = -_alphabeta(opp, me | (1 << cell), -beta, -alpha)
+        if v > best:
+            best, best_cell = v, cell
+            if v > alpha:
+                alpha = v
+                if alpha >= beta:
+                    break
+
+    flag = _UPPER if best <= alpha0 else (_LOWER if best >= beta else _EXACT)
+    _bounds[key] = (flag, best, best_cell)
+    return best
+
+
+def _solve_masks(me: int, opp: int) -> Tuple[int, int]:
+    """Exact (value, best_cell) for `me` to move; best_cell is -1 on terminal boards."""
+    hit = PERFECT.get((me, opp))
+    if hit is not None:
+        return hit
+    value = _alphabeta(me, opp, -_INF, _INF)
+    cached = _bounds.get((me, opp))
+    return value, (cached[2] if cached is not None else -1)
+
+
+def _build_perfect_table() -> None:
+    stack = [(0, 0)]  # (me, opp) with X to move on the empty board
+    seen = set()
+    while stack:
+        me, opp = stack.pop()
+        if (me, opp) in seen:
+            continue
+        seen.add((me, opp))
+        PERFECT[(me, opp)] = _solve_masks(me, opp)
+        empty = FULL_MASK & ~(me | opp)
+        if WIN_TABLE[opp] or WIN_TABLE[me] or not empty:
+            continue
+        for cell in CELLS[empty]:
+            stack.append((opp, me | (1 << cell)))
+
+
+_build_perfect_table()
+
+
+# ---------------------------
+# Public API
+# ---------------------------
+
+def _sides(game: TicTacToe, to_move: str) -> Tuple[int, int]:
+    return (game.x, game.o) if to_move == 'X' else (game.o, game.x)
+
+
+def solve(game: TicTacToe, to_move: str) -> Tuple[int, Optional[Tuple[int, int]]]:
+    """Exact value for `to_move` and a best move (None if the game is over)."""
+    me, opp = _sides(game, to_move)
+    value, cell = _solve_masks(me, opp)
+    return value, (divmod(cell, 3) if cell >= 0 else None)
+
+
+def move_values(game: TicTacToe, to_move: str) -> List[Tuple[Tuple[int, int], int]]:
+    """Exact value (for `to_move`) of every legal move, best-first, ties in cell order."""
+    me, opp = _sides(game, to_move)
+    if WIN_TABLE[me] or WIN_TABLE[opp]:
+        return []
+    out = []
+    for cell in CELLS[FULL_MASK & ~(me | opp)]:
+        v, _ = _solve_masks(opp, me | (1 << cell))
+        out.append((divmod(cell, 3), -v))
+    out.sort(key=lambda t: -t[1])
+    return out
+
+
+def score_for_o(value: int, to_move: str) -> int:
+    """Map a solver value to the search's O-perspective scale (100 / 0 / -100)."""
+    sign = (value > 0) - (value < 0)
+    return 100 * sign if to_move == 'O' else -100 * sign
+
+
+def describe(value: int, empties_after: int) -> str:
+    """Human-readable verdict for a move whose value (for the mover) is `value`."""
+    if value == 0:
+        return "solver: draw with best play"
+    plies = empties_after - (abs(value) - 1) + 1
+    verb = "wins" if value > 0 else "loses"
+    return f"solver: {verb} in {plies} " + ("ply" if plies == 1 else "plies")
+
+
+def solve_with_tree(
+    game: TicTacToe,
+    to_move: str,
+    tree: ThoughtTree,
+    parent_node_id: int,
+) -> Tuple[int, List[PathStep]]:
+    """
+    Perfect-play counterpart of `find_best_path_with_tree`: returns (score, principal variation)
+    with scores from O's perspective, and records every legal reply along the principal variation
+    (exact verdict as the reason) in `tree`.
+    """
+    path: List[PathStep] = []
+    state, player, node_id = game, to_move, parent_node_id
+    root_value: Optional[int] = None
+    while True:
+        moves = move_values(state, player)
+        if not moves:
+            break
+        empties_after = len(moves) - 1
+        best_child = None
+        for (r, c), v in moves:
+            nxt = state.apply_move(r, c, player)
+            idx = X_CODE[nxt.x] + O_CODE[nxt.o]
+            outcome = OUTCOME_LABELS[STATUS[idx]]
+            cid = tree.add_child(
+                node_id, player=player, r=r, c=c,
+                reason=describe(v, empties_after),
+                score_after=SCORE_O[idx],
+                terminal=outcome is not None, outcome=outcome,
+            )
+            if best_child is None:
+                best_child = (r, c, v, nxt, cid)
+        r, c, v, nxt, cid = best_child
+        if root_value is None:
+            root_value = score_for_o(v, player)
+        after = tree.nodes[cid]
+        path.append(PathStep(player=player, row=r, col=c, reason=after.reason or "", score_after=after.score_after))
+        if after.terminal:
+            break
+        state, player, node_id = nxt, ('X' if player == 'O' else 'O'), cid
+    if root_value is None:
+        # Already terminal: nothing to play
+        root_value = score_for_o(solve(game, to_move)[0], to_move)
+    return root_value, path
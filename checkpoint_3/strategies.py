@@ -0,0 +1,33 @@
+"""
+Registry of thought-tree search strategies.
+
+Every strategy shares `find_best_path_with_tree`'s calling convention:
+(game, to_move, tree, parent_node_id, model_name=, api_key=, beam_width=,
+max_depth=, transpositions=) -> (score from O's perspective, path).
+Anytime strategies (MCTS) take a budget instead of a depth: they are run
+once with `iterations=` / `time_budget_s=` rather than deepened iteratively.
+"""
+from __future__ import annotations
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from .level_search import find_best_path_level_order
+from .mcts import find_best_path_mcts
+from .schemas import PathStep
+from .search import find_best_path_with_tree
+
+SearchFn = Callable[..., Awaitable[Tuple[int, List[PathStep]]]]
+
+SEARCH_STRATEGIES: Dict[str, SearchFn] = {
+    "beam": find_best_path_with_tree,            # depth-first recursion, one LLM call per node
+    "level": find_best_path_level_order,         # breadth-first, one batched LLM call per depth
+    "mcts": find_best_path_mcts,                 # UCT with LLM priors and random playouts, budgeted
+}
+ANYTIME_STRATEGIES = frozenset({"mcts"})
+DEFAULT_STRATEGY = "beam"
+
+
+def get_strategy(name: str) -> SearchFn:
+    try:
+        return SEARCH_STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown search strategy {name!r}; expected one of {sorted(SEARCH_STRATEGIES)}") from None
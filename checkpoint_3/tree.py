@@ -1,119 +1,509 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+import json
+from array import array
+from typing import Any, AnyStr, Callable, Container, Dict, Iterable, Iterator, List, Mapping, Optional, TextIO
 
 from .config import VIZ_LAYOUT, dbg
+from .positions import OUTCOME_LABELS
+
+# Node flag bits (see ThoughtTree._flags)
+_PLAYER_MASK = 0b11             # 0 = ROOT, 1 = X, 2 = O
+_TERMINAL = 1 << 2
+_CACHED = 1 << 3
+_PRUNED = 1 << 4
+_OUTCOME_SHIFT = 5              # 2 bits: index into OUTCOME_LABELS
+_OUTCOME_MASK = 0b11 << _OUTCOME_SHIFT
+
+_PLAYERS = ("ROOT", "X", "O")
+_PLAYER_CODE = {p: i for i, p in enumerate(_PLAYERS)}
+_OUTCOME_CODE = {label: i for i, label in enumerate(OUTCOME_LABELS)}
 
 
-@dataclass
 class ThoughtNode:
-    id: int
-    player: str                 # "O" or "X" for the move that produced this node (ROOT for root)
-    r: Optional[int]            # row of move that led here (None for root)
-    c: Optional[int]            # col of move that led here (None for root)
-    reason: Optional[str]       # rationale attached to the edge into this node
-    score_after: int            # score of THIS state from O's perspective
-    depth: int
-    terminal: bool = False
-    outcome: Optional[str] = None   # "O", "X", "draw", or None
-    parent: Optional[int] = None
-    children: List[int] = field(default_factory=list)
+    """
+    Lightweight view of one node of a ThoughtTree; all data lives in the tree's columns.
+    Views are created on access (`tree.nodes[nid]`) and compare equal by (tree, id).
+    """
+    __slots__ = ("_tree", "id")
+
+    def __init__(self, tree: "ThoughtTree", node_id: int):
+        self._tree = tree
+        self.id = node_id
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ThoughtNode) and other._tree is self._tree and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash((id(self._tree), self.id))
+
+    def __repr__(self) -> str:
+        return (f"ThoughtNode(id={self.id}, player={self.player!r}, r={self.r}, c={self.c}, "
+                f"score_after={self.score_after}, depth={self.depth})")
+
+    def _flag(self, bit: int) -> bool:
+        return bool(self._tree._flags[self.id] & bit)
+
+    def _set_flag(self, bit: int, on: bool) -> None:
+        flags = self._tree._flags
+        flags[self.id] = flags[self.id] | bit if on else flags[self.id] & ~bit
+
+    @property
+    def player(self) -> str:            # "O" or "X" for the move that produced this node (ROOT for root)
+        return _PLAYERS[self._tree._flags[self.id] & _PLAYER_MASK]
+
+    @property
+    def r(self) -> Optional[int]:       # row of move that led here (None for root)
+        cell = self._tree._cell[self.id]
+        return None if cell < 0 else cell // 3
+
+    @property
+    def c(self) -> Optional[int]:       # col of move that led here (None for root)
+        cell = self._tree._cell[self.id]
+        return None if cell < 0 else cell % 3
+
+    @property
+    def reason(self) -> Optional[str]:  # rationale attached to the edge into this node
+        rid = self._tree._reason_id[self.id]
+        return None if rid < 0 else self._tree._reasons[rid]
+
+    @property
+    def score_after(self) -> int:       # score of THIS state from O's perspective
+        return self._tree._score[self.id]
+
+    @property
+    def depth(self) -> int:
+        return self._tree._depth[self.id]
+
+    @property
+    def parent(self) -> Optional[int]:
+        p = self._tree._parent[self.id]
+        return None if p < 0 else p
+
+    @property
+    def children(self) -> List[int]:
+        return list(self._tree.iter_children(self.id))
+
+    @property
+    def terminal(self) -> bool:
+        return self._flag(_TERMINAL)
+
+    @terminal.setter
+    def terminal(self, value: bool) -> None:
+        self._set_flag(_TERMINAL, value)
+
+    @property
+    def outcome(self) -> Optional[str]:  # "O", "X", "draw", or None
+        return OUTCOME_LABELS[(self._tree._flags[self.id] & _OUTCOME_MASK) >> _OUTCOME_SHIFT]
+
+    @outcome.setter
+    def outcome(self, value: Optional[str]) -> None:
+        flags = self._tree._flags
+        flags[self.id] = (flags[self.id] & ~_OUTCOME_MASK) | (_OUTCOME_CODE[value] << _OUTCOME_SHIFT)
+
+    @property
+    def cached(self) -> bool:            # score came from the transposition table
+        return self._flag(_CACHED)
+
+    @cached.setter
+    def cached(self, value: bool) -> None:
+        self._set_flag(_CACHED, value)
+
+    @property
+    def pruned(self) -> bool:            # skipped by alpha-beta, or added by a search cut short by its deadline
+        return self._flag(_PRUNED)
+
+    @pruned.setter
+    def pruned(self, value: bool) -> None:
+        self._set_flag(_PRUNED, value)
+
+    @property
+    def visits(self) -> int:             # MCTS visit count (0 for the other strategies)
+        return self._tree._visits[self.id]
+
+    @visits.setter
+    def visits(self, value: int) -> None:
+        self._tree._visits[self.id] = value
+
+
+class _NodesView(Mapping[int, ThoughtNode]):
+    """`tree.nodes`: read-only id -> ThoughtNode mapping over the tree's columns."""
+    __slots__ = ("_tree",)
+
+    def __init__(self, tree: "ThoughtTree"):
+        self._tree = tree
+
+    def __getitem__(self, node_id: int) -> ThoughtNode:
+        if not 0 <= node_id < len(self._tree._parent):
+            raise KeyError(node_id)
+        return ThoughtNode(self._tree, node_id)
+
+    def __len__(self) -> int:
+        return len(self._tree._parent)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._tree._parent)))
 
 
 class ThoughtTree:
     """
     Stores the full explored tree. Each node represents a STATE after a move.
     Edge data (move, reason) are stored on the child node (r, c, reason).
+
+    Nodes are rows of parallel arrays (parent, cell, score, depth, flags, visits, first child /
+    next sibling links) with reasons interned in a side table, so a node costs a few dozen bytes
+    and no Python objects; `nodes[nid]` returns a ThoughtNode view over one row.
+
+    An optional `listener(event, data)` sees search progress as it happens: "node" for every
+    node added (see `node_payload`), and whatever searches report through `emit` ("score" for
+    backed-up node values, "best" for a new best line at the root).
     """
     def __init__(self):
-        self._next_id = 0
-        self.nodes: Dict[int, ThoughtNode] = {}
+        self._parent = array("i")
+        self._cell = array("b")          # r * 3 + c of the move into the node, -1 for the root
+        self._score = array("h")
+        self._depth = array("H")
+        self._flags = array("B")
+        self._visits = array("I")
+        self._first_child = array("i")
+        self._last_child = array("i")
+        self._next_sibling = array("i")
+        self._reason_id = array("i")     # index into _reasons, -1 for no reason
+        self._reasons: List[str] = []
+        self._reason_index: Dict[str, int] = {}
+        self.nodes: Mapping[int, ThoughtNode] = _NodesView(self)
         self.root_id: Optional[int] = None
+        self.listener: Optional[Callable[[str, Dict[str, Any]], None]] = None
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    # Pickled as the columns and the reason table only (e.g. to encode in a worker process);
+    # the listener belongs to the request that attached it and is not carried along.
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        for derived in ("nodes", "listener", "_reason_index"):
+            del state[derived]
+        return state
 
-    def _new_id(self) -> int:
-        nid = self._next_id
-        self._next_id += 1
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reason_index = {reason: rid for rid, reason in enumerate(self._reasons)}
+        self.nodes = _NodesView(self)
+        self.listener = None
+
+    def _intern(self, reason: Optional[str]) -> int:
+        if reason is None:
+            return -1
+        rid = self._reason_index.get(reason)
+        if rid is None:
+            rid = self._reason_index[reason] = len(self._reasons)
+            self._reasons.append(reason)
+        return rid
+
+    def _append(self, parent: int, cell: int, player: str, reason: Optional[str], score_after: int,
+                depth: int, terminal: bool, outcome: Optional[str]) -> int:
+        nid = len(self._parent)
+        self._parent.append(parent)
+        self._cell.append(cell)
+        self._score.append(score_after)
+        self._depth.append(depth)
+        self._flags.append(_PLAYER_CODE[player] | (_TERMINAL if terminal else 0)
+                           | (_OUTCOME_CODE[outcome] << _OUTCOME_SHIFT))
+        self._visits.append(0)
+        self._first_child.append(-1)
+        self._last_child.append(-1)
+        self._next_sibling.append(-1)
+        self._reason_id.append(self._intern(reason))
         return nid
 
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        if self.listener is not None:
+            self.listener(event, data)
+
+    def node_payload(self, node_id: int) -> Dict[str, Any]:
+        node = self.nodes[node_id]
+        return {"id": node_id, "parent": node.parent, "player": node.player, "r": node.r, "c": node.c,
+                "reason": node.reason, "score": node.score_after, "terminal": node.terminal,
+                "outcome": node.outcome}
+
     def add_root(self, score_after: int) -> int:
-        nid = self._new_id()
-        self.nodes[nid] = ThoughtNode(
-            id=nid, player="ROOT", r=None, c=None, reason=None,
-            score_after=score_after, depth=0, terminal=False, outcome=None,
-            parent=None, children=[]
-        )
+        nid = self._append(-1, -1, "ROOT", None, score_after, 0, False, None)
         self.root_id = nid
+        if self.listener is not None:
+            self.listener("node", self.node_payload(nid))
         return nid
 
     def add_child(self, parent_id: int, player: str, r: int, c: int, reason: str, score_after: int,
                   terminal: bool, outcome: Optional[str]) -> int:
-        nid = self._new_id()
-        parent = self.nodes[parent_id]
-        node = ThoughtNode(
-            id=nid, player=player, r=r, c=c, reason=reason,
-            score_after=score_after, depth=parent.depth + 1,
-            terminal=terminal, outcome=outcome, parent=parent_id
-        )
-        self.nodes[nid] = node
-        parent.children.append(nid)
+        nid = self._append(parent_id, r * 3 + c, player, reason, score_after,
+                           self._depth[parent_id] + 1, terminal, outcome)
+        last = self._last_child[parent_id]
+        if last < 0:
+            self._first_child[parent_id] = nid
+        else:
+            self._next_sibling[last] = nid
+        self._last_child[parent_id] = nid
+        if self.listener is not None:
+            self.listener("node", self.node_payload(nid))
         return nid
 
-    # ----- visualization -----
+    def iter_children(self, node_id: int) -> Iterator[int]:
+        """Child ids of `node_id` in insertion order."""
+        cid = self._first_child[node_id]
+        while cid >= 0:
+            yield cid
+            cid = self._next_sibling[cid]
 
-    def pretty(self, node_id: Optional[int] = None, prefix: str = "") -> str:
-        if node_id is None:
-            node_id = self.root_id
-        if node_id is None:
-            return "<empty tree>"
+    def has_children(self, node_id: int) -> bool:
+        return self._first_child[node_id] >= 0
 
-        node = self.nodes[node_id]
+    def select(self, max_depth: Optional[int] = None, max_nodes: Optional[int] = None) -> List[int]:
+        """
+        Node ids breadth-first from the root, stopping below `max_depth` (relative to the root) or
+        after `max_nodes` ids. Every selected node's parent is selected before it.
+        """
+        if self.root_id is None:
+            return []
+        base = self._depth[self.root_id]
+        out: List[int] = []
+        frontier = [self.root_id]
+        while frontier and (max_nodes is None or len(out) < max_nodes):
+            if max_nodes is not None:
+                frontier = frontier[:max_nodes - len(out)]
+            out.extend(frontier)
+            if max_depth is not None and self._depth[frontier[0]] - base >= max_depth:
+                break
+            frontier = [cid for nid in frontier for cid in self.iter_children(nid)]
+        return out
+
+    def columns(self, ids: Optional[List[int]] = None) -> Dict[str, List[Any]]:
+        """
+        Column-wise copy of the nodes in `ids` (all nodes if None) as plain lists: id, parent,
+        cell (-1 for the root), player (index into "ROOT"/"X"/"O"), score, outcome (index into
+        OUTCOME_LABELS), marks (1 = transposition, 2 = pruned), visits and reason_idx (index into
+        "reasons", -1 for none). Parents outside `ids` are reported as -1.
+        """
+        if ids is None:
+            flags = self._flags.tolist()
+            reason_idx = self._reason_id.tolist()
+            reasons = list(self._reasons)
+            out = {
+                "id": list(range(len(self._parent))),
+                "parent": self._parent.tolist(),
+                "cell": self._cell.tolist(),
+                "score": self._score.tolist(),
+                "visits": self._visits.tolist(),
+            }
+        else:
+            flags = [self._flags[i] for i in ids]
+            kept = set(ids)
+            remap: Dict[int, int] = {}
+            reasons = []
+            reason_idx = []
+            for i in ids:
+                rid = self._reason_id[i]
+                if rid >= 0 and rid not in remap:
+                    remap[rid] = len(reasons)
+                    reasons.append(self._reasons[rid])
+                reason_idx.append(remap.get(rid, -1))
+            out = {
+                "id": list(ids),
+                "parent": [p if p in kept else -1 for p in (self._parent[i] for i in ids)],
+                "cell": [self._cell[i] for i in ids],
+                "score": [self._score[i] for i in ids],
+                "visits": [self._visits[i] for i in ids],
+            }
+        out["player"] = [f & _PLAYER_MASK for f in flags]
+        out["outcome"] = [(f & _OUTCOME_MASK) >> _OUTCOME_SHIFT for f in flags]
+        out["marks"] = [(1 if f & _CACHED else 0) | (2 if f & _PRUNED else 0) for f in flags]
+        out["reason_idx"] = reason_idx
+        out["reasons"] = reasons
+        return out
+
+    @classmethod
+    def from_columns(cls, cols: Mapping[str, List[Any]]) -> "ThoughtTree":
+        """Rebuild a tree from `columns()` of a whole tree (ids in order, parents before children)."""
+        tree = cls()
+        reasons = cols["reasons"]
+        rows = zip(cols["parent"], cols["cell"], cols["player"], cols["score"], cols["outcome"],
+                   cols["marks"], cols["visits"], cols["reason_idx"])
+        for parent, cell, player, score, outcome, marks, visits, rid in rows:
+            depth = 0 if parent < 0 else tree._depth[parent] + 1
+            label = OUTCOME_LABELS[outcome]
+            nid = tree._append(parent, cell, _PLAYERS[player], reasons[rid] if rid >= 0 else None, score,
+                               depth, label is not None, label)
+            tree._flags[nid] |= (_CACHED if marks & 1 else 0) | (_PRUNED if marks & 2 else 0)
+            tree._visits[nid] = visits
+            if parent < 0:
+                tree.root_id = nid
+                continue
+            last = tree._last_child[parent]
+            if last < 0:
+                tree._first_child[parent] = nid
+            else:
+                tree._next_sibling[last] = nid
+            tree._last_child[parent] = nid
+        return tree
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the node columns and the reason table."""
+        columns = (self._parent, self._cell, self._score, self._depth, self._flags, self._visits,
+                   self._first_child, self._last_child, self._next_sibling, self._reason_id)
+        return sum(col.itemsize * len(col) for col in columns) + sum(len(s) for s in self._reasons)
+
+    def subtree(self, node_id: int) -> "ThoughtTree":
+        """
+        Copy of the subtree under `node_id` as a new tree rooted there (ids renumbered, depths
+        re-based). Per-search annotations (transposition, pruned, visits) are cleared; the moves,
+        reasons and scores are kept so a later search can reuse them without new LLM calls.
+        """
+        out = ThoughtTree()
+        out.root_id = out.add_root(score_after=self._score[node_id])
+        keep = _PLAYER_MASK | _TERMINAL | _OUTCOME_MASK
+        stack = [(node_id, out.root_id)]
+        while stack:
+            old_id, new_id = stack.pop()
+            for cid in self.iter_children(old_id):
+                flags = self._flags[cid]
+                rid = self._reason_id[cid]
+                child = out._append(new_id, self._cell[cid], _PLAYERS[flags & _PLAYER_MASK],
+                                    None if rid < 0 else self._reasons[rid], self._score[cid],
+                                    out._depth[new_id] + 1, False, None)
+                out._flags[child] = flags & keep
+                last = out._last_child[new_id]
+                if last < 0:
+                    out._first_child[new_id] = child
+                else:
+                    out._next_sibling[last] = child
+                out._last_child[new_id] = child
+                stack.append((cid, child))
+        return out
+
+    # ----- visualization -----
+    # Writers are iterative (explicit stacks, no recursion) and yield chunks, so deep or wide trees
+    # can be streamed to a file or socket with `dump` without building one big string.
+
+    def _pretty_line(self, nid: int, prefix: str) -> str:
+        node = self.nodes[nid]
         move_str = "root" if node.r is None else f"{node.player}→({node.r},{node.c})"
         term_str = f"  [terminal:{node.outcome}]" if node.terminal else ""
-        line = f"{prefix}• (#{node.id}) {move_str} | score={node.score_after}{term_str}"
+        term_str += "  [transposition]" if node.cached else ""
+        term_str += "  [pruned]" if node.pruned else ""
+        term_str += f"  [visits={node.visits}]" if node.visits else ""
+        line = f"{prefix}• (#{nid}) {move_str} | score={node.score_after}{term_str}"
         if node.reason:
             line += f" — {node.reason}"
+        return line
 
-        lines = [line]
-        for i, cid in enumerate(node.children):
-            last = (i == len(node.children) - 1)
-            branch = "└─ " if last else "├─ "
-            child_prefix = prefix + ("   " if last else "│  ")
-            lines.append(self.pretty(cid, prefix + branch))
-            if len(self.nodes[cid].children) > 0:
-                sub = self._pretty_children(self.nodes[cid], child_prefix)
-                if sub:
-                    lines[-1] = lines[-1].split("\n", 1)[0]
-                    lines.append(sub)
-        return "\n".join(lines)
-
-    def _pretty_children(self, node: ThoughtNode, prefix: str) -> str:
-        lines = []
-        for i, cid in enumerate(node.children):
-            last = (i == len(node.children) - 1)
-            branch = "└─ " if last else "├─ "
-            child = self.nodes[cid]
-            move_str = f"{child.player}→({child.r},{child.c})"
-            term_str = f"  [terminal:{child.outcome}]" if child.terminal else ""
-            line = f"{prefix}{branch}• (#{child.id}) {move_str} | score={child.score_after}{term_str}"
-            if child.reason:
-                line += f" — {child.reason}"
-            lines.append(line)
-            if child.children:
-                sub_prefix = prefix + ("   " if last else "│  ")
-                lines.append(self._pretty_children(child, sub_prefix))
-        return "\n".join(lines)
+    def iter_pretty(self, node_id: Optional[int] = None, prefix: str = "") -> Iterator[str]:
+        """Lines of the ASCII tree (without newlines), depth-first in child order."""
+        if node_id is None:
+            node_id = self.root_id
+        if node_id is None:
+            yield "<empty tree>"
+            return
+        # (node id, prefix of its own line, prefix for its children)
+        stack = [(node_id, prefix, prefix)]
+        while stack:
+            nid, line_prefix, child_prefix = stack.pop()
+            yield self._pretty_line(nid, line_prefix)
+            children = list(self.iter_children(nid))
+            for i in range(len(children) - 1, -1, -1):
+                last = i == len(children) - 1
+                stack.append((children[i], child_prefix + ("└─ " if last else "├─ "),
+                              child_prefix + ("   " if last else "│  ")))
 
-    def to_dot(self) -> str:
+    def pretty(self, node_id: Optional[int] = None, prefix: str = "") -> str:
+        return "\n".join(self.iter_pretty(node_id, prefix))
+
+    def iter_dot(self) -> Iterator[str]:
+        """Lines of the Graphviz DOT rendering."""
         if self.root_id is None:
-            return "digraph G {}"
-        lines = ["digraph G {", '  node [shape=box, fontname="Helvetica"];']
+            yield "digraph G {}"
+            return
+        yield "digraph G {"
+        yield '  node [shape=box, fontname="Helvetica"];'
         for nid, n in self.nodes.items():
             label_move = "root" if n.r is None else f"{n.player}→({n.r},{n.c})"
             term = f"\\nterminal={n.outcome}" if n.terminal else ""
-            reason = f"\\nreason={n.reason.replace('\\"','\\\\\"')}" if n.reason else ""
-            lines.append(f'  n{nid} [label="#{nid} {label_move}\\nscore={n.score_after}{term}{reason}"];')
-        for nid, n in self.nodes.items():
-            for cid in n.children:
-                lines.append(f"  n{nid} -> n{cid};")
-        lines.append("}")
-        return "\n".join(lines)
+            escaped = n.reason.replace('\\"', '\\\\"') if n.reason else ""
+            reason = f"\\nreason={escaped}" if n.reason else ""
+            yield f'  n{nid} [label="#{nid} {label_move}\\nscore={n.score_after}{term}{reason}"];'
+        for nid in self.nodes:
+            for cid in self.iter_children(nid):
+                yield f"  n{nid} -> n{cid};"
+        yield "}"
+
+    def to_dot(self) -> str:
+        return "\n".join(self.iter_dot())
+
+    def iter_json(
+        self,
+        node_id: Optional[int] = None,
+        fields: Optional[Callable[[ThoughtNode], Dict[str, Any]]] = None,
+        include: Optional[Container[int]] = None,
+    ) -> Iterator[str]:
+        """
+        Nested JSON of the (sub)tree as text chunks: each node is `fields(node)` plus a "children"
+        array (null for leaves). The default fields are the node's own attributes. With `include`,
+        only children in it are written (see `select`).
+        """
+        if node_id is None:
+            node_id = self.root_id
+        if node_id is None:
+            yield "null"
+            return
+        if fields is None:
+            fields = _node_fields
+        stack: List[Any] = [node_id]   # node ids, or literal text to emit
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            head = json.dumps(fields(self.nodes[item]), ensure_ascii=False, separators=(",", ":"))
+            head = "{" if head == "{}" else head[:-1] + ","
+            children = [cid for cid in self.iter_children(item) if include is None or cid in include]
+            if not children:
+                yield head + '"children":null}'
+                continue
+            yield head + '"children":['
+            stack.append("]}")
+            for i in range(len(children) - 1, -1, -1):
+                stack.append(children[i])
+                if i:
+                    stack.append(",")
+
+    def dump(self, fp: TextIO, fmt: str = "pretty", chunk_size: int = 1 << 16) -> None:
+        """Stream the tree to a text file or socket wrapper as "pretty", "dot" or "json"."""
+        if fmt == "json":
+            chunks = self.iter_json()
+        elif fmt in ("pretty", "dot"):
+            lines = self.iter_pretty() if fmt == "pretty" else self.iter_dot()
+            chunks = (line + "\n" for line in lines)
+        else:
+            raise ValueError(f"Unknown tree format {fmt!r}; expected 'pretty', 'dot' or 'json'")
+        for chunk in buffered(chunks, chunk_size):
+            fp.write(chunk)
+
+
+def _node_fields(node: ThoughtNode) -> Dict[str, Any]:
+    return {
+        "id": node.id, "player": node.player, "r": node.r, "c": node.c, "reason": node.reason,
+        "score_after": node.score_after, "depth": node.depth, "terminal": node.terminal,
+        "outcome": node.outcome, "cached": node.cached, "pruned": node.pruned, "visits": node.visits,
+    }
+
+
+def buffered(chunks: Iterable[AnyStr], size: int = 1 << 16) -> Iterator[AnyStr]:
+    """Join small str (or bytes) chunks into pieces of roughly `size` characters (bytes)."""
+    parts: List[AnyStr] = []
+    n = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        n += len(chunk)
+        if n >= size:
+            yield parts[0][:0].join(parts)
+            parts, n = [], 0
+    if parts:
+        yield parts[0][:0].join(parts)
@@ -0,0 +1,261 @@
+"""
+Pluggable key/value store behind the process-local caches.
+
+The proposal cache and the transposition table keep a small in-process tier
+and read through / write through to a `CacheBackend`, so several worker
+processes on one host share what any of them has computed, and the shared
+tier survives restarts:
+
+- `SQLiteBackend`: one WAL-mode SQLite file, safe for concurrent readers and
+  writers in many processes (the default, see CACHE_BACKEND in config.py).
+  Searches call the backend from the event loop, so it never makes them wait
+  on a write: puts are queued for a writer thread that commits them in
+  batches, and point reads use their own connection, which in WAL mode does
+  not wait for writers.
+- `MemoryBackend`: a bounded dict, per process (tests, single-process runs)
+
+Values are bytes under (namespace, key); entries may carry a TTL and the
+store is bounded in size, oldest writes going first.
+"""
+from __future__ import annotations
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .config import CACHE_BACKEND, CACHE_MAX_ENTRIES
+
+_PRUNE_EVERY = 256  # puts between TTL/size sweeps
+_WRITE_BATCH = 256  # most puts committed in one transaction
+_WRITE_QUEUE = 10_000  # queued puts beyond this are dropped (it is a cache)
+
+
+class CacheBackend(ABC):
+    """Interface: a bounded (namespace, key) -> bytes store with optional per-entry TTL."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def put(self, namespace: str, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        ...
+
+    def stats(self) -> Dict[str, object]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """Process-local store (LRU-evicted)."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[float], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or (entry[0] is not None and entry[0] < time.time()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[1]
+
+    def put(self, namespace: str, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl_s if ttl_s is not None else None
+        with self._lock:
+            self._entries[(namespace, key)] = (expires_at, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": "memory", "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Store in one SQLite file shared by every process that opens it. Each process (re)connects
+    and starts its writer lazily, so a backend created before a fork is safe to use in the children.
+    """
+
+    def __init__(self, path: str, max_entries: int = CACHE_MAX_ENTRIES, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.busy_timeout_ms = busy_timeout_ms
+        self._reader: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._pid = 0
+        self._writes: "queue.Queue[Optional[Tuple[str, str, float, Optional[float], bytes]]]" = queue.Queue(_WRITE_QUEUE)
+        self._writer: Optional[threading.Thread] = None
+        # Queued rows by (namespace, key) until committed, so this process reads its own writes
+        self._pending: Dict[Tuple[str, str], Tuple[Optional[float], bytes]] = {}
+        self._pending_lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout_ms / 1000)
+        # Processes opening a new file together race to switch it to WAL and create the table; SQLite
+        # reports the loser as locked without waiting out the busy timeout, so retry within it
+        deadline = time.monotonic() + self.busy_timeout_ms / 1000
+        while True:
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                    "stored_at REAL NOT NULL, expires_at REAL, value BLOB NOT NULL, PRIMARY KEY (namespace, key))"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache(stored_at)")
+                db.commit()
+                return db
+            except sqlite3.OperationalError as e:
+                db.rollback()
+                if "locked" not in str(e) or time.monotonic() >= deadline:
+                    db.close()
+                    raise
+                time.sleep(0.01)
+
+    def _ensure_process(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._read_lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child inherits neither the parent's writer thread nor a usable connection
+            self._reader = self._connect()
+            self._writes = queue.Queue(_WRITE_QUEUE)
+            with self._pending_lock:
+                self._pending.clear()
+            self._writer = threading.Thread(target=self._write_loop, name="cache-writer", daemon=True)
+            self._writer.start()
+            self._pid = os.getpid()
+        atexit.register(self.close)
+
+    def _write_loop(self) -> None:
+        db = self._connect()
+        writes = self._writes
+        stop = False
+        while not stop:
+            rows: List[Tuple[str, str, float, Optional[float], bytes]] = []
+            row = writes.get()
+            while row is not None:
+                rows.append(row)
+                if len(rows) >= _WRITE_BATCH:
+                    break
+                try:
+                    row = writes.get_nowait()
+                except queue.Empty:
+                    break
+            stop = row is None
+            if rows:
+                try:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO cache (namespace, key, stored_at, expires_at, value) VALUES (?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    self._puts += len(rows)
+                    if self._puts // _PRUNE_EVERY != (self._puts - len(rows)) // _PRUNE_EVERY:
+                        self._prune(db)
+                    db.commit()
+                except sqlite3.Error as e:
+                    db.rollback()
+                    self.dropped += len(rows)
+                    print(f"[cache] dropped {len(rows)} write(s) to {self.path}: {e}")
+                with self._pending_lock:
+                    for ns, key, _, expires_at, value in rows:
+                        if self._pending.get((ns, key)) == (expires_at, value):
+                            del self._pending[(ns, key)]
+            for _ in range(len(rows) + stop):
+                writes.task_done()
+        db.close()
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        db.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        db.execute(
+            "DELETE FROM cache WHERE stored_at < (SELECT stored_at FROM cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries - 1,),
+        )
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        self._ensure_process()
+        now = time.time()
+        with self._pending_lock:
+            pending = self._pending.get((namespace, key))
+        if pending is not None and (pending[0] is None or pending[0] >= now):
+            self.hits += 1
+            return pending[1]
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (namespace, key, now),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, namespace: str, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        """Queue the write for the writer thread; never waits for the database."""
+        self._ensure_process()
+        now = time.time()
+        expires_at = now + ttl_s if ttl_s is not None else None
+        with self._pending_lock:
+            self._pending[(namespace, key)] = (expires_at, value)
+        try:
+            self._writes.put_nowait((namespace, key, now, expires_at, value))
+        except queue.Full:
+            with self._pending_lock:
+                self._pending.pop((namespace, key), None)
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Wait until every queued write is committed."""
+        if self._pid == os.getpid():
+            self._writes.join()
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": "sqlite", "path": self.path, "hits": self.hits, "misses": self.misses,
+                "queued": self._writes.qsize(), "dropped": self.dropped}
+
+    def close(self) -> None:
+        """Commit the queued writes and close this process's connections."""
+        with self._read_lock:
+            if self._pid != os.getpid():
+                return
+            self._writes.put(None)
+            self._writer.join()
+            self._reader.close()
+            self._reader, self._writer, self._pid = None, None, 0
+
+
+def open_backend(spec: str = CACHE_BACKEND) -> CacheBackend:
+    """Backend for a CACHE_BACKEND value: "memory" or "sqlite:<path>"."""
+    if spec == "memory":
+        return MemoryBackend()
+    if spec.startswith("sqlite:"):
+        return SQLiteBackend(spec[len("sqlite:"):])
+    raise ValueError(f"Unknown cache backend {spec!r}; expected 'memory' or 'sqlite:<path>'")
+
+
+# Process-wide backend used by the shared caches; the SQLite file is opened on first use
+SHARED_BACKEND = open_backend()
@@ -15,6 +15,27 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 VERBOSE = True  # master verbosity switch
 VERBOSE_PROPOSALS_MAX = 100  # print at most this many proposals per node
 SEARCH_MAX_DEPTH = 2  # configurable search depth
+TT_MAX_ENTRIES = 50_000  # shared transposition table size (LRU-evicted)
+SEARCH_MAX_CONCURRENCY = 4  # max in-flight LLM proposal calls per search
+BATCH_PROPOSALS_MAX_BOARDS = 16  # boards per batched proposal call (level-order search)
+MCTS_ITERATIONS = 64  # default MCTS budget (iterations, at most one LLM call each)
+MCTS_EXPLORATION = 1.4  # PUCT exploration constant
+MCTS_ROLLOUTS_PER_LEAF = 16  # random bitboard playouts per evaluated leaf
+MCTS_REPORT_EVERY = 8  # iterations between best-line checks when a tree listener is attached
+SESSION_MAX_ENTRIES = 1024  # games whose search tree is kept for the next move (see sessions.py)
+SESSION_TTL_S = 3600.0
+
+# Store shared by all worker processes on the host (see cache_backend.py): "sqlite:<path>", or
+# "memory" to keep everything per process. Backs the proposal cache and the transposition table.
+# Each package defaults to its own file, so the exercise skeleton never shares results with the solution.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite:" + os.path.join(".cache", f"{__package__}.sqlite"))
+CACHE_MAX_ENTRIES = 200_000
+
+# LLM proposal cache (see proposal_cache.py): in-process LRU in front of the shared backend
+PROPOSAL_CACHE_ENABLED = True
+PROPOSAL_CACHE_TTL_S = 7 * 24 * 3600.0
+PROPOSAL_CACHE_MEMORY_ENTRIES = 4096
+TT_SHARED_TTL_S = 7 * 24 * 3600.0  # shared-tier lifetime of transposition entries
 
 # Visualization config (optional consumers)
 RENDER_NX_EACH_AGENT_MOVE = False
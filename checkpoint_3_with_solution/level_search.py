@@ -0,0 +1,134 @@
+"""
+Level-synchronous (breadth-first) variant of the thought-tree search.
+
+Instead of one `create_thoughts` call per frontier node, every non-terminal
+node at a depth is sent to the LLM in one batched call; the proposals are
+scattered back into the ThoughtTree, beam-selected per node, and the scores
+are backed up bottom-up once the last level is expanded. Same contract as
+`find_best_path_with_tree`: scores are from O's perspective.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+from .config import OPENAI_MODEL, SEARCH_MAX_DEPTH, dbg
+from .game import TicTacToe
+from .llm import create_thoughts_batch
+from .ordering import HeuristicOrderer, MoveOrderer
+from .schemas import Move, PathStep
+from .search import (
+    FALLBACK_REASON,
+    _beam_select,
+    _evaluate_terminal,
+    _existing_children,
+    _probe_transposition,
+    _report_value,
+    _score_and_expand_children,
+    _store_transposition,
+    _uses_fallback,
+)
+from .transposition import TranspositionTable
+from .tree import ThoughtTree
+
+
+async def find_best_path_level_order(
+    game: TicTacToe,
+    to_move: str,  # "O" or "X"
+    tree: ThoughtTree,
+    parent_node_id: int,
+    model_name: str = OPENAI_MODEL,
+    api_key: Optional[str] = None,
+    beam_width: int = 2,
+    max_depth: int = SEARCH_MAX_DEPTH,
+    transpositions: Optional[TranspositionTable] = None,
+    orderer: Optional[MoveOrderer] = None,
+) -> Tuple[int, List[PathStep]]:
+    if orderer is None:
+        orderer = HeuristicOrderer()
+    # node_id -> (state, player to move, depth)
+    states: Dict[int, Tuple[TicTacToe, str, int]] = {parent_node_id: (game, to_move, 0)}
+    # node_id -> value backed up so far (leaves) and the step(s) below it
+    values: Dict[int, Tuple[int, List[PathStep]]] = {}
+    # node_id -> selected (move, score_after, child_id) in beam order
+    selected: Dict[int, List[Tuple[Move, int, int]]] = {}
+    levels: List[List[int]] = []
+
+    frontier = [parent_node_id]
+    for depth in range(max_depth + 1):
+        expandable: List[int] = []
+        for nid in frontier:
+            state, player, _ = states[nid]
+            node = tree.nodes[nid]
+            leaf = _evaluate_terminal(state, node)
+            if leaf is None and depth >= max_depth:
+                dbg(depth, f"  🪓 Depth cutoff at {max_depth} for #{nid}. Heuristic={node.score_after}")
+                leaf = (node.score_after, [])
+            if leaf is None:
+                leaf = _probe_transposition(state, node, player, depth, max_depth - depth, transpositions,
+                                            beam_width=beam_width, model_name=model_name)
+            if leaf is None and not state.available_positions():
+                leaf = (0, [])
+            if leaf is not None:
+                values[nid] = leaf
+            else:
+                expandable.append(nid)
+        if not expandable:
+            break
+        levels.append(expandable)
+
+        # Nodes expanded by an earlier search and forced positions are left out of the batch
+        reused: Dict[int, List[Tuple[Move, int, TicTacToe, int]]] = {}
+        proposals: Dict[str, List[Move]] = {}
+        for nid in expandable:
+            existing = _existing_children(states[nid][0], states[nid][1], tree, nid)
+            if existing is not None:
+                reused[nid] = existing
+                continue
+            forced = orderer.forced(states[nid][0], states[nid][1])
+            if forced:
+                proposals[str(nid)] = forced
+        ask = [nid for nid in expandable if nid not in reused and str(nid) not in proposals]
+        if ask:
+            dbg(depth, f"↳ Level {depth}: proposing for {len(ask)} node(s) in one batch "
+                       f"({len(proposals)} forced, {len(reused)} already expanded)")
+            proposals.update(await create_thoughts_batch(
+                [(str(nid), states[nid][0], states[nid][1]) for nid in ask],
+                model_name=model_name,
+                api_key=api_key,
+            ))
+
+        frontier = []
+        for nid in expandable:
+            state, player, _ = states[nid]
+            entries = reused.get(nid)
+            if entries is None:
+                moves = proposals.get(str(nid)) or []
+                if not moves:
+                    dbg(depth, f"  [fallback] Enumerating legal moves for #{nid}.")
+                    moves = [Move(row=r, col=c, reason=FALLBACK_REASON) for (r, c) in sorted(state.available_positions())]
+                moves = orderer.order(state, player, moves, depth)
+                entries = _score_and_expand_children(state, moves, player, tree, nid)
+            entries = _beam_select(entries, to_move=player, beam_width=beam_width)
+            nxt = 'X' if player == 'O' else 'O'
+            selected[nid] = [(m, s, child_id) for m, s, _, child_id in entries]
+            for _, _, next_state, child_id in entries:
+                states[child_id] = (next_state, nxt, depth + 1)
+                frontier.append(child_id)
+
+    # Back up bottom-up; ties keep the earlier child in beam order
+    for level in reversed(levels):
+        for nid in level:
+            state, player, depth = states[nid]
+            best: Optional[Tuple[int, List[PathStep]]] = None
+            for m, s, child_id in selected[nid]:
+                score_down, path_down = values[child_id]
+                if best is None or (player == 'O' and score_down > best[0]) or (player == 'X' and score_down < best[0]):
+                    step = PathStep(player=player, row=m.row, col=m.col, reason=m.reason, score_after=s)
+                    best = (score_down, [step] + path_down)
+            assert best is not None
+            values[nid] = best
+            _report_value(tree, nid, best[0], best[1])
+            if not _uses_fallback(tree, nid):
+                _store_transposition(state, player, max_depth - depth, best[0], best[1], transpositions,
+                                     beam_width=beam_width, model_name=model_name)
+
+    return values[parent_node_id]
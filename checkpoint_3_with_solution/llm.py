@@ -1,14 +1,28 @@
 from __future__ import annotations
+import asyncio
 import os
-from typing import List, Set, Tuple, Optional, cast
+from typing import Dict, List, Set, Tuple, Optional, cast
 from textwrap import dedent
 
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
 
-from .config import OPENAI_API_KEY, OPENAI_MODEL, VERBOSE, VERBOSE_PROPOSALS_MAX, dbg
+from checkpoint_2.clients import get_structured_llm
+from .config import (
+    BATCH_PROPOSALS_MAX_BOARDS,
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    PROPOSAL_CACHE_ENABLED,
+    VERBOSE,
+    VERBOSE_PROPOSALS_MAX,
+    dbg,
+)
 from .game import TicTacToe
-from .schemas import Move, MoveSet
+from .proposal_cache import SHARED_PROPOSAL_CACHE
+from .schemas import BatchMoveSet, Move, MoveSet
+from .singleflight import PROPOSAL_FLIGHTS, normalize_prompt
+
+# Bump whenever the prompt below changes so cached proposals are not reused
+PROMPT_VERSION = "v1"
 
 
 import os
@@ -16,17 +30,40 @@ from dotenv import load_dotenv
 
 load_dotenv()  # take environment variables from .env.
 
+
+def _legal_unique(moves: List[Move], available_positions: Set[Tuple[int, int]]) -> List[Move]:
+    """Drop illegal and repeated positions, keeping the model's order."""
+    legal_moves = [m for m in moves if (m.row, m.col) in available_positions]
+    seen = set()
+    unique: List[Move] = []
+    for m in legal_moves[: VERBOSE_PROPOSALS_MAX]:
+        k = (m.row, m.col)
+        if k not in seen:
+            seen.add(k)
+            unique.append(m)
+    return unique
+
+
 async def create_thoughts(
     game: TicTacToe,
     available_positions: Set[Tuple[int, int]],
     player: str,  # "O" (agent) or "X" (user)
     model_name: str = OPENAI_MODEL,
     api_key: Optional[str] = None,
+    use_cache: bool = PROPOSAL_CACHE_ENABLED,
 ) -> List[Move]:
     """
     Use the LLM to propose candidate moves for `player`.
     Returns a list[Move] ordered by the model's priority (best-first).
+    Results are cached per canonical position when `available_positions` is the full legal set.
     """
+    cacheable = use_cache and set(available_positions) == game.available_positions()
+    if cacheable:
+        cached = SHARED_PROPOSAL_CACHE.get(game, player, model_name, PROMPT_VERSION)
+        if cached is not None:
+            dbg(0, f"[LLM] Cache hit: {len(cached)} moves for {player}.")
+            return cached
+
     board_str = ""
     for i, row in enumerate(game.board):
         board_str += f"Row {i}: {' '.join(row)}\n"
@@ -63,24 +100,105 @@ async def create_thoughts(
         dbg(0, "[LLM] No API key; returning empty proposal list.")
         return []
 
-    llm = ChatOpenAI(model=model_name, api_key=key)
-    structured_llm = llm.with_structured_output(MoveSet)
+    structured_llm = get_structured_llm(model_name, key, MoveSet)
 
-    response = cast(MoveSet, await structured_llm.ainvoke([HumanMessage(content=prompt)]))
+    # Identical prompts already in flight (e.g. concurrent requests on one opening) share one call
+    response = cast(MoveSet, await PROPOSAL_FLIGHTS.do(
+        (model_name, normalize_prompt(prompt)),
+        lambda: structured_llm.ainvoke([HumanMessage(content=prompt)]),
+    ))
     if VERBOSE:
         dbg(0, f"[LLM] Proposed {len(response.moves)} moves for {player} (pre-filter).")
 
-    # Filter out any illegal positions, just in case
-    legal_moves = [m for m in response.moves if (m.row, m.col) in available_positions]
-    # Deduplicate while keeping order
-    seen = set()
-    unique: List[Move] = []
-    for m in legal_moves[: VERBOSE_PROPOSALS_MAX]:
-        k = (m.row, m.col)
-        if k not in seen:
-            seen.add(k)
-            unique.append(m)
+    # Filter out any illegal positions and duplicates, just in case
+    unique = _legal_unique(response.moves, available_positions)
 
     if VERBOSE:
         dbg(0, f"[LLM] Using {len(unique)} legal & unique moves for {player}.")
+    if cacheable and unique:
+        SHARED_PROPOSAL_CACHE.put(game, player, model_name, PROMPT_VERSION, unique)
     return unique
+
+
+async def _propose_batch(
+    boards: List[Tuple[str, TicTacToe, str]],
+    model_name: str,
+    key: str,
+) -> Dict[str, List[Move]]:
+    sections = []
+    for board_id, game, player in boards:
+        rows = "\n".join(f"Row {i}: {' '.join(row)}" for i, row in enumerate(game.board))
+        avail = ", ".join(f"({r},{c})" for r, c in sorted(game.available_positions())) or "none"
+        sections.append(f"Board {board_id} (player {player} to move):\n{rows}\nLegal (available) positions: {avail}")
+    boards_str = "\n\n".join(sections)
+
+    prompt = dedent("""
+        You are playing tic-tac-toe. For EACH board below, propose candidate moves for the player to move.
+
+        {boards}
+
+        For every board, produce a list of distinct candidate moves that are legal (must exist in that board's available set).
+        Return JSON only in this exact shape, with one entry per board id:
+        {{
+          "boards": [
+            {{"board_id": "id", "moves": [{{"row": int, "col": int, "reason": "brief justification"}}, ...]}},
+            ...
+          ]
+        }}
+
+        Guidelines (per board):
+        - If there is an immediate winning move for the player to move, include it first.
+        - Else, include any necessary blocks against the opponent's immediate win.
+        - Otherwise, include strong strategic moves (center, forks, corners, edges).
+        - Do not repeat positions; keep each list concise and ordered (best-first).
+    """).strip().format(boards=boards_str)
+
+    structured_llm = get_structured_llm(model_name, key, BatchMoveSet)
+    response = cast(BatchMoveSet, await PROPOSAL_FLIGHTS.do(
+        (model_name, normalize_prompt(prompt)),
+        lambda: structured_llm.ainvoke([HumanMessage(content=prompt)]),
+    ))
+    return {b.board_id: b.moves for b in response.boards}
+
+
+async def create_thoughts_batch(
+    boards: List[Tuple[str, TicTacToe, str]],  # (board_id, game, player to move)
+    model_name: str = OPENAI_MODEL,
+    api_key: Optional[str] = None,
+    use_cache: bool = PROPOSAL_CACHE_ENABLED,
+) -> Dict[str, List[Move]]:
+    """
+    Propose candidate moves for many boards with one structured-output call per
+    BATCH_PROPOSALS_MAX_BOARDS boards. Returns board_id -> list[Move] (best-first);
+    boards the model skipped map to an empty list so callers can fall back.
+    """
+    result: Dict[str, List[Move]] = {board_id: [] for board_id, _, _ in boards}
+    pending: List[Tuple[str, TicTacToe, str]] = []
+    for board_id, game, player in boards:
+        cached = SHARED_PROPOSAL_CACHE.get(game, player, model_name, PROMPT_VERSION) if use_cache else None
+        if cached is not None:
+            result[board_id] = cached
+        else:
+            pending.append((board_id, game, player))
+    dbg(0, f"[LLM] Batch: {len(boards) - len(pending)} cached, {len(pending)} to propose.")
+    if not pending:
+        return result
+
+    key = api_key or OPENAI_API_KEY or os.environ.get("OPENAI_API_KEY")
+    if not key:
+        dbg(0, "[LLM] No API key; returning empty proposal lists.")
+        return result
+
+    chunks = [pending[i:i + BATCH_PROPOSALS_MAX_BOARDS] for i in range(0, len(pending), BATCH_PROPOSALS_MAX_BOARDS)]
+    responses = await asyncio.gather(*(_propose_batch(chunk, model_name, key) for chunk in chunks))
+    by_id = {board_id: (game, player) for board_id, game, player in pending}
+    for proposed in responses:
+        for board_id, moves in proposed.items():
+            if board_id not in by_id:
+                continue
+            game, player = by_id[board_id]
+            unique = _legal_unique(moves, game.available_positions())
+            result[board_id] = unique
+            if use_cache and unique:
+                SHARED_PROPOSAL_CACHE.put(game, player, model_name, PROMPT_VERSION, unique)
+    return result
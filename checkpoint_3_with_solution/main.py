@@ -3,15 +3,26 @@ import argparse
 
 from checkpoint_3.config import SEARCH_MAX_DEPTH
 from checkpoint_3.play import play_interactive
+from checkpoint_3.strategies import DEFAULT_STRATEGY, SEARCH_STRATEGIES
 
 
 def main():
     parser = argparse.ArgumentParser(description="Tic-Tac-Toe with Thought Tree (modular)")
     parser.add_argument("--beam", type=int, default=2, help="Beam width for search (default: 2)")
     parser.add_argument("--depth", type=int, default=SEARCH_MAX_DEPTH, help="Max search depth (default: from config)")
+    parser.add_argument("--engine", choices=["tot", "solve"], default="tot",
+                        help="Search engine: LLM tree-of-thought or exact solver (default: tot)")
+    parser.add_argument("--strategy", choices=sorted(SEARCH_STRATEGIES), default=DEFAULT_STRATEGY,
+                        help="ToT search strategy: 'beam' (per-node LLM calls), 'level' (one batched call per depth) "
+                             "or 'mcts' (Monte Carlo tree search with LLM priors)")
+    parser.add_argument("--deadline-ms", type=int, default=None,
+                        help="Wall-clock budget per agent move; deepens iteratively and plays the deepest finished search")
+    parser.add_argument("--iterations", type=int, default=None,
+                        help="MCTS iteration budget (at most one LLM call each); combine with --deadline-ms for a time cap")
     args = parser.parse_args()
 
-    play_interactive(beam_width=args.beam, max_depth=args.depth)
+    play_interactive(beam_width=args.beam, max_depth=args.depth, engine=args.engine, strategy=args.strategy,
+                     deadline_s=args.deadline_ms / 1000.0 if args.deadline_ms else None, iterations=args.iterations)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""
+Move ordering for the thought-tree search.
+
+A `MoveOrderer` sits in front of the LLM: `forced()` answers positions with
+no real choice (immediate win, a block, the last empty cell) without an LLM
+call, and `order()` ranks proposals so beam ties and the
+alpha-beta visiting order favour the strongest moves. The base class is a
+no-op (LLM order, always ask the LLM); `HeuristicOrderer` is the default.
+"""
+from __future__ import annotations
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Optional, Tuple
+
+from .game import FULL_MASK, WIN_TABLE, TicTacToe
+from .positions import CELLS, O_CODE, SCORE_O, SCORE_X, X_CODE
+from .schemas import Move
+
+
+def _sides(game: TicTacToe, to_move: str) -> Tuple[int, int]:
+    return (game.x, game.o) if to_move == 'X' else (game.o, game.x)
+
+
+def winning_cells(me: int, opp: int) -> List[int]:
+    """Empty cells that complete a line for `me`."""
+    return [cell for cell in CELLS[FULL_MASK & ~(me | opp)] if WIN_TABLE[me | (1 << cell)]]
+
+
+def _move(cell: int, reason: str) -> Move:
+    r, c = divmod(cell, 3)
+    return Move(row=r, col=c, reason=reason)
+
+
+class MoveOrderer:
+    """No-op orderer: keeps the LLM's order and never skips the LLM."""
+
+    def forced(self, game: TicTacToe, to_move: str) -> Optional[List[Move]]:
+        return None
+
+    def order(self, game: TicTacToe, to_move: str, moves: List[Move], depth: int) -> List[Move]:
+        return moves
+
+    def record_cutoff(self, to_move: str, move: Tuple[int, int], depth: int, remaining: int) -> None:
+        pass
+
+    def record_best(self, to_move: str, move: Tuple[int, int], depth: int, remaining: int) -> None:
+        pass
+
+
+class HeuristicOrderer(MoveOrderer):
+    """
+    Ranks moves by a 2-ply exact check (wins, blocks, blunders, forks), then history/killer
+    statistics gathered during the search, then the one-ply heuristic from the position table.
+    """
+
+    def __init__(self):
+        self.history: DefaultDict[Tuple[str, int], int] = defaultdict(int)
+        self.killers: Dict[int, List[int]] = {}
+
+    def forced(self, game: TicTacToe, to_move: str) -> Optional[List[Move]]:
+        me, opp = _sides(game, to_move)
+        empty = FULL_MASK & ~(me | opp)
+        if not empty:
+            return None
+        wins = winning_cells(me, opp)
+        if wins:
+            return [_move(wins[0], "forced: immediate win")]
+        threats = winning_cells(opp, me)
+        if len(threats) == 1:
+            return [_move(threats[0], "forced: only block against an immediate loss")]
+        if len(threats) > 1:
+            # Lost either way; blocking one threat is all that is left to consider
+            return [_move(cell, "forced: block (opponent has several threats)") for cell in threats]
+        if len(CELLS[empty]) == 1:
+            return [_move(CELLS[empty][0], "forced: last empty cell")]
+        return None
+
+    def _lookahead(self, me: int, opp: int, cell: int) -> int:
+        after = me | (1 << cell)
+        if WIN_TABLE[after]:
+            return 3
+        if winning_cells(opp, after):
+            return -1        # hands the opponent an immediate win
+        if len(winning_cells(after, opp)) >= 2:
+            return 2         # fork
+        if WIN_TABLE[opp | (1 << cell)]:
+            return 1         # blocks
+        return 0
+
+    def order(self, game: TicTacToe, to_move: str, moves: List[Move], depth: int) -> List[Move]:
+        me, opp = _sides(game, to_move)
+        killers = self.killers.get(depth, [])
+        table = SCORE_O if to_move == 'O' else SCORE_X
+
+        def key(m: Move) -> Tuple[int, int, int, int]:
+            cell = m.row * 3 + m.col
+            nx, no = (game.x | (1 << cell), game.o) if to_move == 'X' else (game.x, game.o | (1 << cell))
+            return (
+                self._lookahead(me, opp, cell),
+                cell in killers,
+                self.history[(to_move, cell)],
+                table[X_CODE[nx] + O_CODE[no]],
+            )
+
+        return sorted(moves, key=key, reverse=True)  # stable: LLM order breaks remaining ties
+
+    def record_cutoff(self, to_move: str, move: Tuple[int, int], depth: int, remaining: int) -> None:
+        """`move` (row, col) refuted its siblings at ply `depth` with `remaining` plies searched below."""
+        cell = move[0] * 3 + move[1]
+        killers = self.killers.setdefault(depth, [])
+        if cell not in killers:
+            killers.insert(0, cell)
+            del killers[2:]
+        self.history[(to_move, cell)] += remaining * remaining
+
+    def record_best(self, to_move: str, move: Tuple[int, int], depth: int, remaining: int) -> None:
+        self.history[(to_move, move[0] * 3 + move[1])] += remaining
@@ -0,0 +1,110 @@
+"""
+Precomputed table over all 3^9 board encodings.
+
+A board is encoded base-3 with cell i contributing 3**i * (0 empty, 1 X, 2 O).
+For every encoding the table holds the heuristic score from both players'
+perspectives, the terminal status and the legal-move mask, so scoring and
+terminal checks during search are a single array index.
+"""
+from __future__ import annotations
+from array import array
+from typing import Optional, Tuple
+
+from .game import FULL_MASK, LINE_MASKS, WIN_TABLE, TicTacToe
+
+N_POSITIONS = 3 ** 9
+
+# Terminal status codes
+ONGOING = 0
+X_WINS = 1
+O_WINS = 2
+DRAW = 3
+OUTCOME_LABELS: Tuple[Optional[str], ...] = (None, "X", "O", "draw")
+
+CENTER_MASK = 0b000_010_000
+CORNER_MASK = 0b101_000_101
+EDGE_MASK = 0b010_101_010
+
+
+def score_masks(agent_mask: int, opp_mask: int) -> int:
+    """
+    Heuristic score on raw bitboards: `agent_mask` / `opp_mask` are the 9-bit
+    cell sets of the scoring player and the opponent.
+    """
+    # Terminal dominance
+    if WIN_TABLE[agent_mask]:
+        return 100
+    if WIN_TABLE[opp_mask]:
+        return -100
+
+    # Center / corners / edges
+    score = 3 * (bool(agent_mask & CENTER_MASK) - bool(opp_mask & CENTER_MASK))
+    score += 2 * ((agent_mask & CORNER_MASK).bit_count() - (opp_mask & CORNER_MASK).bit_count())
+    score += (agent_mask & EDGE_MASK).bit_count() - (opp_mask & EDGE_MASK).bit_count()
+
+    # Immediate threats (two-in-a-row with one empty)
+    for line in LINE_MASKS:
+        a = (agent_mask & line).bit_count()
+        o = (opp_mask & line).bit_count()
+        if a == 2 and o == 0:
+            score += 5
+        elif o == 2 and a == 0:
+            score -= 6
+
+    return score
+
+
+def _digit_codes(digit: int) -> Tuple[int, ...]:
+    return tuple(
+        sum(digit * 3 ** i for i in range(9) if mask >> i & 1)
+        for mask in range(FULL_MASK + 1)
+    )
+
+
+# Base-3 contribution of each 9-bit mask: index = X_CODE[x] + O_CODE[o]
+X_CODE = _digit_codes(1)
+O_CODE = _digit_codes(2)
+
+# Cell indices (0..8) set in each 9-bit mask, ascending
+CELLS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(i for i in range(9) if mask >> i & 1) for mask in range(FULL_MASK + 1)
+)
+
+SCORE_O = array("b", bytes(N_POSITIONS))
+SCORE_X = array("b", bytes(N_POSITIONS))
+STATUS = array("B", bytes(N_POSITIONS))
+LEGAL = array("H", [0]) * N_POSITIONS
+
+
+def _build() -> None:
+    for x in range(FULL_MASK + 1):
+        free = FULL_MASK & ~x
+        o = free
+        while True:
+            idx = X_CODE[x] + O_CODE[o]
+            SCORE_O[idx] = score_masks(o, x)
+            SCORE_X[idx] = score_masks(x, o)
+            # O is checked first, matching the search's terminal evaluation order
+            if WIN_TABLE[o]:
+                STATUS[idx] = O_WINS
+            elif WIN_TABLE[x]:
+                STATUS[idx] = X_WINS
+            elif x | o == FULL_MASK:
+                STATUS[idx] = DRAW
+            LEGAL[idx] = free & ~o
+            if o == 0:
+                break
+            o = (o - 1) & free
+
+
+_build()
+
+
+def position_index(game: TicTacToe) -> int:
+    """Base-3 encoding of `game`, used to index the tables above."""
+    return X_CODE[game.x] + O_CODE[game.o]
+
+
+def outcome_of(game: TicTacToe) -> Optional[str]:
+    """"O", "X", "draw", or None if the game is still in progress."""
+    return OUTCOME_LABELS[STATUS[X_CODE[game.x] + O_CODE[game.o]]]
@@ -0,0 +1,107 @@
+"""
+Two-tier cache of LLM move proposals.
+
+Keyed by (model, prompt version, player, canonical board): proposals are
+stored on the canonical board and mapped back through the board symmetry on
+hit, including "(r,c)" mentions inside the reasons. An in-memory LRU sits in
+front of the shared cache backend (cache_backend.py), so proposals fetched by
+any worker process on the host, or before a restart, are reused; both tiers
+expire entries after a TTL and are bounded in size.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache_backend import SHARED_BACKEND, CacheBackend
+from .config import PROPOSAL_CACHE_MEMORY_ENTRIES, PROPOSAL_CACHE_TTL_S
+from .game import TicTacToe
+from .schemas import Move, MoveSet
+from .symmetry import canonical_index, from_canonical, remap_coords, to_canonical
+
+_NAMESPACE = "proposals"
+
+
+def _remap(moves: List[Move], fn: Callable[[int, int], Tuple[int, int]]) -> List[Move]:
+    out = []
+    for m in moves:
+        r, c = fn(m.row, m.col)
+        out.append(Move(row=r, col=c, reason=remap_coords(m.reason, fn)))
+    return out
+
+
+class ProposalCache:
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl_s: float = PROPOSAL_CACHE_TTL_S,
+        memory_entries: int = PROPOSAL_CACHE_MEMORY_ENTRIES,
+    ):
+        self.backend = backend  # None keeps the cache in this process only
+        self.ttl_s = ttl_s
+        self.memory_entries = memory_entries
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, stored_at: float, value: str) -> None:
+        self._mem[key] = (stored_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+
+    # ----- public API -----
+
+    @staticmethod
+    def _key(game: TicTacToe, player: str, model_name: str, prompt_version: str) -> Tuple[str, int]:
+        idx, sym = canonical_index(game.x, game.o)
+        return f"{model_name}|{prompt_version}|{player}|{idx}", sym
+
+    def get(self, game: TicTacToe, player: str, model_name: str, prompt_version: str) -> Optional[List[Move]]:
+        key, sym = self._key(game, player, model_name, prompt_version)
+        now = time.time()
+        with self._lock:
+            value = None
+            entry = self._mem.get(key)
+            if entry is not None and entry[0] >= now - self.ttl_s:
+                self._mem.move_to_end(key)
+                value = entry[1]
+                self.memory_hits += 1
+            else:
+                self._mem.pop(key, None)
+        if value is None:
+            # Another worker (or an earlier run) may have asked the LLM already
+            shared = self.backend.get(_NAMESPACE, key) if self.backend is not None else None
+            with self._lock:
+                if shared is None:
+                    self.misses += 1
+                    return None
+                value = shared.decode()
+                # The shared TTL decides freshness; keep the copy for at most one more TTL here
+                self._remember(key, now, value)
+                self.shared_hits += 1
+        moves = MoveSet.model_validate_json(value).moves
+        return _remap(moves, lambda r, c: from_canonical(sym, r, c))
+
+    def put(self, game: TicTacToe, player: str, model_name: str, prompt_version: str, moves: List[Move]) -> None:
+        key, sym = self._key(game, player, model_name, prompt_version)
+        value = MoveSet(moves=_remap(moves, lambda r, c: to_canonical(sym, r, c))).model_dump_json()
+        with self._lock:
+            self._remember(key, time.time(), value)
+        if self.backend is not None:
+            self.backend.put(_NAMESPACE, key, value.encode(), ttl_s=self.ttl_s)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_entries": len(self._mem),
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+        }
+
+
+# Process-wide cache used by create_thoughts, backed by the store shared with other workers
+SHARED_PROPOSAL_CACHE = ProposalCache(backend=SHARED_BACKEND)
@@ -13,6 +13,15 @@ class MoveSet(BaseModel):
     moves: List[Move] = Field(description="Candidate moves in priority order")
 
 
+class BoardMoveSet(BaseModel):
+    board_id: str = Field(description="Id of the board these moves are for")
+    moves: List[Move] = Field(description="Candidate moves in priority order")
+
+
+class BatchMoveSet(BaseModel):
+    boards: List[BoardMoveSet] = Field(description="One entry per requested board")
+
+
 class PathStep(BaseModel):
     player: str
     row: int
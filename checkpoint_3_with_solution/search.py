@@ -1,10 +1,13 @@
 from __future__ import annotations
+import asyncio
 from typing import List, Optional, Tuple, cast
 
-from .config import SEARCH_MAX_DEPTH, OPENAI_MODEL, dbg
+from .config import SEARCH_MAX_CONCURRENCY, SEARCH_MAX_DEPTH, OPENAI_MODEL, dbg
 from .game import TicTacToe
 from .schemas import Move, PathStep
-from .scoring import simple_score_state
+from .positions import DRAW, O_WINS, OUTCOME_LABELS, O_CODE, SCORE_O, STATUS, X_CODE, X_WINS
+from .ordering import HeuristicOrderer, MoveOrderer
+from .transposition import EXACT, LOWER, UPPER, TranspositionTable
 from .tree import ThoughtTree
 from .llm import create_thoughts
 
@@ -18,17 +21,18 @@ def _evaluate_terminal(game: TicTacToe, node) -> Optional[Tuple[int, List[PathSt
     If the current game state is terminal, mark the node and return the score (from O's perspective).
     Otherwise return None.
     """
-    if game.is_win('O'):
+    status = STATUS[X_CODE[game.x] + O_CODE[game.o]]
+    if status == O_WINS:
         node.terminal = True
         node.outcome = "O"
         dbg(0, f"  ⛳ Terminal: O wins here.")
         return 100, []
-    if game.is_win('X'):
+    if status == X_WINS:
         node.terminal = True
         node.outcome = "X"
         dbg(0, f"  ⛔ Terminal: X wins here.")
         return -100, []
-    if game.is_draw():
+    if status == DRAW:
         node.terminal = True
         node.outcome = "draw"
         dbg(0, f"  ⏹️ Terminal: draw.")
@@ -46,20 +50,133 @@ def _depth_cutoff(depth: int, max_depth: int, node_score_after: int) -> Optional
     return None
 
 
+# Reason of the moves enumerated when the LLM proposes nothing (no API key, outage, no legal moves)
+FALLBACK_REASON = "fallback: legal move"
+
+
+def _probe_transposition(
+    game: TicTacToe,
+    node,
+    to_move: str,
+    depth: int,
+    remaining: int,
+    transpositions: Optional[TranspositionTable],
+    alpha: float = float("-inf"),
+    beta: float = float("inf"),
+    beam_width: int = 2,
+    model_name: str = OPENAI_MODEL,
+) -> Optional[Tuple[int, List[PathStep]]]:
+    """
+    If this position (or a symmetric one) was already searched at least `remaining` plies deep
+    with the same beam width and model (and the stored score decides the (alpha, beta) window),
+    mark the node as cached and return the stored score with its best move. Otherwise None.
+    The root (depth 0) is never answered from the table: every search expands it, so the table
+    only cuts off subtrees and repeated positions still get a tree of candidate moves.
+    """
+    if transpositions is None or depth == 0:
+        return None
+    hit = transpositions.probe(game, to_move, remaining, alpha=alpha, beta=beta,
+                               beam_width=beam_width, model_name=model_name)
+    if hit is None:
+        return None
+    node.cached = True
+    dbg(depth, f"  ♻️ Transposition hit (searched depth={hit.depth}). Returning score={hit.score}")
+    if hit.move is None:
+        return hit.score, []
+    r, c = hit.move
+    after = game.apply_move(r, c, to_move)
+    step = PathStep(player=to_move, row=r, col=c, reason=hit.reason, score_after=SCORE_O[X_CODE[after.x] + O_CODE[after.o]])
+    return hit.score, [step]
+
+
+def _store_transposition(
+    game: TicTacToe,
+    to_move: str,
+    remaining: int,
+    score: int,
+    path: List[PathStep],
+    transpositions: Optional[TranspositionTable],
+    alpha: float = float("-inf"),
+    beta: float = float("inf"),
+    beam_width: int = 2,
+    model_name: str = OPENAI_MODEL,
+) -> None:
+    """
+    Record the backed-up score and first move of `path` for this position. A score at or
+    outside the (alpha, beta) window it was searched with is stored as a bound.
+    """
+    if transpositions is None:
+        return
+    first = path[0] if path else None
+    transpositions.store(
+        game,
+        to_move,
+        depth=remaining,
+        score=score,
+        move=(first.row, first.col) if first else None,
+        reason=first.reason if first else "",
+        flag=UPPER if score <= alpha else (LOWER if score >= beta else EXACT),
+        beam_width=beam_width,
+        model_name=model_name,
+    )
+
+
+def _uses_fallback(tree: ThoughtTree, node_id: int) -> bool:
+    """
+    Whether any node expanded below `node_id` got enumerated moves instead of LLM proposals.
+    Such results say nothing about the model and are kept out of the transposition table.
+    """
+    stack = [node_id]
+    while stack:
+        for cid in tree.iter_children(stack.pop()):
+            if tree.nodes[cid].reason == FALLBACK_REASON:
+                return True
+            stack.append(cid)
+    return False
+
+
+def _report_value(tree: ThoughtTree, node_id: int, score: int, path: List[PathStep]) -> None:
+    """
+    Tell the tree's listener (if any) the backed-up score of a searched node, and the best line
+    when the node is the root.
+    """
+    if tree.listener is None:
+        return
+    tree.emit("score", {"id": node_id, "score": score})
+    if node_id == tree.root_id:
+        tree.emit("best", {"score": score, "path": [step.model_dump() for step in path]})
+
+
 async def _fetch_proposals(
     game: TicTacToe,
     legal: List[Tuple[int, int]],
     to_move: str,
     model_name: str,
     api_key: Optional[str],
+    limiter: Optional[asyncio.Semaphore] = None,
+    orderer: Optional[MoveOrderer] = None,
+    depth: int = 0,
 ) -> List[Move]:
     """
     Ask the LLM for candidate moves; if none, fall back to enumerating legal moves.
+    `limiter` bounds how many proposal calls are in flight at once. `orderer` (optional)
+    answers forced positions without an LLM call and ranks the proposals it gets back.
     """
-    proposals: List[Move] = await create_thoughts(game, legal, player=to_move, model_name=model_name, api_key=api_key)
+    if orderer is not None:
+        forced = orderer.forced(game, to_move)
+        if forced:
+            dbg(depth, f"  🎯 Forced position: {forced[0].reason} (no LLM call).")
+            return forced
+    if limiter is None:
+        proposals: List[Move] = await create_thoughts(game, legal, player=to_move, model_name=model_name, api_key=api_key)
+    else:
+        async with limiter:
+            proposals = await create_thoughts(game, legal, player=to_move, model_name=model_name, api_key=api_key)
     if not proposals:
         dbg(0, f"  [fallback] Enumerating {len(legal)} legal moves.")
-        proposals = [Move(row=r, col=c, reason="fallback: legal move") for (r, c) in sorted(legal)]
+        proposals = [Move(row=r, col=c, reason=FALLBACK_REASON) for (r, c) in sorted(legal)]
+    if orderer is not None:
+        proposals = orderer.order(game, to_move, proposals, depth)
     return proposals
 
 
@@ -77,13 +194,10 @@ def _score_and_expand_children(
     entries: List[tuple[Move, int, TicTacToe, int]] = []
     for m in proposals:
         next_state = game.apply_move(m.row, m.col, to_move)
-        s = simple_score_state(next_state.board, agent="O")
-        terminal = next_state.is_win('O') or next_state.is_win('X') or next_state.is_draw()
-        outcome = (
-            "O" if next_state.is_win('O')
-            else ("X" if next_state.is_win('X')
-                  else ("draw" if next_state.is_draw() else None))
-        )
+        idx = X_CODE[next_state.x] + O_CODE[next_state.o]
+        s = SCORE_O[idx]
+        outcome = OUTCOME_LABELS[STATUS[idx]]
+        terminal = outcome is not None
         child_id = tree.add_child(
             parent_node_id,
             player=to_move,
@@ -98,6 +212,29 @@ def _score_and_expand_children(
     return entries
 
 
+def _existing_children(
+    game: TicTacToe,
+    to_move: str,
+    tree: ThoughtTree,
+    parent_node_id: int,
+) -> Optional[List[tuple[Move, int, TicTacToe, int]]]:
+    """
+    If an earlier search already expanded this node (a tree reused from the previous move, or an
+    earlier deepening iteration), return its children as (move, score, next_state, child_id)
+    entries, with their per-search flags cleared. Otherwise None: the node needs proposals.
+    """
+    children = tree.nodes[parent_node_id].children
+    if not children:
+        return None
+    entries: List[tuple[Move, int, TicTacToe, int]] = []
+    for cid in children:
+        child = tree.nodes[cid]
+        child.cached = child.pruned = False
+        m = Move(row=child.r, col=child.c, reason=child.reason or "")
+        entries.append((m, child.score_after, game.apply_move(child.r, child.c, to_move), cid))
+    return entries
+
+
 def _beam_select(
     entries: List[tuple[Move, int, TicTacToe, int]],
     to_move: str,
@@ -115,6 +252,23 @@ def _beam_select(
     return entries[:beam_width]
 
 
+def _order_entries(
+    game: TicTacToe,
+    entries: List[tuple[Move, int, TicTacToe, int]],
+    to_move: str,
+    depth: int,
+    orderer: Optional[MoveOrderer],
+) -> List[tuple[Move, int, TicTacToe, int]]:
+    """
+    Put the selected children in the order they should be searched (most promising first),
+    so the alpha-beta window tightens as early as possible.
+    """
+    if orderer is None or len(entries) < 2:
+        return entries
+    by_move = {id(e[0]): e for e in entries}
+    return [by_move[id(m)] for m in orderer.order(game, to_move, [e[0] for e in entries], depth)]
+
+
 # ---------------------------
 # Main (recursion preserved)
 # ---------------------------
@@ -129,12 +283,29 @@ async def find_best_path_with_tree(
     beam_width: int = 2,
     max_depth: int = SEARCH_MAX_DEPTH,
     depth: int = 0,
+    transpositions: Optional[TranspositionTable] = None,
+    limiter: Optional[asyncio.Semaphore] = None,
+    alpha: float = float("-inf"),
+    beta: float = float("inf"),
+    orderer: Optional[MoveOrderer] = None,
 ) -> tuple[int, List[PathStep]]:
     """
     - Scores are ALWAYS from O's perspective.
     - O-turns: keep top `beam_width` HIGHEST scores.
     - X-turns: keep top `beam_width` LOWEST scores.
+    - `transpositions` (optional) short-circuits positions already searched deep enough.
+    - Selected children are searched concurrently; `limiter` caps in-flight LLM calls
+      (defaults to SEARCH_MAX_CONCURRENCY for the whole search).
+    - `alpha` / `beta` bound the scores that can still change the caller's decision; children
+      that cannot are skipped (no LLM calls) and marked `pruned` in the tree.
+    - `orderer` answers forced positions without the LLM and orders children for search
+      (defaults to one HeuristicOrderer shared by the whole search).
     """
+    if limiter is None:
+        limiter = asyncio.Semaphore(SEARCH_MAX_CONCURRENCY)
+    if orderer is None:
+        orderer = HeuristicOrderer()
+
     node = tree.nodes[parent_node_id]
     dbg(depth, f"↳ Explore node #{node.id} (depth={depth}/{max_depth}, to_move={to_move}) | score_here={node.score_after}")
 
@@ -148,39 +319,56 @@ async def find_best_path_with_tree(
     if cutoff_eval is not None:
         return cutoff_eval
 
+    # 2b) Transposition lookup (uses _probe_transposition)
+    tt_eval = _probe_transposition(game, node, to_move, depth, max_depth - depth, transpositions, alpha, beta,
+                                   beam_width, model_name)
+    if tt_eval is not None:
+        _report_value(tree, parent_node_id, *tt_eval)
+        return tt_eval
+
     # 3) Legal moves retrieval
     legal = game.available_positions()
     if not legal:
         dbg(depth, f"  ⚠️ No legal moves. Returning 0.")
         return 0, []
 
-    # 4) Candidate generation (uses _fetch_proposals)
-    proposals: List[Move] = await _fetch_proposals(
-        game=game,
-        legal=legal,
-        to_move=to_move,
-        model_name=model_name,
-        api_key=api_key,
-    )
+    # 4) Candidate generation (uses _fetch_proposals), skipped if this node was expanded before
+    entries = _existing_children(game, to_move, tree, parent_node_id)
+    if entries is None:
+        proposals: List[Move] = await _fetch_proposals(
+            game=game,
+            legal=legal,
+            to_move=to_move,
+            model_name=model_name,
+            api_key=api_key,
+            limiter=limiter,
+            orderer=orderer,
+            depth=depth,
+        )
 
-    # 5) Scoring and child-node expansion (uses _score_and_expand_children)
-    entries = _score_and_expand_children(
-        game=game,
-        proposals=proposals,
-        to_move=to_move,
-        tree=tree,
-        parent_node_id=parent_node_id,
-    )
+        # 5) Scoring and child-node expansion (uses _score_and_expand_children)
+        entries = _score_and_expand_children(
+            game=game,
+            proposals=proposals,
+            to_move=to_move,
+            tree=tree,
+            parent_node_id=parent_node_id,
+        )
 
     # 6) Beam selection (uses _beam_select)
     entries = _beam_select(entries, to_move=to_move, beam_width=beam_width)
+    entries = _order_entries(game, entries, to_move, depth, orderer)
 
-    # 7) Recurse into selected children (recursion remains here)
-    best_score: Optional[int] = None
-    best_path: List[PathStep] = []
+    # 7) Recurse into selected children with alpha-beta bounds (recursion remains here).
+    #    The first child is searched alone to tighten the window; the remaining siblings then
+    #    run concurrently and are cancelled as soon as one of them proves a cut-off.
+    maximizing = to_move == 'O'
+    window_alpha, window_beta = alpha, beta
+    results: List[Optional[tuple[int, List[PathStep]]]] = [None] * len(entries)
 
-    for m, s, next_state, child_id in entries:
-        score_down, path_down = await find_best_path_with_tree(
+    def search_child(i: int, lo: float, hi: float):
+        _, _, next_state, child_id = entries[i]
+        return find_best_path_with_tree(
             next_state,
             to_move=('X' if to_move == 'O' else 'O'),
             tree=tree,
@@ -190,7 +378,52 @@ async def find_best_path_with_tree(
             beam_width=beam_width,
             max_depth=max_depth,
             depth=depth + 1,
+            transpositions=transpositions,
+            limiter=limiter,
+            alpha=lo,
+            beta=hi,
+            orderer=orderer,
         )
+
+    def cuts_off(v: int) -> bool:
+        return v >= beta if maximizing else v <= alpha
+
+    results[0] = await search_child(0, alpha, beta)
+    if cuts_off(results[0][0]):
+        orderer.record_cutoff(to_move, (entries[0][0].row, entries[0][0].col), depth, max_depth - depth)
+    if maximizing:
+        alpha = max(alpha, results[0][0])
+    else:
+        beta = min(beta, results[0][0])
+
+    if alpha < beta and len(entries) > 1:
+        async with asyncio.TaskGroup() as tg:
+            pending = {tg.create_task(search_child(i, alpha, beta)): i for i in range(1, len(entries))}
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                cutoff = False
+                for task in done:
+                    i = pending.pop(task)
+                    results[i] = task.result()
+                    if cuts_off(results[i][0]):
+                        cutoff = True
+                        m = entries[i][0]
+                        orderer.record_cutoff(to_move, (m.row, m.col), depth, max_depth - depth)
+                if cutoff:
+                    for task in pending:
+                        task.cancel()
+                    break
+
+    # Back up in search order (not completion order) so ties resolve deterministically
+    best_score: Optional[int] = None
+    best_path: List[PathStep] = []
+
+    for (m, s, next_state, child_id), result in zip(entries, results):
+        if result is None:
+            tree.nodes[child_id].pruned = True
+            dbg(depth, f"  ✂️ Pruned #{child_id} ({m.row},{m.col}): cannot change the decision above.")
+            continue
+        score_down, path_down = result
         overall_score = score_down  # already from O's perspective
 
         if best_score is None:
@@ -203,4 +436,9 @@ async def find_best_path_with_tree(
                 best_path = [PathStep(player=to_move, row=m.row, col=m.col, reason=m.reason, score_after=s)] + path_down
 
     assert best_score is not None
+    orderer.record_best(to_move, (best_path[0].row, best_path[0].col), depth, max_depth - depth)
+    _report_value(tree, parent_node_id, best_score, best_path)
+    if not _uses_fallback(tree, parent_node_id):
+        _store_transposition(game, to_move, max_depth - depth, best_score, best_path, transpositions, window_alpha,
+                             window_beta, beam_width, model_name)
     return cast(int, best_score), best_path
\ No newline at end of file
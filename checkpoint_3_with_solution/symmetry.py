@@ -0,0 +1,95 @@
+"""
+The 8 rotations / reflections of the 3x3 board, applied to bitboards.
+
+`canonical(x, o)` picks the image with the smallest base-3 index, so all
+symmetric boards share one key; the returned symmetry id maps moves between
+the caller's board and the canonical one.
+"""
+from __future__ import annotations
+import re
+from typing import Callable, List, Tuple
+
+from .game import FULL_MASK
+from .positions import O_CODE, X_CODE
+
+_TRANSFORMS: Tuple[Callable[[int, int], Tuple[int, int]], ...] = (
+    lambda r, c: (r, c),            # identity
+    lambda r, c: (c, 2 - r),        # rotate 90
+    lambda r, c: (2 - r, 2 - c),    # rotate 180
+    lambda r, c: (2 - c, r),        # rotate 270
+    lambda r, c: (r, 2 - c),        # mirror left/right
+    lambda r, c: (2 - r, c),        # mirror top/bottom
+    lambda r, c: (c, r),            # transpose
+    lambda r, c: (2 - c, 2 - r),    # anti-transpose
+)
+
+
+def _perm(t: Callable[[int, int], Tuple[int, int]]) -> Tuple[int, ...]:
+    return tuple(3 * r + c for r, c in (t(*divmod(i, 3)) for i in range(9)))
+
+
+# PERM[s][i]: cell that cell i lands on under symmetry s; INVERSE undoes it
+PERM: Tuple[Tuple[int, ...], ...] = tuple(_perm(t) for t in _TRANSFORMS)
+INVERSE: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(p.index(i) for i in range(9)) for p in PERM
+)
+
+
+def _mask_table(perm: Tuple[int, ...]) -> Tuple[int, ...]:
+    out: List[int] = []
+    for mask in range(FULL_MASK + 1):
+        m = 0
+        for i in range(9):
+            if mask >> i & 1:
+                m |= 1 << perm[i]
+        out.append(m)
+    return tuple(out)
+
+
+# MASK_PERM[s][mask]: `mask` with every cell moved by symmetry s
+MASK_PERM: Tuple[Tuple[int, ...], ...] = tuple(_mask_table(p) for p in PERM)
+
+
+def canonical(x: int, o: int) -> Tuple[int, int, int]:
+    """Return (canonical_x, canonical_o, symmetry_id) for the given masks."""
+    best_idx = X_CODE[x] + O_CODE[o]
+    best = (x, o, 0)
+    for s in range(1, 8):
+        table = MASK_PERM[s]
+        tx, to = table[x], table[o]
+        idx = X_CODE[tx] + O_CODE[to]
+        if idx < best_idx:
+            best_idx = idx
+            best = (tx, to, s)
+    return best
+
+
+def canonical_index(x: int, o: int) -> Tuple[int, int]:
+    """Return (base-3 index of the canonical board, symmetry_id)."""
+    cx, co, s = canonical(x, o)
+    return X_CODE[cx] + O_CODE[co], s
+
+
+def to_canonical(sym: int, r: int, c: int) -> Tuple[int, int]:
+    """Map a move on the caller's board onto the canonical board."""
+    return divmod(PERM[sym][r * 3 + c], 3)
+
+
+def from_canonical(sym: int, r: int, c: int) -> Tuple[int, int]:
+    """Map a move on the canonical board back onto the caller's board."""
+    return divmod(INVERSE[sym][r * 3 + c], 3)
+
+
+_COORD = re.compile(r"\((\d)\s*,\s*(\d)\)")
+
+
+def remap_coords(text: str, fn: Callable[[int, int], Tuple[int, int]]) -> str:
+    """Rewrite every "(r,c)" on the board mentioned in `text` through `fn`."""
+    def sub(m: "re.Match[str]") -> str:
+        r, c = int(m.group(1)), int(m.group(2))
+        if r > 2 or c > 2:
+            return m.group(0)
+        rr, cc = fn(r, c)
+        return f"({rr},{cc})"
+
+    return _COORD.sub(sub, text)
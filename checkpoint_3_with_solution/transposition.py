@@ -0,0 +1,165 @@
+"""
+Transposition table for the thought-tree search.
+
+Entries are keyed by (canonical board, side to move, beam width, model), so
+positions reached by different move orders or by any of the 8 board
+symmetries share one entry, while searches that would see other candidate
+moves (a wider beam, another model's proposals) do not.
+The best move and the "(r,c)" mentions in its reason are stored on the
+canonical board and mapped back on probe.
+Scores from an alpha-beta window are stored as bounds (EXACT / LOWER / UPPER)
+and only returned when they decide the caller's window.
+
+With a `backend` (cache_backend.py) stores are written through and local
+misses are read through, so worker processes share their search results.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+from .cache_backend import SHARED_BACKEND, CacheBackend
+from .config import OPENAI_MODEL, TT_MAX_ENTRIES, TT_SHARED_TTL_S
+from .game import TicTacToe
+from .symmetry import PERM, INVERSE, canonical_index, from_canonical, remap_coords, to_canonical
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Bump whenever the search or its scoring changes so shared results from older searches are not reused
+SEARCH_VERSION = "v2"
+
+
+@dataclass(frozen=True)
+class TTEntry:
+    score: int                  # backed-up score from O's perspective
+    best_cell: Optional[int]    # best move on the canonical board (0..8), None if no move
+    reason: str                 # rationale attached to the best move, on the canonical board
+    depth: int                  # remaining depth the score was searched to
+    flag: int = EXACT           # EXACT, LOWER (score is a lower bound) or UPPER
+
+
+@dataclass(frozen=True)
+class TTHit:
+    score: int
+    move: Optional[Tuple[int, int]]  # best move mapped back to the caller's board
+    reason: str
+    depth: int
+
+
+class TranspositionTable:
+    """Bounded, LRU-evicted map shared across searches (and requests)."""
+
+    def __init__(self, max_entries: int = TT_MAX_ENTRIES, backend: Optional[CacheBackend] = None,
+                 namespace: str = "tt"):
+        self.max_entries = max_entries
+        self.backend = backend
+        self.namespace = namespace
+        self._entries: "OrderedDict[Tuple[int, str, int, str], TTEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def probe(
+        self,
+        game: TicTacToe,
+        to_move: str,
+        depth: int,
+        alpha: float = float("-inf"),
+        beta: float = float("inf"),
+        beam_width: int = 2,
+        model_name: str = OPENAI_MODEL,
+    ) -> Optional[TTHit]:
+        """
+        Return a hit if this position was searched at least `depth` plies deep with the same beam
+        width and model, and the stored score is exact, or a bound that already falls outside (alpha, beta).
+        """
+        idx, sym = canonical_index(game.x, game.o)
+        key = (idx, to_move, beam_width, model_name)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.backend is not None:
+            entry = self._load(key)
+        with self._lock:
+            usable = entry is not None and entry.depth >= depth and (
+                entry.flag == EXACT
+                or (entry.flag == LOWER and entry.score >= beta)
+                or (entry.flag == UPPER and entry.score <= alpha)
+            )
+            if not usable:
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        move = None if entry.best_cell is None else divmod(INVERSE[sym][entry.best_cell], 3)
+        reason = remap_coords(entry.reason, lambda r, c: from_canonical(sym, r, c))
+        return TTHit(score=entry.score, move=move, reason=reason, depth=entry.depth)
+
+    def _shared_key(self, key: Tuple[int, str, int, str]) -> Tuple[str, str]:
+        """(namespace, key) of an entry in the backend; each model gets its own namespace."""
+        idx, to_move, beam_width, model_name = key
+        return f"{self.namespace}|{model_name}", f"{idx}|{to_move}|{beam_width}"
+
+    def _load(self, key: Tuple[int, str, int, str]) -> Optional[TTEntry]:
+        """Pull a position another process searched into the local tier."""
+        raw = self.backend.get(*self._shared_key(key))
+        if raw is None:
+            return None
+        entry = TTEntry(*orjson.loads(raw))
+        with self._lock:
+            self.shared_hits += 1
+            entry = self._entries.setdefault(key, entry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def store(
+        self,
+        game: TicTacToe,
+        to_move: str,
+        depth: int,
+        score: int,
+        move: Optional[Tuple[int, int]],
+        reason: str = "",
+        flag: int = EXACT,
+        beam_width: int = 2,
+        model_name: str = OPENAI_MODEL,
+    ) -> None:
+        idx, sym = canonical_index(game.x, game.o)
+        key = (idx, to_move, beam_width, model_name)
+        best_cell = None if move is None else PERM[sym][move[0] * 3 + move[1]]
+        reason = remap_coords(reason, lambda r, c: to_canonical(sym, r, c))
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None and (old.depth > depth or (old.depth == depth and old.flag == EXACT and flag != EXACT)):
+                return  # keep the deeper (or equally deep, exact) result
+            entry = TTEntry(score=score, best_cell=best_cell, reason=reason, depth=depth, flag=flag)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        # Searches probe a position before storing it, so `old` already reflected the shared entry
+        if self.backend is not None:
+            self.backend.put(*self._shared_key(key),
+                             orjson.dumps([score, best_cell, reason, depth, flag]), ttl_s=TT_SHARED_TTL_S)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "shared_hits": self.shared_hits}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Process-wide table shared by the CLI and the API, and through the backend with other workers.
+# The namespace names the package (skeleton and solution must never answer for each other) and search version.
+SHARED_TRANSPOSITIONS = TranspositionTable(backend=SHARED_BACKEND, namespace=f"tt|{__package__}|{SEARCH_VERSION}")
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Keep the shared caches in memory and the opening book off, so tests neither read nor write .cache/
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["OPENING_BOOK_PATH"] = ""
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
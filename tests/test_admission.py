@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from api.admission import Admission, Rejected, TokenBucket, cheaper_variants, estimate_cost, retry_after
+from api.schemas import MoveRequest
+
+EMPTY = [None] * 9
+
+
+def request(mode="tot", **fields):
+    return MoveRequest(mode=mode, board=EMPTY, **fields)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_estimated_cost_per_mode():
+    assert estimate_cost(request("solve")) == 0
+    assert estimate_cost(request("cot")) == 1
+    assert estimate_cost(request(beam=2, depth=2)) == 1 + 2
+    assert estimate_cost(request(beam=3, depth=3)) == 1 + 3 + 9
+    assert estimate_cost(request(strategy="mcts", iterations=20)) == 20
+    # Never wider than the legal moves
+    assert estimate_cost(MoveRequest(mode="tot", board=['X', 'O'] * 4 + [None], beam=5, depth=3)) == 1
+
+
+def test_cheaper_variants_get_cheaper_and_end_with_the_solver():
+    variants = cheaper_variants(request(beam=3, depth=3))
+    costs = [estimate_cost(v) for v in variants]
+    assert costs == sorted(costs, reverse=True)
+    tot_costs = [estimate_cost(v) for v in variants if v.mode == "tot"]
+    assert len(set(tot_costs)) == len(tot_costs)  # one search shape per cost
+    assert costs[0] < estimate_cost(request(beam=3, depth=3))
+    assert [v.mode for v in variants[-2:]] == ["cot", "solve"]
+    assert [v.mode for v in cheaper_variants(request("cot"))] == ["solve"]
+    assert cheaper_variants(request("solve")) == []
+
+
+def test_token_bucket_refills_up_to_its_burst():
+    bucket = TokenBucket(rate=2, burst=4, now=0)
+    assert bucket.available(4, now=0)
+    assert bucket.reserve(6, now=0) == 1.0  # two tokens of debt at 2 tokens/s
+    assert not bucket.available(1, now=0.5)
+    assert bucket.available(4, now=10)
+    assert bucket.tokens == 4
+
+
+def test_reject_policy_answers_with_retry_after():
+    clock = Clock()
+    admission = Admission(policy="reject", budget=0, rate=1, burst=3, clock=clock)
+    assert run(admission.acquire(request(beam=2, depth=2), "a")).outcome == "admitted"
+    with pytest.raises(Rejected) as e:
+        run(admission.acquire(request(beam=2, depth=2), "a"))
+    assert retry_after(e.value) == "3"
+    # Other clients and free requests are unaffected
+    assert run(admission.acquire(request(beam=2, depth=2), "b")).outcome == "admitted"
+    assert run(admission.acquire(request("solve"), "a")).outcome == "admitted"
+    clock.now = 3
+    assert run(admission.acquire(request(beam=2, depth=2), "a")).outcome == "admitted"
+    assert admission.stats()["rejected"] == 1
+
+
+def test_degrade_policy_runs_the_largest_variant_that_fits():
+    admission = Admission(policy="degrade", budget=4, rate=0, clock=Clock())
+    first = run(admission.acquire(request(beam=2, depth=2), "a"))
+    ticket = run(admission.acquire(request(beam=2, depth=2), "b"))
+    assert (ticket.outcome, ticket.reason) == ("degraded", "llm_budget")
+    assert ticket.req.mode == "tot" and ticket.cost == 1
+    assert admission.in_flight == first.cost + ticket.cost
+
+
+def test_degrade_for_rate_limited_clients_and_same_mode():
+    admission = Admission(policy="degrade", budget=0, rate=1, burst=3, clock=Clock())
+    run(admission.acquire(request(beam=2, depth=2), "a"))
+    ticket = run(admission.acquire(request("cot"), "a"))
+    assert (ticket.req.mode, ticket.reason) == ("solve", "rate_limit")
+    with pytest.raises(Rejected):
+        run(admission.acquire(request("cot"), "a", same_mode=True))
+
+
+def test_an_idle_server_admits_requests_above_the_whole_budget():
+    admission = Admission(policy="reject", budget=2, rate=0)
+    ticket = run(admission.acquire(request(beam=3, depth=3), "a"))
+    assert ticket.outcome == "admitted" and admission.in_flight == 13
+    run(admission.release(ticket))
+    assert admission.in_flight == 0
+
+
+def test_queue_policy_waits_for_budget():
+    async def main():
+        admission = Admission(policy="queue", budget=3, rate=0, queue_timeout_s=5)
+        first = await admission.acquire(request(beam=2, depth=2), "a")
+        waiter = asyncio.ensure_future(admission.acquire(request(beam=2, depth=2), "b"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done() and admission.waiting == 1
+        await admission.release(first)
+        return await waiter
+
+    assert run(main()).outcome == "queued"
+
+
+def test_queue_policy_gives_up_after_its_timeout_or_when_full():
+    async def main():
+        admission = Admission(policy="queue", budget=3, rate=0, queue_timeout_s=0.05, queue_max=1)
+        await admission.acquire(request(beam=2, depth=2), "a")
+        waiter = asyncio.ensure_future(admission.acquire(request(beam=2, depth=2), "b"))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected, match="queue|budget"):
+            await admission.acquire(request(beam=2, depth=2), "c")
+        with pytest.raises(Rejected, match="waited too long"):
+            await waiter
+        return admission
+
+    assert run(main()).waiting == 0
+
+
+def test_cancelled_waiters_get_their_tokens_back():
+    async def main():
+        clock = Clock()
+        admission = Admission(policy="queue", budget=3, rate=1, burst=10, queue_timeout_s=5, clock=clock)
+        await admission.acquire(request(beam=2, depth=2), "a")
+        waiter = asyncio.ensure_future(admission.acquire(request(beam=2, depth=2), "b"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return admission
+
+    admission = run(main())
+    assert admission._buckets["b"].tokens == 10 and admission.waiting == 0
+
+
+def test_admit_releases_on_exit():
+    async def main():
+        admission = Admission(policy="reject", budget=10, rate=0)
+        async with admission.admit(request(beam=2, depth=2), "a") as ticket:
+            assert admission.in_flight == ticket.cost == 3
+        return admission
+
+    assert run(main()).in_flight == 0
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Admission(policy="drop")
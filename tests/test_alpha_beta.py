@@ -0,0 +1,86 @@
+import asyncio
+import random
+
+import pytest
+
+import checkpoint_3_with_solution.search as search
+from checkpoint_3_with_solution.game import TicTacToe
+from checkpoint_3_with_solution.schemas import Move
+from checkpoint_3_with_solution.tree import ThoughtTree
+
+INF = float("inf")
+
+
+@pytest.fixture(autouse=True)
+def llm(monkeypatch):
+    """Deterministic proposals: up to four legal moves, in an order that depends on the board."""
+    async def create_thoughts(game, legal, player, model_name=None, api_key=None):
+        ranked = sorted(legal, key=lambda rc: (7 * (3 * rc[0] + rc[1]) + 3 * game.x + game.o) % 11)
+        return [Move(row=r, col=c, reason=f"take ({r},{c})") for r, c in ranked[:4]]
+
+    monkeypatch.setattr(search, "create_thoughts", create_thoughts)
+
+
+def random_board(rng):
+    """A position 0-4 plies in, not yet decided, and whose turn it is."""
+    while True:
+        game, player = TicTacToe(), 'X'
+        for _ in range(rng.randrange(5)):
+            r, c = rng.choice(sorted(game.available_positions()))
+            game = game.apply_move(r, c, player)
+            player = 'O' if player == 'X' else 'X'
+        if not (game.is_win('X') or game.is_win('O')) and game.available_positions():
+            return game, player
+
+
+def run(game, to_move, depth=0, max_depth=3, tree=None):
+    tree = tree or ThoughtTree()
+    root = tree.add_root(score_after=0)
+    score, path = asyncio.run(search.find_best_path_with_tree(
+        game, to_move, tree, root, beam_width=3, max_depth=max_depth, depth=depth))
+    return score, path, tree
+
+
+def unpruned(monkeypatch):
+    """Make every recursive call search with an open window, so nothing can be cut off."""
+    pruning = search.find_best_path_with_tree
+
+    def open_window(*args, alpha=-INF, beta=INF, **kwargs):
+        return pruning(*args, **kwargs)
+
+    monkeypatch.setattr(search, "find_best_path_with_tree", open_window)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_pruning_keeps_the_best_move_and_score(monkeypatch, seed):
+    game, to_move = random_board(random.Random(seed))
+    score, path, tree = run(game, to_move)
+
+    with monkeypatch.context() as m:
+        unpruned(m)
+        full_score, full_path, full_tree = run(game, to_move)
+        first = path[0]
+        # Ties may resolve to another move; the one chosen with pruning must be worth as much
+        chosen_score, _, _ = run(game.apply_move(first.row, first.col, to_move),
+                                 'O' if to_move == 'X' else 'X', depth=1)
+
+    assert score == full_score
+    assert chosen_score == full_score
+    assert not any(node.pruned for node in full_tree.nodes.values())
+
+
+def test_pruned_children_are_flagged():
+    flagged = 0
+    for seed in range(12):
+        game, to_move = random_board(random.Random(seed))
+        _, path, tree = run(game, to_move)
+        pruned = [node for node in tree.nodes.values() if node.pruned]
+        flagged += len(pruned)
+        # Skipped siblings of a searched move, never the root nor the line that was chosen
+        line = {(step.row, step.col) for step in path[:1]}
+        for node in pruned:
+            siblings = tree.nodes[node.parent].children
+            assert node.parent is not None and any(not tree.nodes[s].pruned for s in siblings)
+            if node.parent == tree.root_id:
+                assert (node.r, node.c) not in line
+    assert flagged
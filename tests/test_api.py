@@ -0,0 +1,277 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import api.server as server
+from api.admission import Admission
+from api.schemas import CotResponse
+
+BOARD = ['X', None, None, None, None, None, None, None, None]
+
+
+@pytest.fixture(autouse=True)
+def admission(monkeypatch):
+    """A fresh admission controller per test, so budgets and counts do not leak between tests."""
+    fresh = Admission()
+    monkeypatch.setattr(server, "ADMISSION", fresh)
+    return fresh
+
+
+class Search:
+    """Stand-in for `run_tot`: streams one node, then runs until it is cancelled."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def __call__(self, board, listener=None, **kwargs):
+        self.started.set()
+        if listener is not None:
+            listener("node", {"id": 0})
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def post(path, payload, leave_when=None, stalled=False):
+    """
+    Drive the ASGI app for one POST. The client disconnects right after sending the body, or once
+    `leave_when` (called with the messages sent so far) says so; with `stalled` the response headers
+    never get written. Returns the messages the app sent.
+    """
+    sent = []
+    body = [{"type": "http.request", "body": orjson.dumps(payload), "more_body": False}]
+
+    async def receive():
+        if body:
+            return body.pop()
+        while leave_when is not None and not leave_when(sent):
+            await asyncio.sleep(0.001)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if stalled and message["type"] == "http.response.start":
+            await asyncio.Event().wait()
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json")], "client": ("test", 1), "server": ("test", 80),
+    }
+    await server.app(scope, receive, send)
+    return sent
+
+
+class Answers:
+    """Stand-in for `answer`: CoT replies on the first empty cell, 400 on full boards; `hang` boards never finish."""
+
+    def __init__(self, hang=()):
+        self.asked = []
+        self.hang = [list(board) for board in hang]
+        self.cancelled = 0
+
+    async def __call__(self, req):
+        self.asked.append(req)
+        if req.board in self.hang:
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        if None not in req.board:
+            raise HTTPException(status_code=400, detail="No legal move: game is already over")
+        return CotResponse(mode="cot", move=req.board.index(None), reasoning="stub")
+
+
+def body_of(sent):
+    return b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+
+
+# ----- /move/stream: leaving the stream cancels the search and frees its admission ticket -----
+
+def test_leaving_before_the_first_chunk_frees_the_ticket(monkeypatch, admission):
+    search = Search()
+    monkeypatch.setattr(server, "run_tot", search)
+
+    async def main():
+        await post("/api/v1/move/stream", {"mode": "tot", "board": BOARD}, stalled=True)
+        # Checked before asyncio.run cancels whatever is left running
+        return admission.in_flight, search.started.is_set(), search.cancelled
+
+    in_flight, started, cancelled = asyncio.run(main())
+    assert in_flight == 0
+    assert cancelled or not started
+
+
+def test_leaving_mid_stream_cancels_the_search(monkeypatch, admission):
+    search = Search()
+    monkeypatch.setattr(server, "run_tot", search)
+    before = server.CANCELLED['stream']
+
+    async def main():
+        sent = await post("/api/v1/move/stream", {"mode": "tot", "board": BOARD},
+                          leave_when=lambda sent: b"event: node" in body_of(sent))
+        return sent, admission.in_flight, search.cancelled
+
+    sent, in_flight, cancelled = asyncio.run(main())
+    assert b"event: node" in body_of(sent)
+    assert cancelled and in_flight == 0
+    assert server.CANCELLED['stream'] == before + 1
+
+
+# ----- mode 'solve' -----
+
+def test_solve_answers_with_the_perfect_move_and_its_tree():
+    res = TestClient(server.app).post("/api/v1/move", json={"mode": "solve", "board": BOARD, "player": "O"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["mode"] == "solve" and body["move"] == 4  # only the center holds the draw
+    assert body["tree_nodes"] > 1
+    replies = body["tree"]["children"]
+    assert len(replies) == 8 and replies[0]["reason"] == "solver: draw with best play"
+
+
+# ----- /move:batch -----
+
+OTHER = [None, 'X', None, None, None, None, None, None, None]
+FULL = ['X', 'O', 'X', 'X', 'O', 'O', 'O', 'X', 'X']
+
+
+def batch_lines(body):
+    return {line["index"]: line for line in map(orjson.loads, body.splitlines())}
+
+
+def test_batch_answers_identical_requests_once(monkeypatch):
+    answers = Answers()
+    monkeypatch.setattr(server, "answer", answers)
+    items = [{"mode": "cot", "board": BOARD}, {"mode": "cot", "board": OTHER}, {"mode": "cot", "board": BOARD}]
+    res = TestClient(server.app).post("/api/v1/move:batch", json={"requests": items})
+    assert res.status_code == 200 and res.headers["content-type"] == "application/x-ndjson"
+    lines = batch_lines(res.content)
+    assert len(answers.asked) == 2
+    assert sorted(lines) == [0, 1, 2]
+    assert all(line["status"] == 200 for line in lines.values())
+    assert lines[0]["result"] == lines[2]["result"] and lines[0]["result"]["move"] == 1
+    assert lines[1]["result"]["move"] == 0
+
+
+def test_batch_reports_failures_in_line(monkeypatch):
+    answers = Answers()
+    monkeypatch.setattr(server, "answer", answers)
+    monkeypatch.setattr(server, "ADMISSION", Admission(policy="reject", rate=1, burst=3))
+    items = [
+        {"mode": "cot", "board": BOARD},
+        {"mode": "cot", "board": FULL},
+        {"mode": "tot", "board": BOARD, "tree_format": "ndjson"},
+        {"mode": "tot", "board": BOARD, "beam": 3, "depth": 4},  # 40 LLM calls, more than the client's burst
+    ]
+    res = TestClient(server.app).post("/api/v1/move:batch", json={"requests": items})
+    assert res.status_code == 200
+    lines = batch_lines(res.content)
+    assert {i: line["status"] for i, line in lines.items()} == {0: 200, 1: 400, 2: 406, 3: 429}
+    assert lines[1]["error"]["detail"] == "No legal move: game is already over"
+    assert "ndjson" in lines[2]["error"]["detail"]
+    assert lines[3]["error"]["retry_after"] > 0
+    assert [req.board for req in answers.asked] == [BOARD, FULL]
+
+
+def test_closing_the_batch_stream_cancels_the_items_left(monkeypatch, admission):
+    answers = Answers(hang=[OTHER])
+    monkeypatch.setattr(server, "answer", answers)
+    before = server.CANCELLED['batch']
+    items = [{"mode": "cot", "board": BOARD}, {"mode": "cot", "board": OTHER}]
+
+    async def main():
+        sent = await post("/api/v1/move:batch", {"requests": items}, leave_when=lambda sent: b"index" in body_of(sent))
+        await asyncio.sleep(0)
+        return sent, answers.cancelled, admission.in_flight
+
+    sent, cancelled, in_flight = asyncio.run(main())
+    assert list(batch_lines(body_of(sent))) == [0]
+    assert cancelled == 1 and in_flight == 0
+    assert server.CANCELLED['batch'] == before + 1
+
+
+# ----- tree limits -----
+
+def nested_nodes(node, depth=0):
+    """(node, depth) pairs of a nested tree."""
+    yield node, depth
+    for child in node.get("children") or []:
+        yield from nested_nodes(child, depth + 1)
+
+
+def solve(**fields):
+    res = TestClient(server.app).post("/api/v1/move", json={"mode": "solve", "board": BOARD, "player": "O", **fields})
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_trees_within_the_limits_are_sent_whole():
+    body = solve()
+    assert not body["tree_truncated"]
+    assert len(list(nested_nodes(body["tree"]))) == body["tree_nodes"]
+
+
+def test_tree_depth_and_node_limits_cut_the_tree_breadth_first():
+    shallow = solve(tree_max_depth=1)
+    assert shallow["tree_truncated"]
+    assert max(depth for _, depth in nested_nodes(shallow["tree"])) == 1
+    assert len(list(nested_nodes(shallow["tree"]))) == 9  # the root and its 8 replies
+
+    small = solve(tree_max_nodes=4)
+    assert small["tree_truncated"] and small["tree_nodes"] > 4
+    nodes = list(nested_nodes(small["tree"]))
+    assert len(nodes) == 4 and [depth for _, depth in nodes] == [0, 1, 1, 1]
+
+    columnar = solve(tree_max_nodes=4, tree_format="columnar")
+    assert columnar["tree_truncated"] and len(columnar["tree"]["id"]) == 4
+
+
+def test_the_server_caps_the_limits_and_clips_reasons(monkeypatch):
+    monkeypatch.setattr(server, "TREE_MAX_NODES", 3)
+    monkeypatch.setattr(server, "TREE_MAX_REASON_CHARS", 10)
+    body = solve(tree_max_nodes=50)
+    nodes = [node for node, _ in nested_nodes(body["tree"])]
+    assert len(nodes) == 3
+    clipped = [node["reason"] for node in nodes[1:]]
+    assert all(len(reason) == 10 and reason.endswith("…") for reason in clipped)
+
+
+# ----- /move: a client that leaves cancels its request -----
+
+def test_leaving_cancels_the_move_and_answers_499(monkeypatch, admission):
+    answers = Answers(hang=[BOARD])
+    monkeypatch.setattr(server, "answer", answers)
+    before = server.CANCELLED['cot']
+
+    async def main():
+        # Without the cancellation the request would wait out the hour-long answer
+        sent = await asyncio.wait_for(post("/api/v1/move", {"mode": "cot", "board": BOARD},
+                                           leave_when=lambda sent: answers.asked), timeout=5)
+        return sent, answers.cancelled, admission.in_flight
+
+    sent, cancelled, in_flight = asyncio.run(main())
+    assert sent[0]["status"] == 499
+    assert cancelled == 1 and in_flight == 0
+    assert server.CANCELLED['cot'] == before + 1
+
+
+def test_until_disconnect_returns_work_that_finishes_first():
+    class Connected:
+        async def receive(self):
+            await asyncio.sleep(3600)
+
+    async def work():
+        await asyncio.sleep(0)
+        return 42
+
+    before = server.CANCELLED['tot']
+    assert asyncio.run(server.until_disconnect(Connected(), work(), "tot")) == 42
+    assert server.CANCELLED['tot'] == before
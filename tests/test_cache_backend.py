@@ -0,0 +1,213 @@
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import checkpoint_3.search as skeleton_search
+import checkpoint_3.transposition as skeleton_tt
+import checkpoint_3_with_solution.game as solution_game
+import checkpoint_3_with_solution.level_search as solution_level_search
+import checkpoint_3_with_solution.schemas as solution_schemas
+import checkpoint_3_with_solution.search as solution_search
+import checkpoint_3_with_solution.transposition as solution_tt
+from checkpoint_3.cache_backend import CacheBackend, MemoryBackend, SQLiteBackend, open_backend
+from checkpoint_3.game import TicTacToe
+from checkpoint_3.symmetry import MASK_PERM, canonical_index
+from checkpoint_3.transposition import TranspositionTable
+from checkpoint_3.tree import ThoughtTree
+from checkpoint_3_with_solution.deepening import run_strategy as solution_run_strategy
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def in_subprocess(code):
+    """Run `code` in a fresh interpreter (its own backend connections and writer thread); returns stdout."""
+    env = {**os.environ, "PYTHONPATH": REPO}
+    done = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], env=env, cwd=REPO,
+                          capture_output=True, text=True, timeout=60)
+    assert done.returncode == 0, done.stderr
+    return done.stdout
+
+
+def rows(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    yield backend
+    backend.close()
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_open_backend_specs(tmp_path):
+    assert isinstance(open_backend("memory"), MemoryBackend)
+    assert isinstance(open_backend(f"sqlite:{tmp_path / 'c.sqlite'}"), SQLiteBackend)
+    with pytest.raises(ValueError):
+        open_backend("redis://localhost")
+
+
+def test_memory_backend_ttl_and_bound():
+    backend = MemoryBackend(max_entries=2)
+    backend.put("ns", "a", b"1")
+    backend.put("ns", "gone", b"2", ttl_s=-1)
+    assert backend.get("ns", "a") == b"1"
+    assert backend.get("ns", "gone") is None
+    backend.put("ns", "b", b"3")
+    backend.put("ns", "c", b"4")
+    assert backend.get("ns", "a") is None
+    assert backend.get("other", "b") is None and backend.get("ns", "b") == b"3"
+
+
+def test_sqlite_reads_its_own_queued_writes(sqlite_backend):
+    sqlite_backend.put("ns", "k", b"v", ttl_s=60)
+    assert sqlite_backend.get("ns", "k") == b"v"
+    sqlite_backend.flush()
+    assert sqlite_backend.stats()["queued"] == 0
+    assert sqlite_backend.get("ns", "k") == b"v"
+    assert rows(sqlite_backend.path) == 1
+
+
+def test_sqlite_expired_entries_are_not_returned(sqlite_backend):
+    sqlite_backend.put("ns", "old", b"v", ttl_s=-1)
+    assert sqlite_backend.get("ns", "old") is None
+    sqlite_backend.flush()
+    assert sqlite_backend.get("ns", "old") is None
+
+
+def test_sqlite_store_is_bounded(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"), max_entries=10)
+    for i in range(256):  # one prune sweep, oldest writes going first
+        backend.put("ns", str(i), b"v")
+    backend.close()
+    assert rows(backend.path) < 256
+    reopened = SQLiteBackend(backend.path)
+    assert reopened.get("ns", "255") == b"v"
+    assert reopened.get("ns", "0") is None
+    reopened.close()
+
+
+def test_sqlite_entries_are_shared_across_processes(sqlite_backend):
+    sqlite_backend.put("ns", "from-parent", b"p")
+    sqlite_backend.flush()
+    out = in_subprocess(f"""
+        from checkpoint_3.cache_backend import SQLiteBackend
+        b = SQLiteBackend({sqlite_backend.path!r})
+        print(b.get("ns", "from-parent"))
+        b.put("ns", "from-child", b"c")
+        b.close()
+    """)
+    assert out.strip() == "b'p'"
+    assert sqlite_backend.get("ns", "from-child") == b"c"
+
+
+def test_concurrent_writer_processes_lose_nothing(sqlite_backend):
+    writer = f"""
+        import sys
+        from checkpoint_3.cache_backend import SQLiteBackend
+        b = SQLiteBackend({sqlite_backend.path!r})
+        for k in range(300):
+            b.put("ns", f"{{sys.argv[1]}}-{{k}}", b"v")
+        b.close()
+    """
+    env = {**os.environ, "PYTHONPATH": REPO}
+    procs = [subprocess.Popen([sys.executable, "-c", textwrap.dedent(writer), str(i)], env=env, cwd=REPO)
+             for i in range(4)]
+    assert [p.wait(timeout=60) for p in procs] == [0] * 4
+    assert all(sqlite_backend.get("ns", f"{i}-{k}") == b"v" for i in range(4) for k in range(300))
+
+
+def test_forked_child_opens_its_own_connections(sqlite_backend):
+    sqlite_backend.put("ns", "before-fork", b"v")
+    sqlite_backend.flush()
+    pid = os.fork()
+    if pid == 0:  # child: inherits the backend object but not its writer thread
+        ok = sqlite_backend.get("ns", "before-fork") == b"v"
+        sqlite_backend.put("ns", "from-fork", b"f")
+        sqlite_backend.close()
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert sqlite_backend.get("ns", "from-fork") == b"f"
+
+
+def test_transposition_entries_are_shared_across_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    in_subprocess(f"""
+        from checkpoint_3.cache_backend import SQLiteBackend
+        from checkpoint_3.game import TicTacToe
+        from checkpoint_3.transposition import TranspositionTable
+        backend = SQLiteBackend({path!r})
+        game = TicTacToe().apply_move(0, 0, 'X').apply_move(1, 1, 'O')
+        TranspositionTable(backend=backend, namespace="tt|test").store(game, 'X', depth=2, score=5, move=(0, 2))
+        backend.close()
+    """)
+    backend = SQLiteBackend(path)
+    tt = TranspositionTable(backend=backend, namespace="tt|test")
+    game = TicTacToe().apply_move(0, 0, 'X').apply_move(1, 1, 'O')
+    rotated = TicTacToe.from_masks(MASK_PERM[1][game.x], MASK_PERM[1][game.o])
+    hit = tt.probe(rotated, 'X', depth=2)
+    assert hit is not None and hit.score == 5
+    assert tt.stats()["shared_hits"] == 1
+    assert TranspositionTable(backend=backend, namespace="tt|other").probe(game, 'X', depth=2) is None
+    backend.close()
+
+
+def test_skeleton_and_solution_never_share_transpositions():
+    assert skeleton_tt.SHARED_TRANSPOSITIONS.namespace != solution_tt.SHARED_TRANSPOSITIONS.namespace
+
+
+def test_skeleton_placeholder_search_stores_nothing():
+    tt = TranspositionTable(backend=MemoryBackend())
+    tree = ThoughtTree()
+    root = tree.add_root(score_after=0)
+    game = TicTacToe().apply_move(0, 0, 'X')
+    asyncio.run(skeleton_search.find_best_path_with_tree(game, 'O', tree, root, transpositions=tt))
+    assert len(tt) == 0
+
+
+@pytest.mark.parametrize("strategy", ["beam", "level"])
+def test_searches_on_enumerated_moves_are_not_stored(monkeypatch, strategy):
+    """No API key (or an outage) makes the search enumerate legal moves; nothing of that may be shared."""
+    async def no_llm(game, legal, player, model_name=None, api_key=None):
+        return []
+
+    async def no_llm_batch(boards, model_name=None, api_key=None):
+        return {board_id: [] for board_id, _, _ in boards}
+
+    monkeypatch.setattr(solution_search, "create_thoughts", no_llm)
+    monkeypatch.setattr(solution_level_search, "create_thoughts_batch", no_llm_batch)
+    tt = solution_tt.TranspositionTable(backend=MemoryBackend())
+    game = solution_game.TicTacToe().apply_move(0, 1, 'X')
+    result = asyncio.run(solution_run_strategy(strategy, game, 'O', 0, max_depth=2, transpositions=tt))
+    assert result.path and result.path[0].reason == "fallback: legal move"
+    assert len(tt) == 0 and tt.backend.stats()["entries"] == 0
+
+
+def test_only_subtrees_free_of_enumerated_moves_are_stored(monkeypatch):
+    game = solution_game.TicTacToe().apply_move(0, 1, 'X')
+    outage = game.apply_move(1, 1, 'O')  # the LLM fails on this position only
+
+    async def create_thoughts(state, legal, player, model_name=None, api_key=None):
+        if (state.x, state.o) == (outage.x, outage.o):
+            return []
+        return [solution_schemas.Move(row=r, col=c, reason="llm") for r, c in sorted(legal)]
+
+    monkeypatch.setattr(solution_search, "create_thoughts", create_thoughts)
+    tt = solution_tt.TranspositionTable()
+    asyncio.run(solution_run_strategy("beam", game, 'O', 0, max_depth=3, beam_width=9, transpositions=tt))
+    clean = game.apply_move(0, 0, 'O')
+    stored = {(idx, to_move) for idx, to_move, _, _ in tt._entries}
+    assert (canonical_index(game.x, game.o)[0], 'O') not in stored
+    assert (canonical_index(outage.x, outage.o)[0], 'X') not in stored
+    assert (canonical_index(clean.x, clean.o)[0], 'X') in stored
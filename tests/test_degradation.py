@@ -0,0 +1,131 @@
+import asyncio
+
+import httpx
+import pytest
+
+import api.degradation as degradation
+import api.server as server
+from api.admission import estimate_cost
+from api.degradation import LlmHealth, llm_rounds
+from api.schemas import MoveRequest
+from checkpoint_3.singleflight import SingleFlight
+
+BOARD = ['X', 'O', None, None, 'X', None, None, None, None]
+
+
+def request(mode="tot", **fields):
+    return MoveRequest(mode=mode, board=[None] * 9, **fields)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def health_with(latencies, errors=0):
+    health = LlmHealth(window_s=60, clock=Clock())
+    for i, latency in enumerate(latencies):
+        health.record(latency, ValueError("bad output") if i < errors else None)
+    return health
+
+
+def test_llm_rounds():
+    assert llm_rounds(request("solve")) == 0
+    assert llm_rounds(request("cot")) == 1
+    assert llm_rounds(request(strategy="level", beam=3, depth=4)) == 4
+    assert llm_rounds(request(beam=3, depth=4)) == 10  # 40 calls, 4 at a time
+
+
+def test_healthy_llm_runs_the_request_as_asked():
+    health = health_with([0.5] * 10)
+    req = request(beam=3, depth=4)
+    assert health.plan(req) == (req, None)
+    assert health.plans["as_requested"] == 1
+
+
+def test_too_few_calls_say_nothing():
+    health = health_with([60.0] * 4, errors=4)
+    assert health.latency_s() == 0 and health.error_rate() == 0
+
+
+def test_slow_llm_shrinks_the_search_to_fit_the_slo():
+    health = health_with([10.0] * 10)
+    chosen, reason = health.plan(request(beam=3, depth=4))
+    assert reason == "llm_slow"
+    assert chosen.mode == "tot"
+    assert llm_rounds(chosen) * 10.0 <= degradation.LLM_LATENCY_SLO_S
+
+
+def test_failing_llm_gets_one_call_then_none():
+    single, reason = health_with([0.5] * 10, errors=3).plan(request(beam=3, depth=4))
+    assert reason == "llm_errors" and llm_rounds(single) == 1 and estimate_cost(single) == 1
+    assert health_with([0.5] * 10, errors=6).plan(request(beam=3, depth=4))[0].mode == "solve"
+    chosen, reason = health_with([0.5] * 10, errors=6).plan(request(beam=3, depth=4), same_mode=True)
+    assert (chosen.mode, reason) == ("tot", "llm_errors")
+
+
+def test_samples_leave_the_window():
+    health = health_with([0.5] * 10, errors=10)
+    assert health.error_rate() == 1.0
+    health.clock.now += 61
+    assert health.error_rate() == 0 and health.stats()["calls"] == 0
+
+
+def test_cancelled_calls_are_not_errors():
+    health = health_with([0.5] * 10)
+    health.record(0.1, asyncio.CancelledError())
+    assert health.stats()["calls"] == 10
+
+
+def test_calls_in_flight_count_with_their_age():
+    async def main():
+        health, flights = LlmHealth(), SingleFlight()
+        health.watch(flights)
+        call = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.05)
+        latency, in_flight = health.latency_s(), health.stats()["in_flight"]
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        return latency, in_flight, health.stats()["calls"]
+
+    latency, in_flight, calls = asyncio.run(main())
+    assert latency >= 0.05 and in_flight == 1
+    assert calls == 0
+
+
+# ----- answer(): the solver stands in for failed LLM answers -----
+
+def test_llm_errors_are_answered_by_the_solver(monkeypatch):
+    async def unreachable(game, avail, api_key=None):
+        raise httpx.ConnectError("provider down")
+
+    monkeypatch.setattr(server, "get_agent_move", unreachable)
+    res = asyncio.run(server.answer(MoveRequest(mode="cot", board=BOARD, player="O")))
+    assert res.extra["engine"] == "solver"
+    assert (res.extra["degraded_from"], res.extra["degraded_reason"]) == ("cot", "llm_failed")
+
+
+def test_other_exceptions_propagate(monkeypatch):
+    async def broken(game, avail, api_key=None):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(server, "get_agent_move", broken)
+    with pytest.raises(RuntimeError):
+        asyncio.run(server.answer(MoveRequest(mode="cot", board=BOARD, player="O")))
+
+
+def test_the_slo_only_cuts_off_requests_without_a_deadline(monkeypatch):
+    async def slow(game, avail, api_key=None):
+        await asyncio.sleep(0.3)
+        r, c = sorted(avail)[0]
+        return r, c, "slow but fine"
+
+    monkeypatch.setattr(server, "get_agent_move", slow)
+    monkeypatch.setattr(server, "LLM_LATENCY_SLO_S", 0.1)
+    timed_out = asyncio.run(server.answer(MoveRequest(mode="cot", board=BOARD, player="O")))
+    assert timed_out.extra["degraded_reason"] == "llm_timeout"
+    answered = asyncio.run(server.answer(MoveRequest(mode="cot", board=BOARD, player="O", deadline_ms=2000)))
+    assert answered.mode == "cot" and answered.reasoning == "slow but fine"
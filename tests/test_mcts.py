@@ -0,0 +1,88 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+import checkpoint_3_with_solution.search as search
+from checkpoint_3_with_solution.deepening import run_strategy
+from checkpoint_3_with_solution.game import TicTacToe
+from checkpoint_3_with_solution.mcts import find_best_path_mcts, rollout
+from checkpoint_3_with_solution.schemas import Move
+from checkpoint_3_with_solution.tree import ThoughtTree
+
+
+def board(*moves):
+    game = TicTacToe()
+    for player, r, c in moves:
+        game = game.apply_move(r, c, player)
+    return game
+
+
+def rooted():
+    tree = ThoughtTree()
+    return tree, tree.add_root(score_after=0)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake proposal call: every legal move, in a fixed shuffled order; counts the calls."""
+    calls = []
+
+    async def create_thoughts(game, legal, player, model_name=None, api_key=None):
+        calls.append(game.board)
+        moves = sorted(legal)
+        random.Random(str(game.board)).shuffle(moves)
+        return [Move(row=r, col=c, reason=f"({r},{c})") for r, c in moves]
+
+    monkeypatch.setattr(search, "create_thoughts", create_thoughts)
+    return calls
+
+
+def test_rollout_results_are_win_draw_or_loss():
+    rng = random.Random(0)
+    assert {rollout(0, 0, rng) for _ in range(200)} <= {-1, 0, 1}
+
+
+def test_runs_the_iteration_budget(llm):
+    tree, root = rooted()
+    score, path = asyncio.run(find_best_path_mcts(board(('X', 0, 0)), 'O', tree, root, iterations=20, seed=1))
+    assert tree.nodes[root].visits == 20
+    assert 1 <= len(llm) <= 20
+    assert path and path[0].player == 'O' and -100 <= score <= 100
+
+
+def test_takes_an_immediate_win(llm):
+    game = board(('X', 0, 0), ('O', 1, 1), ('X', 2, 2), ('O', 0, 1), ('X', 0, 2))
+    tree, root = rooted()
+    _, path = asyncio.run(find_best_path_mcts(game, 'O', tree, root, iterations=16, seed=1))
+    assert (path[0].row, path[0].col) == (2, 1)
+
+
+def test_expanded_nodes_are_reused_without_llm_calls(llm):
+    game = board(('X', 0, 0))
+    tree, root = rooted()
+    asyncio.run(find_best_path_mcts(game, 'O', tree, root, iterations=12, seed=1))
+    first = len(llm)
+    asyncio.run(find_best_path_mcts(game, 'O', tree, root, iterations=1, seed=1))
+    assert len(llm) == first
+
+
+def test_terminal_root_is_labelled():
+    game = board(('X', 0, 0), ('O', 1, 0), ('X', 0, 1), ('O', 1, 1), ('X', 0, 2))
+    tree, root = rooted()
+    score, path = asyncio.run(find_best_path_mcts(game, 'O', tree, root))
+    assert (score, path) == (-100, [])
+    assert tree.nodes[root].terminal and tree.nodes[root].outcome == "X"
+
+
+def test_root_expansion_is_bounded_by_the_deadline(monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(search, "create_thoughts", hang)
+    start = time.monotonic()
+    result = asyncio.run(run_strategy('mcts', board(('X', 0, 0)), 'O', 0, deadline_s=0.2))
+    assert time.monotonic() - start < 2
+    assert result.timed_out and result.depth == 0
+    assert result.path and result.path[0].reason == "heuristic (no LLM)"
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from api.opening_book import BookError, OpeningBook, board_index, book_positions, build_book, write_book
+from checkpoint_3.game import TicTacToe
+from checkpoint_3.symmetry import MASK_PERM, PERM
+
+
+def one_d(x, o):
+    return ['X' if x >> i & 1 else 'O' if o >> i & 1 else None for i in range(9)]
+
+
+@pytest.fixture(scope="module")
+def solver_book(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("book") / "book.bin")
+    header = asyncio.run(build_book(path, engine="solve", plies=2, version="test"))
+    book = OpeningBook(path)
+    yield header, book
+    book.close()
+
+
+def test_header_round_trips(solver_book):
+    header, book = solver_book
+    assert book.header == {**header, "entries": book.count}
+    assert book.version == "test" and header["engine"] == "solve"
+    assert header["positions"] == len(book_positions(2))
+
+
+def test_every_symmetric_image_is_answered_consistently(solver_book):
+    _, book = solver_book
+    for x, o, to_move in book_positions(2):
+        entry = book.lookup("cot", one_d(x, o), to_move)
+        for sym in range(8):
+            ix, io = MASK_PERM[sym][x], MASK_PERM[sym][o]
+            image = book.lookup("cot", one_d(ix, io), to_move)
+            # A symmetric board is its own image under several symmetries; any of them maps the move
+            same_board = [s for s in range(8) if (MASK_PERM[s][x], MASK_PERM[s][o]) == (ix, io)]
+            assert image["move"] in {PERM[s][entry["move"]] for s in same_board}
+
+
+def test_tot_entries_carry_the_tree_on_the_callers_board(solver_book):
+    _, book = solver_book
+    board = ['X', None, None, None, None, None, None, None, None]
+    entry = book.lookup("tot", board, 'O')
+    cells = [c for c in entry["tree"]["cell"] if c >= 0]
+    assert entry["move"] in cells
+    assert all(board[c] is None for c in cells)
+    assert book.lookup("cot", board, 'O')["tree"] is None
+
+
+def test_misses_and_stats(solver_book):
+    _, book = solver_book
+    deep = ['X', 'O', 'X', 'O', None, None, None, None, None]
+    assert book.lookup("cot", deep, 'X') is None
+    assert not book.covers("cot", deep, 'X')
+    assert book.covers("tot", [None] * 9, 'X')
+    assert book.lookup("solve", [None] * 9, 'X') is None
+    stats = book.stats()
+    assert stats["misses"]["cot"] >= 1 and stats["hits"]["cot"] >= 1
+
+
+def test_serves_tot_matches_the_build_settings(tmp_path):
+    path = str(tmp_path / "book.bin")
+    write_book(path, {"version": "v", "tot": {"strategy": "beam", "beam": 2, "depth": 2}}, {})
+    book = OpeningBook(path)
+    assert book.serves_tot("beam", None, None)
+    assert not book.serves_tot("beam", 3, 2)
+    assert not book.serves_tot("mcts", 2, 2)
+    book.close()
+
+
+def test_rebuilding_leaves_open_readers_on_the_old_book(tmp_path):
+    path = str(tmp_path / "book.bin")
+    key = board_index([None] * 9) * 4 + 1  # empty board, cot, O to move
+    write_book(path, {"version": "old"}, {key: b'{"move": 4}'})
+    old = OpeningBook(path)
+    write_book(path, {"version": "new"}, {key: b'{"move": 0}'})
+    new = OpeningBook(path)
+    assert old.lookup("cot", [None] * 9, 'O') == {"move": 4}
+    assert new.lookup("cot", [None] * 9, 'O') == {"move": 0}
+    old.close()
+    new.close()
+
+
+def test_missing_and_foreign_files(tmp_path):
+    assert OpeningBook.open(None) is None
+    assert OpeningBook.open(str(tmp_path / "absent.bin")) is None
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"not a book at all")
+    with pytest.raises(BookError):
+        OpeningBook(str(bad))
+
+
+def test_book_positions_are_canonical_and_unfinished():
+    positions = book_positions(2)
+    assert len(set(positions)) == len(positions)
+    for x, o, _ in positions:
+        assert not TicTacToe.from_masks(x, o).is_win('X')
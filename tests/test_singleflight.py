@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from checkpoint_3.singleflight import SingleFlight, normalize_prompt
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _raise(e):
+    raise e
+
+
+def test_concurrent_callers_share_one_call():
+    async def main():
+        flights, calls = SingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "proposals"
+
+        results = await asyncio.gather(*(flights.do("board", fetch) for _ in range(5)))
+        return flights, calls, results
+
+    flights, calls, results = run(main())
+    assert results == ["proposals"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"started": 1, "joined": 4, "in_flight": 0, "waiting": 0}
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    async def main():
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("bad output")
+
+        results = await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+        assert await flights.do("k", lambda: asyncio.sleep(0, result="ok")) == "ok"
+        return flights
+
+    assert run(main()).started == 2
+
+
+def test_cancelling_one_caller_keeps_the_call_for_the_others():
+    async def main():
+        flights, cancelled = SingleFlight(), []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("k", fetch))
+        second = asyncio.ensure_future(flights.do("k", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return cancelled
+
+    assert run(main()) == []
+
+
+def test_cancelling_every_caller_cancels_the_call():
+    async def main():
+        flights, cancelled, errors = SingleFlight(), [], []
+        flights.observer = lambda elapsed, error: errors.append(error)
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        callers = [asyncio.ensure_future(flights.do("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert len(flights.in_flight_ages()) == 1
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flights, cancelled, errors
+
+    flights, cancelled, errors = run(main())
+    assert cancelled == [1]
+    assert flights.in_flight == 0
+    assert [type(e) for e in errors] == [asyncio.CancelledError]
+
+
+def test_observer_sees_latency_and_outcome():
+    async def main():
+        flights, seen = SingleFlight(), []
+        flights.observer = lambda elapsed, error: seen.append((elapsed, error))
+        await flights.do("ok", lambda: asyncio.sleep(0.01, result=1))
+        with pytest.raises(ValueError):
+            await flights.do("bad", lambda: _raise(ValueError("x")))
+        return seen
+
+    seen = run(main())
+    assert seen[0][0] >= 0.01 and seen[0][1] is None
+    assert isinstance(seen[1][1], ValueError)
+
+
+def test_normalize_prompt_ignores_formatting():
+    assert normalize_prompt("  Pick a\n move\t(0,1) ") == normalize_prompt("Pick a move (0,1)")
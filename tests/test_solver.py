@@ -0,0 +1,73 @@
+import random
+from functools import lru_cache
+
+import pytest
+
+import checkpoint_3.solver as skeleton_solver
+import checkpoint_3_with_solution.solver as solution_solver
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+
+def won(mask):
+    return any(all(mask >> cell & 1 for cell in line) for line in LINES)
+
+
+@lru_cache(maxsize=None)
+def minimax(me, opp):
+    """Plain minimax over every continuation, on the solver's scale (a win is 1 + empty cells left)."""
+    empty = [cell for cell in range(9) if not (me | opp) >> cell & 1]
+    if won(opp):
+        return -(1 + len(empty))
+    if won(me):
+        return 1 + len(empty)
+    if not empty:
+        return 0
+    return max(-minimax(opp, me | (1 << cell)) for cell in empty)
+
+
+@pytest.fixture(params=[skeleton_solver, solution_solver], ids=["skeleton", "solution"])
+def solver(request):
+    return request.param
+
+
+def test_the_table_covers_every_reachable_position(solver):
+    assert len(solver.PERFECT) == 5478
+
+
+def test_perfect_play_matches_brute_force_minimax(solver):
+    positions = random.Random(0).sample(sorted(solver.PERFECT), 1000)
+    for me, opp in positions:
+        value, cell = solver.PERFECT[(me, opp)]
+        assert value == minimax(me, opp), (me, opp)
+        if cell >= 0:
+            assert not (me | opp) >> cell & 1
+            assert -minimax(opp, me | (1 << cell)) == value, (me, opp, cell)
+
+
+def test_move_values_match_brute_force_minimax(solver):
+    game = solver.TicTacToe().apply_move(1, 1, 'X').apply_move(0, 0, 'O')
+    values = solver.move_values(game, 'X')
+    assert [v for _, v in values] == sorted((v for _, v in values), reverse=True)
+    for (r, c), v in values:
+        assert v == -minimax(game.o, game.x | (1 << (3 * r + c)))
+
+
+def test_boards_off_the_table_are_solved_on_demand(solver):
+    # X two marks ahead (an edited board) is never reached from the empty board
+    game = solver.TicTacToe().apply_move(0, 0, 'X').apply_move(2, 2, 'X')
+    assert (game.o, game.x) not in solver.PERFECT
+    value, move = solver.solve(game, 'O')
+    assert value == minimax(game.o, game.x)
+    r, c = move
+    assert -minimax(game.x, game.o | (1 << (3 * r + c))) == value
+
+
+def test_solve_with_tree_records_the_replies_along_the_best_line(solver):
+    game = solver.TicTacToe().apply_move(0, 0, 'X')
+    tree = solver.ThoughtTree()
+    root = tree.add_root(score_after=0)
+    score, path = solver.solve_with_tree(game, 'O', tree, root)
+    assert score == 0  # a draw with best play
+    assert len(list(tree.iter_children(root))) == 8
+    assert path and all(step.reason.startswith("solver: ") for step in path)
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+import checkpoint_3_with_solution.level_search as level_search
+import checkpoint_3_with_solution.search as search
+from checkpoint_3.game import TicTacToe
+from checkpoint_3.symmetry import INVERSE, MASK_PERM, PERM, canonical, canonical_index, remap_coords
+from checkpoint_3.transposition import EXACT, LOWER, UPPER, TranspositionTable
+from checkpoint_3_with_solution.deepening import run_strategy
+from checkpoint_3_with_solution.game import TicTacToe as SolutionGame
+from checkpoint_3_with_solution.schemas import Move
+from checkpoint_3_with_solution.transposition import TranspositionTable as SolutionTable
+
+
+def board(*moves):
+    game = TicTacToe()
+    for player, r, c in moves:
+        game = game.apply_move(r, c, player)
+    return game
+
+
+def image(game, sym):
+    return TicTacToe.from_masks(MASK_PERM[sym][game.x], MASK_PERM[sym][game.o])
+
+
+def cell_image(sym, r, c):
+    return divmod(PERM[sym][r * 3 + c], 3)
+
+
+GAME = board(('X', 0, 0), ('O', 1, 1), ('X', 0, 1))
+
+
+def test_symmetric_boards_share_a_canonical_index():
+    idx, _ = canonical_index(GAME.x, GAME.o)
+    for sym in range(8):
+        img = image(GAME, sym)
+        assert canonical_index(img.x, img.o)[0] == idx
+
+
+def test_perm_and_inverse_undo_each_other():
+    for sym in range(8):
+        assert [INVERSE[sym][PERM[sym][i]] for i in range(9)] == list(range(9))
+
+
+def test_canonical_is_the_smallest_image():
+    cx, co, sym = canonical(GAME.x, GAME.o)
+    assert (MASK_PERM[sym][GAME.x], MASK_PERM[sym][GAME.o]) == (cx, co)
+
+
+def test_remap_coords_rewrites_mentions_in_reasons():
+    assert remap_coords("block (0,2) then (1,1)", lambda r, c: (c, r)) == "block (2,0) then (1,1)"
+
+
+@pytest.mark.parametrize("sym", range(8))
+def test_probe_maps_the_best_move_onto_the_callers_board(sym):
+    tt = TranspositionTable()
+    tt.store(GAME, 'O', depth=2, score=40, move=(0, 2), reason="block (0,2), then fork from (2,0)")
+    hit = tt.probe(image(GAME, sym), 'O', depth=2)
+    assert hit is not None
+    assert hit.score == 40
+    assert hit.move == cell_image(sym, 0, 2)
+    assert hit.reason == "block ({},{}), then fork from ({},{})".format(*cell_image(sym, 0, 2), *cell_image(sym, 2, 0))
+
+
+def test_probe_needs_the_stored_depth():
+    tt = TranspositionTable()
+    tt.store(GAME, 'O', depth=1, score=10, move=(0, 2))
+    assert tt.probe(GAME, 'O', depth=2) is None
+    assert tt.probe(GAME, 'O', depth=1) is not None
+
+
+def test_side_to_move_beam_width_and_model_are_part_of_the_key():
+    tt = TranspositionTable()
+    tt.store(GAME, 'O', depth=2, score=10, move=(0, 2), beam_width=1, model_name="a")
+    assert tt.probe(GAME, 'X', depth=2, beam_width=1, model_name="a") is None
+    assert tt.probe(GAME, 'O', depth=2, beam_width=3, model_name="a") is None
+    assert tt.probe(GAME, 'O', depth=2, beam_width=1, model_name="b") is None
+    assert tt.probe(GAME, 'O', depth=2, beam_width=1, model_name="a") is not None
+
+
+def test_bounds_only_answer_windows_they_decide():
+    tt = TranspositionTable()
+    tt.store(GAME, 'O', depth=2, score=30, move=(0, 2), flag=LOWER)
+    assert tt.probe(GAME, 'O', depth=2, alpha=0, beta=50) is None
+    assert tt.probe(GAME, 'O', depth=2, alpha=0, beta=30).score == 30
+
+    tt.store(GAME, 'X', depth=2, score=-20, move=(0, 2), flag=UPPER)
+    assert tt.probe(GAME, 'X', depth=2, alpha=-50, beta=50) is None
+    assert tt.probe(GAME, 'X', depth=2, alpha=-20, beta=50).score == -20
+
+
+def test_store_keeps_the_deeper_or_exact_result():
+    tt = TranspositionTable()
+    tt.store(GAME, 'O', depth=3, score=10, move=(0, 2))
+    tt.store(GAME, 'O', depth=2, score=99, move=(2, 2))
+    assert tt.probe(GAME, 'O', depth=2).score == 10
+
+    tt.store(GAME, 'X', depth=2, score=10, move=(0, 2), flag=EXACT)
+    tt.store(GAME, 'X', depth=2, score=99, move=(2, 2), flag=LOWER)
+    assert tt.probe(GAME, 'X', depth=2).score == 10
+
+
+def test_table_is_bounded_and_evicts_least_recently_used():
+    tt = TranspositionTable(max_entries=2)
+    first, second, third = board(('X', 0, 0)), board(('X', 1, 1)), board(('X', 0, 1))
+    tt.store(first, 'O', depth=1, score=1, move=(1, 1))
+    tt.store(second, 'O', depth=1, score=2, move=(0, 0))
+    assert tt.probe(first, 'O', depth=1) is not None  # refreshes `first`
+    tt.store(third, 'O', depth=1, score=3, move=(1, 1))
+    assert len(tt) == 2
+    assert tt.probe(second, 'O', depth=1) is None
+    assert tt.probe(first, 'O', depth=1) is not None
+    assert tt.probe(third, 'O', depth=1) is not None
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake proposal calls (single and batched): every legal move in a fixed order."""
+    def propose(game):
+        return [Move(row=r, col=c, reason=f"take ({r},{c})") for r, c in sorted(game.available_positions())]
+
+    async def create_thoughts(game, legal, player, model_name=None, api_key=None):
+        return propose(game)
+
+    async def create_thoughts_batch(boards, model_name=None, api_key=None):
+        return {board_id: propose(game) for board_id, game, _ in boards}
+
+    monkeypatch.setattr(search, "create_thoughts", create_thoughts)
+    monkeypatch.setattr(level_search, "create_thoughts_batch", create_thoughts_batch)
+
+
+@pytest.mark.parametrize("strategy", ["beam", "level"])
+def test_repeated_and_symmetric_positions_still_get_a_tree(llm, strategy):
+    tt = SolutionTable()
+    game = SolutionGame().apply_move(0, 1, 'X')  # nothing forced: every move is a candidate
+    rotated = SolutionGame.from_masks(MASK_PERM[1][game.x], MASK_PERM[1][game.o])
+    results = [asyncio.run(run_strategy(strategy, g, 'O', 0, max_depth=2, transpositions=tt))
+               for g in (game, game, rotated)]
+    assert tt.hits > 0  # later searches do reuse subtrees...
+    for result in results:  # ...but the root is always expanded
+        root = result.tree.root_id
+        assert len(result.tree.nodes[root].children) == len(game.available_positions())
+    first = results[0].path[0]
+    assert (results[1].path[0].row, results[1].path[0].col) == (first.row, first.col)
+    assert (results[2].path[0].row, results[2].path[0].col) == cell_image(1, first.row, first.col)
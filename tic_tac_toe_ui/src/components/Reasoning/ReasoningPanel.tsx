@@ -8,6 +8,24 @@ interface ReasoningPanelProps {
 	cotHistory?: string[];
 }
 
+const ENGINE_NAMES: Record<string, string> = {
+	tot: 'Tree-of-Thought search',
+	cot: 'Chain-of-Thought',
+	solver: 'exact solver (no LLM)',
+	book: 'opening book',
+};
+
+function EngineNote({ response }: { response: AiResponse }) {
+	if (!response.engine) return null;
+	const name = ENGINE_NAMES[response.engine] ?? response.engine;
+	return (
+		<div className={response.degradedFrom ? 'engine-note degraded' : 'engine-note'}>
+			Answered by {name}
+			{response.degradedFrom && ` instead of ${response.degradedFrom.toUpperCase()} (${response.degradedReason ?? 'degraded'})`}
+		</div>
+	);
+}
+
 export function ReasoningPanel({ response, cotHistory }: ReasoningPanelProps) {
 	const navigate = useNavigate();
 	if (!response) return null;
@@ -19,6 +37,7 @@ export function ReasoningPanel({ response, cotHistory }: ReasoningPanelProps) {
 		return (
 			<section className="reasoning-panel">
 				<h3>AI Reasoning (CoT)</h3>
+				<EngineNote response={response} />
 				<pre className="reasoning-text">{items.join('\n\n')}</pre>
 			</section>
 		);
@@ -43,6 +62,7 @@ export function ReasoningPanel({ response, cotHistory }: ReasoningPanelProps) {
 	return (
 		<section className="reasoning-panel">
 			<h3>AI Reasoning (ToT)</h3>
+			<EngineNote response={response} />
 			{response.reasoning && (
 				<pre className="reasoning-text">{response.reasoning}</pre>
 			)}
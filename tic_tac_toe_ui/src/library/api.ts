@@ -26,8 +26,14 @@ export async function requestAiMove({ board, player, mode, beam, depth, abortSig
 	});
 	if (!res.ok) throw new Error(await res.text());
 	const data = await res.json();
+	const label = {
+		engine: data.engine ?? undefined,
+		degradedFrom: data.degraded_from ?? undefined,
+		degradedReason: data.degraded_reason ?? undefined,
+	};
 	if (data.mode === 'cot') {
-		return { mode: 'cot', move: data.move, reasoning: data.reasoning ?? '' };
+		return { mode: 'cot', move: data.move, reasoning: data.reasoning ?? '', ...label };
 	}
-	return { mode: 'tot', move: data.move, reasoning: data.reasoning ?? '', tree: data.tree as TreeNode };
+	// 'tot', or the solver's answer (also a tree) when the server degraded the request
+	return { mode: 'tot', move: data.move, reasoning: data.reasoning ?? '', tree: data.tree as TreeNode, ...label };
 } 
\ No newline at end of file
@@ -7,7 +7,16 @@ export type Board = CellValue[];
 
 export type Mode = 'cot' | 'tot';
 
-export interface CotResponse {
+// Which backend engine produced an answer
+export type Engine = 'tot' | 'cot' | 'solver' | 'book';
+
+export interface EngineLabel {
+	engine?: Engine;
+	degradedFrom?: string; // requested mode, when a cheaper engine answered (server busy or LLM degraded)
+	degradedReason?: string; // e.g. 'llm_slow', 'llm_errors', 'llm_timeout', 'rate_limit'
+}
+
+export interface CotResponse extends EngineLabel {
 	mode: 'cot';
 	move: number; // 0..8 index chosen by AI
 	reasoning: string; // chain-of-thought style explanation (from backend)
@@ -21,7 +30,7 @@ export interface TreeNode {
 	children?: TreeNode[];
 }
 
-export interface TotResponse {
+export interface TotResponse extends EngineLabel {
 	mode: 'tot';
 	move: number; // 0..8 index chosen by AI
 	reasoning: string; // overall ToT summary reasoning